@@ -1,8 +1,40 @@
 import os
+import asyncio
+import base64
+import csv
+import functools
+import hashlib
+import importlib.util
+import inspect
+import io
+import json
+import random
+import secrets
+import socket
+import threading
+import time
+import zipfile
+import click
 import mysql.connector
-from flask import Flask, render_template, request, redirect, url_for, flash, session
+from flask import Flask, Response, abort, render_template, request, redirect, url_for, flash, g, get_flashed_messages, jsonify, has_app_context, has_request_context, session, stream_with_context, copy_current_request_context
 from dotenv import load_dotenv
-from datetime import date, timedelta
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from cache import DataVersions, TTLCache
+from db_pool import ConnectionPool, PoolTimeout
+from events import EventHub
+from index_advisor import advise
+from jobs import JobQueue, JobWorker
+from metrics import InstrumentedCursor, MetricsRegistry
+from migrate import MigrationError, ensure_database, migrate, record_property, status
+from models import (CUSTOMER_COLUMNS, EMPLOYEE_COLUMNS, ROOM_COLUMNS, SCHEDULE_ENTRY_COLUMNS,
+                    Customer, Employee, Room, ScheduleEntry, fetch_models, iter_rows)
+from occupancy import calendar_rows, occupancy_report, occupied_days
+from properties import PropertyRegistry, load_properties
+from query_budget import QueryBudgetExceeded, RequestQueryLog, budget_log, check_budget, query_budget
+from schedule_optimizer import floor_weights, optimize_week
 
 load_dotenv() # Load environment variables from .env file
 
@@ -17,29 +49,160 @@ db_config = {
     'database': os.getenv('DB_NAME')
 }
 
+# --- Properties ---
+# Each hotel of the group (HOTEL_PROPERTIES, see properties.py) has its own database and
+# connection pool. A request works on one property: ?property=<code> or an X-Property
+# header, else the one picked in the navbar (kept in the session), else the first.
+# Caches, render stamps and room events are kept per property.
+def make_pool(config):
+    return ConnectionPool(
+        config,
+        size=int(os.getenv('DB_POOL_SIZE', 10)),
+        timeout=float(os.getenv('DB_POOL_TIMEOUT', 5)),
+        recycle=int(os.getenv('DB_POOL_RECYCLE', 3600)),
+        ping_interval=int(os.getenv('DB_POOL_PING_INTERVAL', 30))
+    )
+
+properties = PropertyRegistry(load_properties(db_config), make_pool)
+db_pool = properties.pool(properties.default) # The default property's pool
+
+def current_property():
+    """The property the current request (or job run) works on."""
+    if has_app_context() and 'property' in g:
+        return g.property
+    return properties.default
+
+@app.before_request
+def select_property():
+    code = request.args.get('property') or request.headers.get('X-Property')
+    if code:
+        g.property = properties.get(code)
+        if g.property is None:
+            abort(404, description=f"Unknown property '{code}'.")
+    else:
+        g.property = properties.get(session.get('property')) or properties.default
+
+@app.context_processor
+def inject_properties():
+    return {'properties': properties, 'current_property': current_property()}
+
+@app.route('/property/<code>')
+def switch_property(code):
+    """Makes code the property the following pages work on"""
+    prop = properties.get(code)
+    if prop is None:
+        abort(404, description=f"Unknown property '{code}'.")
+    session['property'] = prop.code
+    return redirect(url_for('index'))
+
+# --- Instrumentation ---
+# Request, query and transaction timings, exposed in Prometheus format at /metrics.
+# Set SLOW_QUERY_MS to log statements slower than that many milliseconds.
+app_metrics = MetricsRegistry(slow_query_ms=float(os.getenv('SLOW_QUERY_MS')) if os.getenv('SLOW_QUERY_MS') else None)
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_timing(response):
+    if 'request_started' in g:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        app_metrics.observe_request(route, request.method, response.status_code, time.perf_counter() - g.request_started)
+    return response
+
+# --- Query Budgets ---
+# Development/test mode: set QUERY_BUDGET_MODE=warn to log, or =raise to fail the request,
+# when a route runs more SQL statements than its @query_budget (QUERY_BUDGET_DEFAULT for
+# undeclared routes) or repeats one query shape more than QUERY_REPEAT_LIMIT times (N+1).
+# Responses then carry X-Query-Count and X-Query-Round-Trips headers. Rows streamed after
+# the response starts (exports) are not counted.
+QUERY_BUDGET_MODE = os.getenv('QUERY_BUDGET_MODE', 'off').lower()
+QUERY_BUDGET_DEFAULT = int(os.getenv('QUERY_BUDGET_DEFAULT', 10))
+QUERY_REPEAT_LIMIT = int(os.getenv('QUERY_REPEAT_LIMIT', 2))
+
+def count_statement(fingerprint_text, seconds, rows, failed):
+    if has_request_context() and 'query_log' in g:
+        g.query_log.record_statement(fingerprint_text)
+
+def count_round_trip():
+    """Records a commit/rollback against the current request's query log."""
+    if has_request_context() and 'query_log' in g:
+        g.query_log.record_round_trip()
+
+if QUERY_BUDGET_MODE in ('warn', 'raise'):
+    app_metrics.query_listeners.append(count_statement)
+
+    @app.before_request
+    def start_query_log():
+        g.query_log = RequestQueryLog()
+
+    @app.after_request
+    def check_query_budget(response):
+        log = g.pop('query_log', None)
+        if log is None:
+            return response
+        response.headers['X-Query-Count'] = str(log.count)
+        response.headers['X-Query-Round-Trips'] = str(log.round_trips)
+        view = app.view_functions.get(request.endpoint)
+        budget = getattr(view, 'query_budget', QUERY_BUDGET_DEFAULT)
+        repeat_limit = getattr(view, 'query_repeat_limit', None) or QUERY_REPEAT_LIMIT
+        problems = check_budget(log, f"{request.method} {request.endpoint}", budget, repeat_limit)
+        for problem in problems:
+            budget_log.warning(problem)
+        if problems and QUERY_BUDGET_MODE == 'raise':
+            raise QueryBudgetExceeded('; '.join(problems))
+        return response
+
+def acquire_connection(prop=None):
+    """Checks a connection out of the property's pool (the current one by default), recording how long it took."""
+    started = time.perf_counter()
+    conn = properties.pool(prop or current_property()).acquire()
+    app_metrics.observe_acquire(time.perf_counter() - started)
+    return conn
+
+def release_connection(conn, prop=None):
+    properties.pool(prop or current_property()).release(conn)
+
 def get_db_connection():
-    """Establishes a connection to the database."""
+    """Returns the connection bound to the current request, checking one out of the pool on first use."""
+    if 'db_conn' in g:
+        return g.db_conn
     try:
-        conn = mysql.connector.connect(**db_config)
-        return conn
-    except mysql.connector.Error as err:
+        g.db_conn = acquire_connection()
+        return g.db_conn
+    except (mysql.connector.Error, PoolTimeout) as err:
         flash(f"Database Connection Error: {err}", "danger")
         print(f"Error connecting to database: {err}") # Log error
         return None
 
-def execute_query(query, params=None, fetch_one=False, fetch_all=False, commit=False):
-    """Executes a SQL query and returns results."""
+@app.teardown_appcontext
+def release_db_connection(exception=None):
+    """Returns the request's connection to the pool."""
+    conn = g.pop('db_conn', None)
+    if conn is not None:
+        release_connection(conn)
+
+def execute_query(query, params=None, fetch_one=False, fetch_all=False, commit=False, model=None):
+    """Executes a SQL query and returns results.
+
+    Rows are dicts, or with model (see models.py) slotted model instances read from a tuple cursor.
+    """
     conn = get_db_connection()
     if not conn:
         return None # Or raise an exception
 
-    cursor = conn.cursor(dictionary=True) # Use dictionary cursor
+    # Use dictionary cursor unless the rows become models
+    cursor = InstrumentedCursor(conn.cursor(dictionary=model is None), app_metrics)
     result = None
     try:
         cursor.execute(query, params or ())
         if commit:
             conn.commit()
+            count_round_trip()
             result = cursor.lastrowid
+        elif model is not None and (fetch_one or fetch_all):
+            result = fetch_models(cursor, model, one=fetch_one)
         elif fetch_one:
             result = cursor.fetchone()
         elif fetch_all:
@@ -48,115 +211,770 @@ def execute_query(query, params=None, fetch_one=False, fetch_all=False, commit=F
         flash(f"Database Query Error: {err}", "danger")
         print(f"Query Error: {err}\nQuery: {query}\nParams: {params}") # Log error
         conn.rollback() # Rollback on error if changes were made
+        count_round_trip()
     finally:
         cursor.close()
-        conn.close()
     return result
 
+def iter_query(query, params=None, model=None, batch_size=1000):
+    """Yields a query's rows as tuples (or models) while they stream from the server.
+
+    Runs on the request's connection, so finish (or close) the iteration before running
+    another query. On a database error, flashes it and stops.
+    """
+    conn = get_db_connection()
+    if not conn:
+        return
+    cursor = InstrumentedCursor(conn.cursor(buffered=False), app_metrics)
+    finished = False
+    try:
+        cursor.execute(query, params or ())
+        yield from iter_rows(cursor, model, batch_size)
+        finished = True
+    except mysql.connector.Error as err:
+        finished = True
+        flash(f"Database Query Error: {err}", "danger")
+        print(f"Query Error: {err}\nQuery: {query}\nParams: {params}") # Log error
+    finally:
+        if not finished:
+            cursor.fetchall() # Stopped early: the connection can't run another query until the rest is read
+        cursor.close()
+
+# Deadlocks and lock wait timeouts are safe to retry: the server rolled the transaction back
+RETRYABLE_ERRNOS = {1213, 1205} # ER_LOCK_DEADLOCK, ER_LOCK_WAIT_TIMEOUT
+TRANSACTION_RETRIES = int(os.getenv('DB_TRANSACTION_RETRIES', 3))
+
+def run_in_transaction(conn, work, name='transaction', retries=TRANSACTION_RETRIES):
+    """Runs work(cursor) and commits, rolling back on any error.
+
+    Deadlocks and lock wait timeouts are retried up to `retries` times with jittered
+    exponential backoff; work must therefore be safe to run again from the start.
+    Each attempt's duration is recorded under `name` in /metrics.
+    """
+    for attempt in range(retries + 1):
+        cursor = InstrumentedCursor(conn.cursor(dictionary=True), app_metrics)
+        started = time.perf_counter()
+        outcome = 'rollback'
+        try:
+            result = work(cursor)
+            conn.commit()
+            outcome = 'commit'
+            return result
+        except mysql.connector.Error as err:
+            conn.rollback()
+            if err.errno not in RETRYABLE_ERRNOS or attempt == retries:
+                raise
+            outcome = 'retry'
+            print(f"Transaction retry {attempt + 1}/{retries} after: {err}") # Log retry
+            time.sleep(0.01 * (2 ** attempt) * (1 + random.random()))
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            count_round_trip() # The commit or rollback
+            app_metrics.observe_transaction(name, outcome, time.perf_counter() - started)
+
 # --- Helper Functions ---
 def get_room_details(room_id):
-    query = """
-        SELECT r.room_id, r.room_number, r.floor, rt.name as type_name, rt.cost_per_day, r.is_occupied
+    query = f"""
+        SELECT {ROOM_COLUMNS}
         FROM rooms r
         JOIN room_types rt ON r.type_id = rt.type_id
         WHERE r.room_id = %s
     """
-    return execute_query(query, (room_id,), fetch_one=True)
+    return execute_query(query, (room_id,), fetch_one=True, model=Room)
 
 def get_customer_details(customer_id):
-    query = "SELECT * FROM customers WHERE customer_id = %s"
-    return execute_query(query, (customer_id,), fetch_one=True)
+    query = f"SELECT {CUSTOMER_COLUMNS} FROM customers c LEFT JOIN rooms r ON c.assigned_room_id = r.room_id WHERE c.customer_id = %s"
+    return execute_query(query, (customer_id,), fetch_one=True, model=Customer)
 
 def get_employee_details(employee_id):
-     query = "SELECT * FROM employees WHERE employee_id = %s"
-     return execute_query(query, (employee_id,), fetch_one=True)
-
+     query = f"SELECT {EMPLOYEE_COLUMNS} FROM employees e WHERE e.employee_id = %s"
+     return execute_query(query, (employee_id,), fetch_one=True, model=Employee)
 
-# --- Routes ---
-@app.route('/')
-def index():
-    """Homepage / Dashboard"""
-    # Get availability summary
-    available_rooms_query = """
-        SELECT rt.name, COUNT(r.room_id) as count
+def get_available_rooms():
+    query = """
+        SELECT r.room_id, r.room_number, rt.name as type_name
         FROM rooms r
         JOIN room_types rt ON r.type_id = rt.type_id
         WHERE r.is_occupied = FALSE
-        GROUP BY rt.name
+        ORDER BY r.room_number
     """
-    total_rooms_query = """
-        SELECT rt.name, COUNT(r.room_id) as count
+    return execute_query(query, fetch_all=True)
+
+# --- Caches ---
+# The dashboard and the report/schedule form lists are served from memory. Writes
+# invalidate (or update) the affected entries after commit; the TTLs only bound
+# staleness across separate worker processes.
+DAYS_OF_WEEK = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+availability_cache = TTLCache(maxsize=len(properties), ttl=float(os.getenv('AVAILABILITY_CACHE_TTL', 30)))
+reference_cache = TTLCache(maxsize=32 * len(properties), ttl=float(os.getenv('REFERENCE_CACHE_TTL', 300)))
+# Report query results, kept server-side under a short token instead of in the session cookie
+query_results_store = TTLCache(maxsize=int(os.getenv('RESULT_STORE_SIZE', 200)), ttl=float(os.getenv('RESULT_STORE_TTL', 600)))
+
+def property_key(name):
+    """Cache key for name in the current property."""
+    return (current_property().property_id, name)
+
+def get_availability():
+    """Returns {type name: {'available': n, 'total': n}} for every room type."""
+    return availability_cache.get_or_load(property_key('availability'), _load_availability) or {}
+
+def _load_availability():
+    availability_query = """
+        SELECT rt.name,
+               COUNT(r.room_id) as total,
+               COALESCE(SUM(r.is_occupied = FALSE), 0) as available
+        FROM room_types rt
+        LEFT JOIN rooms r ON r.type_id = rt.type_id
+        GROUP BY rt.type_id, rt.name
+        ORDER BY rt.type_id
+    """
+    rows = execute_query(availability_query, fetch_all=True)
+    if rows is None:
+        return None # Query failed (already flashed); don't cache the failure
+    return {row['name']: {'available': int(row['available']), 'total': int(row['total'])} for row in rows}
+
+def get_room_list():
+    return reference_cache.get_or_load(property_key('rooms'), lambda: execute_query(
+        "SELECT room_id, room_number FROM rooms ORDER BY room_number", fetch_all=True))
+
+def get_room_directory():
+    """Every room with its floor and type, for the availability search and calendar."""
+    return reference_cache.get_or_load(property_key('room_directory'), lambda: execute_query("""
+        SELECT r.room_id, r.room_number, r.floor, r.type_id, rt.name as type_name, rt.cost_per_day
         FROM rooms r
         JOIN room_types rt ON r.type_id = rt.type_id
-        GROUP BY rt.name
+        ORDER BY r.floor, r.room_number
+    """, fetch_all=True))
+
+def get_room_type_list():
+    return reference_cache.get_or_load(property_key('room_types'), lambda: execute_query(
+        "SELECT type_id, name FROM room_types ORDER BY type_id", fetch_all=True))
+
+def get_active_customer_list():
+    return reference_cache.get_or_load(property_key('active_customers'), lambda: execute_query(
+        "SELECT customer_id, first_name, last_name FROM customers WHERE check_out_date IS NULL ORDER BY last_name", fetch_all=True))
+
+def get_city_list():
+    def load():
+        cities = execute_query("SELECT DISTINCT city FROM customers ORDER BY city", fetch_all=True)
+        return [c['city'] for c in cities] if cities is not None else None
+    return reference_cache.get_or_load(property_key('cities'), load)
+
+def get_floor_list():
+    def load():
+        floors = execute_query("SELECT DISTINCT floor FROM rooms ORDER BY floor", fetch_all=True)
+        return [f['floor'] for f in floors] if floors is not None else None
+    return reference_cache.get_or_load(property_key('floors'), load)
+
+def get_employee_list():
+    return reference_cache.get_or_load(property_key('employees'), lambda: execute_query(
+        f"SELECT {EMPLOYEE_COLUMNS} FROM employees e ORDER BY e.last_name", fetch_all=True, model=Employee))
+
+def get_schedule_list():
+    query = f"""
+        SELECT {SCHEDULE_ENTRY_COLUMNS}
+        FROM cleaning_schedule cs
+        JOIN employees e ON cs.employee_id = e.employee_id
+        ORDER BY cs.day_of_week, cs.floor, e.last_name
     """
-    available_counts = {row['name']: row['count'] for row in execute_query(available_rooms_query, fetch_all=True)}
-    total_counts = {row['name']: row['count'] for row in execute_query(total_rooms_query, fetch_all=True)}
+    return reference_cache.get_or_load(property_key('schedule'), lambda: execute_query(query, fetch_all=True, model=ScheduleEntry))
+
+def get_cleaner_index():
+    """Returns {(floor, day_of_week): [cleaner, ...]} built from the whole cleaning schedule in one query."""
+    def load():
+        query = """
+            SELECT cs.floor, cs.day_of_week, e.employee_id, e.first_name, e.last_name, e.middle_name
+            FROM cleaning_schedule cs
+            JOIN employees e ON cs.employee_id = e.employee_id
+            ORDER BY e.last_name, e.first_name
+        """
+        rows = execute_query(query, fetch_all=True)
+        if rows is None:
+            return None
+        index = {}
+        for row in rows:
+            index.setdefault((row['floor'], row['day_of_week']), []).append(
+                {'first_name': row['first_name'], 'last_name': row['last_name'], 'middle_name': row['middle_name']})
+        return index
+    return reference_cache.get_or_load(property_key('cleaner_index'), load)
+
+def stays_changed(new_cities=(), occupied=(), freed=()):
+    """Call after committing a check-in or check-out, with the rooms it took or freed."""
+    get_data_versions().bump('stays')
+    availability_cache.invalidate(property_key('availability'))
+    reference_cache.invalidate(property_key('active_customers'))
+    new_cities = set(filter(None, new_cities))
+    if new_cities:
+        # Write-through so the reports form never has to rescan customer history for cities
+        reference_cache.update(property_key('cities'), lambda cities: sorted(set(cities) | new_cities))
+    if occupied or freed:
+        publish_room_changes(occupied, freed)
+
+def employees_changed():
+    """Call after hiring or dismissing an employee (dismissal cascades to the schedule)."""
+    get_data_versions().bump('employees', 'schedule')
+    reference_cache.invalidate(*map(property_key, ('employees', 'schedule', 'cleaner_index')))
+
+def schedule_changed():
+    """Call after adding or deleting cleaning schedule entries."""
+    get_data_versions().bump('schedule')
+    reference_cache.invalidate(*map(property_key, ('schedule', 'cleaner_index')))
+
+
+def get_report_form_data():
+    """Data needed for the forms on the reports page"""
+    return {
+        'rooms': get_room_list() or [],
+        'customers': get_active_customer_list() or [],
+        'days': DAYS_OF_WEEK,
+        'cities': get_city_list() or []
+    }
 
-    availability = {}
-    all_types = execute_query("SELECT name FROM room_types", fetch_all=True)
-    if all_types:
-        for type_info in all_types:
-            type_name = type_info['name']
-            total = total_counts.get(type_name, 0)
-            available = available_counts.get(type_name, 0)
-            availability[type_name] = {'available': available, 'total': total}
+# --- Render Cache ---
+# The big table pages (rooms, customer history, schedule, hotel report) are kept rendered,
+# keyed by the version stamps of the data they show. The *_changed() hooks above bump
+# those stamps, so a stale render is simply never looked up again. The page's SHA-256 is
+# its ETag, so browsers revalidate with If-None-Match and get a 304 without a query or a
+# render. Memory is bounded by RENDER_CACHE_BYTES (characters of HTML, LRU eviction); the
+# TTL bounds staleness across worker processes, whose stamps are separate. Each property
+# has its own stamps, and its pages their own keys.
+property_versions = {prop.property_id: DataVersions('stays', 'employees', 'schedule', 'revenue') for prop in properties}
+render_cache = TTLCache(maxsize=int(os.getenv('RENDER_CACHE_ENTRIES', 500)),
+                        ttl=float(os.getenv('RENDER_CACHE_TTL', 30)),
+                        maxweight=int(os.getenv('RENDER_CACHE_BYTES', 32 * 1024 * 1024)),
+                        weigh=lambda entry: len(entry[0]))
+
+def get_data_versions(prop=None):
+    """The data version stamps of a property (the current one by default)."""
+    return property_versions[(prop or current_property()).property_id]
+
+def cached_page_response(html, etag, last_modified):
+    response = Response(html, mimetype='text/html')
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    response.headers['Cache-Control'] = 'private, no-cache' # Revalidate every time
+    return response.make_conditional(request)
+
+def render_cached(*domains, daily=False):
+    """Serves the view from render_cache while the given data domains are unchanged.
+
+    The key is the property, the endpoint, its query string and the domains' stamp (and
+    today's date if daily). Pages with flash messages, or whose queries failed, are not cached.
+    """
+    def lookup():
+        if '_flashes' in session:
+            return None, None
+        key = (current_property().property_id, request.endpoint, request.query_string,
+               get_data_versions().stamp(*domains), date.today() if daily else None)
+        entry = render_cache.get(key)
+        if entry is None:
+            return key, None
+        return key, cached_page_response(*entry)
+
+    def store(key, rendered):
+        if key is None or not isinstance(rendered, str) or get_flashed_messages():
+            return rendered
+        # Stamp-based keys need no invalidation, but a write committed while rendering may be missing from it
+        if key[3] != get_data_versions().stamp(*domains):
+            return rendered
+        entry = (rendered, hashlib.sha256(rendered.encode()).hexdigest(), get_data_versions().last_modified(*domains))
+        render_cache.set(key, entry)
+        return cached_page_response(*entry)
+
+    def decorator(view):
+        if inspect.iscoroutinefunction(view):
+            @functools.wraps(view)
+            async def wrapper(*args, **kwargs):
+                key, response = lookup()
+                return response or store(key, await view(*args, **kwargs))
+        else:
+            @functools.wraps(view)
+            def wrapper(*args, **kwargs):
+                key, response = lookup()
+                return response or store(key, view(*args, **kwargs))
+        return wrapper
+    return decorator
 
-    return render_template('index.html', availability=availability)
+
+# --- Routes ---
+@app.route('/')
+@query_budget(1)
+def index():
+    """Homepage / Dashboard"""
+    events_version = get_room_events().version # Before reading, so changes made meanwhile are replayed
+    return render_template('index.html', availability=get_availability(), events_version=events_version)
 
 # --- Room Management ---
 @app.route('/rooms')
+@query_budget(1)
+@render_cached('stays')
 def view_rooms():
     """View all rooms and their status"""
-    query = """
-        SELECT r.room_id, r.room_number, r.floor, rt.name as type_name, rt.cost_per_day, r.is_occupied
+    query = f"""
+        SELECT {ROOM_COLUMNS}
         FROM rooms r
         JOIN room_types rt ON r.type_id = rt.type_id
         ORDER BY r.floor, r.room_number
     """
-    rooms = execute_query(query, fetch_all=True)
-    return render_template('rooms.html', rooms=rooms or [])
+    events_version = get_room_events().version # Before reading, so changes made meanwhile are replayed
+    rooms = execute_query(query, fetch_all=True, model=Room)
+    return render_template('rooms.html', rooms=rooms or [], events_version=events_version)
+
+# --- Live Room Updates ---
+# Open /rooms and dashboard pages follow occupancy changes instead of reloading. Every
+# committed check-in/check-out publishes one event (the rooms whose state flipped plus the
+# per-type availability) to an in-process hub; pages subscribe over server-sent events
+# (/events/rooms) or poll the JSON delta endpoint. Neither holds a database connection
+# while waiting. The hub is per process: with several worker processes, a page only sees
+# changes made through its own worker until it reloads. Each property has its own hub.
+property_room_events = {prop.property_id: EventHub(history=int(os.getenv('ROOM_EVENT_HISTORY', 1000))) for prop in properties}
+ROOM_EVENT_KEEPALIVE = float(os.getenv('ROOM_EVENT_KEEPALIVE', 15)) # Seconds between keep-alive comments
+ROOM_EVENT_STREAM_SECONDS = float(os.getenv('ROOM_EVENT_STREAM_SECONDS', 300)) # Then the browser reconnects
+ROOM_EVENT_MAX_WAIT = 30 # Longest long-poll, in seconds
+
+def get_room_events(prop=None):
+    """The room event hub of a property (the current one by default)."""
+    return property_room_events[(prop or current_property()).property_id]
+
+def publish_room_changes(occupied=(), freed=()):
+    """Publishes rooms whose occupancy flipped, with the fresh per-type availability."""
+    rooms = [{'room_id': int(room_id), 'is_occupied': True} for room_id in occupied]
+    rooms += [{'room_id': int(room_id), 'is_occupied': False} for room_id in freed]
+    get_room_events().publish({'rooms': rooms, 'availability': get_availability()})
+
+@app.route('/api/rooms/changes')
+@query_budget(0)
+def room_changes_api():
+    """JSON: occupancy changes after ?since=<version>; &wait=<seconds> long-polls until there is one"""
+    since = request.args.get('since', type=int)
+    wait = min(max(request.args.get('wait', 0, type=float), 0), ROOM_EVENT_MAX_WAIT)
+    room_events = get_room_events()
+    if since is None:
+        events = None
+    else:
+        events = room_events.wait(since, wait) if wait else room_events.since(since)
+    if events is None: # Unknown or too old a version: reload the page
+        return jsonify({'version': room_events.version, 'reset': True})
+    return jsonify({'version': events[-1][0] if events else since,
+                    'changes': [dict(payload, version=version) for version, payload in events]})
+
+@app.route('/events/rooms')
+@query_budget(0)
+def room_events_stream():
+    """Server-sent events: one 'rooms' event per committed occupancy change after ?since=<version>"""
+    last_event_id = request.headers.get('Last-Event-ID', type=int) # Set by the browser on reconnect
+    room_events = get_room_events() # The stream runs after the request context is gone
+    since = last_event_id if last_event_id is not None else request.args.get('since', room_events.version, type=int)
+
+    def stream(version):
+        deadline = time.monotonic() + ROOM_EVENT_STREAM_SECONDS
+        with room_events.subscribe():
+            yield "retry: 3000\n\n"
+            while time.monotonic() < deadline:
+                events = room_events.wait(version, ROOM_EVENT_KEEPALIVE)
+                if events is None:
+                    yield "event: reset\ndata: {}\n\n"
+                    return
+                if not events:
+                    yield ": keepalive\n\n"
+                for event_version, payload in events:
+                    yield f"id: {event_version}\nevent: rooms\ndata: {json.dumps(payload)}\n\n"
+                    version = event_version
+
+    return Response(stream(since), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+# --- Reservations ---
+# Stays and future bookings as [start_date, end_date) night intervals (migrations/0006).
+# "Is the room free from A to B" is "no interval with end_date > A and start_date < B",
+# which is one range seek per room on idx_reservations_room_interval instead of a scan
+# of the stay history. Everything that writes a room's intervals locks its rooms row first.
+# Completed stays end at their check-out, so only bookings and stays in house can conflict.
+OPEN_STAY_END = '9999-12-31' # In-house guests without an expected check-out
+DEFAULT_CALENDAR_DAYS = 30
+MAX_CALENDAR_DAYS = 366
+
+RESERVATION_CONFLICT_QUERY = """
+    SELECT reservation_id FROM reservations
+    WHERE room_id = %s AND end_date > %s AND start_date < %s AND status IN ('booked', 'in_house') AND reservation_id <> %s
+"""
+
+INSERT_RESERVATION_QUERY = """
+    INSERT INTO reservations (room_id, customer_id, guest_name, start_date, end_date, status)
+    VALUES (%s, %s, %s, %s, %s, %s)
+"""
+
+FREE_ROOMS_QUERY = """
+    SELECT r.room_id, r.room_number, r.floor, r.type_id, rt.name as type_name, rt.cost_per_day
+    FROM rooms r
+    JOIN room_types rt ON r.type_id = rt.type_id
+    WHERE (%s IS NULL OR r.type_id = %s)
+      AND NOT EXISTS (
+          SELECT 1 FROM reservations v
+          WHERE v.room_id = r.room_id AND v.end_date > %s AND v.start_date < %s AND v.status IN ('booked', 'in_house')
+      )
+    ORDER BY r.floor, r.room_number
+"""
+
+class ReservationError(Exception):
+    """A booking was rejected; nothing was written."""
+
+def get_stay_period():
+    """Reads start/end (check-out day) and an optional type_id from the query string.
+
+    Defaults to tonight. Returns (start, end, type_id), or (None, None, None) if invalid.
+    """
+    today = date.today()
+    try:
+        start = date.fromisoformat(request.args.get('start') or today.isoformat())
+        end = date.fromisoformat(request.args.get('end') or (start + timedelta(days=1)).isoformat())
+    except ValueError:
+        return None, None, None
+    if end <= start or (end - start).days > MAX_CALENDAR_DAYS:
+        return None, None, None
+    return start, end, request.args.get('type_id', type=int)
+
+def find_free_rooms(start, end, type_id=None):
+    """Rooms (optionally of one type) with no reservation or stay overlapping the nights [start, end)."""
+    return execute_query(FREE_ROOMS_QUERY, (type_id, type_id, start.isoformat(), end.isoformat()), fetch_all=True)
+
+def book_room(conn, room_id, guest_name, start, end):
+    """Reserves the room for the nights [start, end). Returns the new reservation_id."""
+    def work(cursor):
+        cursor.execute("SELECT room_id FROM rooms WHERE room_id = %s FOR UPDATE", (room_id,))
+        if not cursor.fetchall():
+            raise ReservationError("Room not found.")
+        cursor.execute(RESERVATION_CONFLICT_QUERY, (room_id, start, end, 0))
+        if cursor.fetchall():
+            raise ReservationError("The room is already reserved for some of these nights.")
+        cursor.execute(INSERT_RESERVATION_QUERY, (room_id, None, guest_name, start, end, 'booked'))
+        return cursor.lastrowid
+    return run_in_transaction(conn, work, name='book_room')
+
+@app.route('/rooms/availability')
+@query_budget(3)
+def room_availability():
+    """Search for rooms free over a date range, and book them"""
+    start, end, type_id = get_stay_period()
+    if start is None:
+        flash(f"Invalid dates. Check-out must be after check-in and at most {MAX_CALENDAR_DAYS} nights later.", "warning")
+        return redirect(url_for('room_availability'))
+    rooms = find_free_rooms(start, end, type_id)
+    return render_template('room_availability.html', rooms=rooms or [], start=start, end=end,
+                           type_id=type_id, room_types=get_room_type_list() or [])
+
+@app.route('/api/rooms/available')
+@query_budget(1)
+def room_availability_api():
+    """JSON: rooms free for ?start=YYYY-MM-DD&end=YYYY-MM-DD (check-out day), optionally &type_id="""
+    start, end, type_id = get_stay_period()
+    if start is None:
+        return jsonify({'error': f"Use start/end as YYYY-MM-DD with end after start, at most {MAX_CALENDAR_DAYS} nights."}), 400
+    rooms = find_free_rooms(start, end, type_id)
+    if rooms is None:
+        return jsonify({'error': "Database unavailable."}), 503
+    return jsonify({'start': start.isoformat(), 'end': end.isoformat(), 'type_id': type_id,
+                    'rooms': [dict(room, cost_per_day=str(room['cost_per_day'])) for room in rooms]})
+
+@app.route('/rooms/calendar')
+@query_budget(3)
+def room_calendar():
+    """Room x day grid of stays and bookings"""
+    try:
+        start = date.fromisoformat(request.args.get('start') or date.today().isoformat())
+    except ValueError:
+        start = date.today()
+    days = min(max(request.args.get('days', DEFAULT_CALENDAR_DAYS, type=int), 1), MAX_CALENDAR_DAYS)
+    type_id = request.args.get('type_id', type=int)
+    end = start + timedelta(days=days)
+
+    rooms = [room for room in get_room_directory() or [] if type_id is None or room['type_id'] == type_id]
+    # Served by idx_reservations_window: only intervals ending after the window starts are read
+    reservations = execute_query("""
+        SELECT v.reservation_id, v.room_id, v.start_date, v.end_date, v.status, v.guest_name, c.first_name, c.last_name
+        FROM reservations v
+        LEFT JOIN customers c ON v.customer_id = c.customer_id
+        WHERE v.end_date > %s AND v.start_date < %s AND v.status <> 'cancelled'
+    """, (start.isoformat(), end.isoformat()), fetch_all=True) or []
+    return render_template('room_calendar.html',
+                           rows=calendar_rows(rooms, reservations, start, days),
+                           dates=[start + timedelta(days=i) for i in range(days)],
+                           start=start, days=days, type_id=type_id, room_types=get_room_type_list() or [],
+                           prev_start=start - timedelta(days=days), next_start=end)
+
+@app.route('/reservations')
+@query_budget(1)
+def view_reservations():
+    """Upcoming bookings not yet checked in"""
+    reservations = execute_query("""
+        SELECT v.reservation_id, v.guest_name, v.start_date, v.end_date, r.room_id, r.room_number, rt.name as type_name
+        FROM reservations v
+        JOIN rooms r ON v.room_id = r.room_id
+        JOIN room_types rt ON r.type_id = rt.type_id
+        WHERE v.status = 'booked' AND v.end_date > %s
+        ORDER BY v.start_date, r.room_number
+    """, (date.today().isoformat(),), fetch_all=True)
+    return render_template('reservations.html', reservations=reservations or [], today=date.today())
+
+@app.route('/reservations/book', methods=['POST'])
+@query_budget(3)
+def book_reservation():
+    """Reserve a room for a date range"""
+    guest_name = request.form.get('guest_name', '').strip()
+    room_id = request.form.get('room_id', type=int)
+    try:
+        start = date.fromisoformat(request.form.get('start_date', ''))
+        end = date.fromisoformat(request.form.get('end_date', ''))
+    except ValueError:
+        start = end = None
+    back = url_for('room_availability', start=request.form.get('start_date'), end=request.form.get('end_date'))
+    if not guest_name or not room_id or start is None:
+        flash("Guest name, room and dates are required.", "warning")
+        return redirect(back)
+    if start < date.today() or end <= start:
+        flash("Bookings must start today or later and end after they start.", "warning")
+        return redirect(back)
+
+    conn = get_db_connection()
+    if not conn:
+        return redirect(back)
+    try:
+        book_room(conn, room_id, guest_name, start.isoformat(), end.isoformat())
+    except ReservationError as err:
+        flash(str(err), "warning")
+        return redirect(back)
+    except mysql.connector.Error as err:
+        flash(f"Booking failed: {err}", "danger")
+        print(f"Booking Error: {err}")
+        return redirect(back)
+    flash(f"Reserved for {guest_name} from {start} to {end}.", "success")
+    return redirect(url_for('view_reservations'))
+
+@app.route('/reservations/<int:reservation_id>/cancel', methods=['POST'])
+@query_budget(1)
+def cancel_reservation(reservation_id):
+    """Cancel a booking that has not been checked in"""
+    conn = get_db_connection()
+    if not conn:
+        return redirect(url_for('view_reservations'))
+
+    def work(cursor):
+        cursor.execute("UPDATE reservations SET status = 'cancelled' WHERE reservation_id = %s AND status = 'booked'", (reservation_id,))
+        return cursor.rowcount
+
+    try:
+        cancelled = run_in_transaction(conn, work, name='cancel_reservation')
+    except mysql.connector.Error as err:
+        flash(f"Cancellation failed: {err}", "danger")
+        print(f"Cancellation Error: {err}")
+        return redirect(url_for('view_reservations'))
+    if cancelled:
+        flash("Reservation cancelled.", "success")
+    else:
+        flash("That reservation was already checked in or cancelled.", "warning")
+    return redirect(url_for('view_reservations'))
 
 # --- Customer Management ---
-@app.route('/customers')
-def view_customers():
-    """View currently checked-in customers"""
-    query = """
-        SELECT c.*, r.room_number
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+def encode_cursor(values):
+    """Encodes the sort key of a boundary row as an opaque URL-safe token."""
+    raw = json.dumps(values, default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(token):
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        return None
+    return values if isinstance(values, list) else None
+
+def keyset_predicate(order_by, values, backwards=False):
+    """Builds a WHERE clause selecting rows after (or before) the given sort key.
+
+    order_by is a list of (column, 'ASC'|'DESC'). The nested form
+    (a < x OR (a = x AND (b > y OR ...))) lets MySQL use the index range on the leading column.
+    """
+    column, direction = order_by[0]
+    forward = (direction == 'ASC') != backwards
+    op = '>' if forward else '<'
+    if len(order_by) == 1:
+        return f"{column} {op} %s", [values[0]]
+    rest_sql, rest_params = keyset_predicate(order_by[1:], values[1:], backwards)
+    return f"({column} {op} %s OR ({column} = %s AND {rest_sql}))", [values[0], values[0]] + rest_params
+
+def get_page_args():
+    """Reads page size and cursors from the query string."""
+    try:
+        page_size = int(request.args.get('page_size', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        page_size = DEFAULT_PAGE_SIZE
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+    after = decode_cursor(request.args['after']) if request.args.get('after') else None
+    before = decode_cursor(request.args['before']) if request.args.get('before') else None
+    return page_size, after, before
+
+def get_customer_filters(allow_dates=True):
+    """Reads optional city / name prefix / check-in date range filters. Returns (where clauses, params, active filters)."""
+    clauses, params, active = [], [], {}
+    city = request.args.get('city', '').strip()
+    if city:
+        clauses.append("c.city = %s")
+        params.append(city)
+        active['city'] = city
+    name = request.args.get('name', '').strip()
+    if name:
+        clauses.append("c.last_name LIKE %s")
+        params.append(name.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%')
+        active['name'] = name
+    if allow_dates:
+        for arg, op in (('date_from', '>='), ('date_to', '<=')):
+            value = request.args.get(arg, '').strip()
+            if not value:
+                continue
+            try:
+                date.fromisoformat(value)
+            except ValueError:
+                flash(f"Ignoring invalid date '{value}'. Use YYYY-MM-DD.", "warning")
+                continue
+            clauses.append(f"c.check_in_date {op} %s")
+            params.append(value)
+            active[arg] = value
+    return clauses, params, active
+
+# Sort orders of the customer pages, ending in the primary key so the keyset is unique
+CURRENT_CUSTOMERS_ORDER = [('c.last_name', 'ASC'), ('c.first_name', 'ASC'), ('c.customer_id', 'ASC')]
+CUSTOMER_HISTORY_ORDER = [('c.check_in_date', 'DESC'), ('c.last_name', 'ASC'), ('c.customer_id', 'ASC')]
+
+def customer_page_query(where, params, order_by, page_size, cursor_values=None, backwards=False):
+    """Builds one keyset-paginated customers query. Returns (sql, params)."""
+    where = list(where)
+    params = list(params)
+    if cursor_values is not None:
+        predicate, predicate_params = keyset_predicate(order_by, cursor_values, backwards)
+        where.append(predicate)
+        params.extend(predicate_params)
+
+    flip = {'ASC': 'DESC', 'DESC': 'ASC'}
+    order_sql = ', '.join(f"{column} {flip[direction] if backwards else direction}" for column, direction in order_by)
+    query = f"""
+        SELECT {CUSTOMER_COLUMNS}
         FROM customers c
         LEFT JOIN rooms r ON c.assigned_room_id = r.room_id
-        WHERE c.check_out_date IS NULL
-        ORDER BY c.last_name, c.first_name
+        {'WHERE ' + ' AND '.join(where) if where else ''}
+        ORDER BY {order_sql}
+        LIMIT %s
     """
-    customers = execute_query(query, fetch_all=True)
-    return render_template('customers.html', customers=customers or [])
+    params.append(page_size + 1) # One extra row tells us whether another page exists
+    return query, tuple(params)
+
+def fetch_customer_page(where, params, order_by, key_fields, page_size, after, before):
+    """Runs one keyset-paginated customers query. Returns (rows, next cursor, prev cursor)."""
+    backwards = before is not None
+    cursor_values = before if backwards else after
+    if cursor_values is not None and len(cursor_values) != len(order_by):
+        cursor_values = None
+    query, params = customer_page_query(where, params, order_by, page_size, cursor_values, backwards)
+    rows = execute_query(query, params, fetch_all=True, model=Customer) or []
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if backwards:
+        rows.reverse()
+
+    def key(row):
+        return [row[field] for field in key_fields]
+
+    next_cursor = prev_cursor = None
+    if rows:
+        if has_more or backwards:
+            next_cursor = encode_cursor(key(rows[-1]))
+        if (has_more and backwards) or (cursor_values is not None and not backwards):
+            prev_cursor = encode_cursor(key(rows[0]))
+    return rows, next_cursor, prev_cursor
+
+@app.route('/customers')
+@query_budget(1)
+def view_customers():
+    """View currently checked-in customers"""
+    page_size, after, before = get_page_args()
+    where, params, filters = get_customer_filters(allow_dates=False)
+    where.insert(0, "c.check_out_date IS NULL")
+    customers, next_cursor, prev_cursor = fetch_customer_page(
+        where, params, CURRENT_CUSTOMERS_ORDER, ['last_name', 'first_name', 'customer_id'], page_size, after, before)
+    page = {'next': next_cursor, 'prev': prev_cursor, 'page_size': page_size, 'filters': filters}
+    return render_template('customers.html', customers=customers, page=page)
 
 @app.route('/customers/all')
+@query_budget(1)
+@render_cached('stays')
 def view_all_customers():
     """View all customers (including past)"""
-    query = """
-        SELECT c.*, r.room_number
-        FROM customers c
-        LEFT JOIN rooms r ON c.assigned_room_id = r.room_id
-        ORDER BY c.check_in_date DESC, c.last_name
+    page_size, after, before = get_page_args()
+    where, params, filters = get_customer_filters()
+    customers, next_cursor, prev_cursor = fetch_customer_page(
+        where, params, CUSTOMER_HISTORY_ORDER, ['check_in_date', 'last_name', 'customer_id'], page_size, after, before)
+    page = {'next': next_cursor, 'prev': prev_cursor, 'page_size': page_size, 'filters': filters}
+    return render_template('customers_all.html', customers=customers, page=page)
+
+
+class CheckInError(Exception):
+    """A check-in was rejected; nothing was written."""
+
+def check_in_one(cursor, passport, last_name, first_name, middle_name, city, check_in, room_id,
+                 check_out=None, reservation_id=None):
+    """Claims the room, inserts the customer and records the stay. Run inside run_in_transaction.
+
+    The conditional UPDATE both checks and takes the room in one statement (holding its
+    row lock until commit), so two concurrent check-ins can never both get the same room.
+    The stay [check_in, check_out) must not overlap another reservation for the room;
+    without an expected check-out it is open-ended. If reservation_id is given, that
+    booking becomes the stay.
     """
-    customers = execute_query(query, fetch_all=True)
-    return render_template('customers_all.html', customers=customers or [])
-
+    claim_room_query = "UPDATE rooms SET is_occupied = TRUE WHERE room_id = %s AND is_occupied = FALSE"
+    cursor.execute(claim_room_query, (room_id,))
+    if cursor.rowcount != 1:
+        raise CheckInError("Selected room is no longer available.")
+
+    cursor.execute(RESERVATION_CONFLICT_QUERY, (room_id, check_in, check_out or OPEN_STAY_END, reservation_id or 0))
+    if cursor.fetchall():
+        if check_out:
+            raise CheckInError("The room is reserved for part of this stay.")
+        raise CheckInError("The room has upcoming reservations. Enter an expected check-out date before them.")
+
+    # Locking read (served by idx_customers_passport) so the same passport can't be checked in twice concurrently
+    existing_customer_query = "SELECT 1 FROM customers WHERE passport_number = %s AND check_out_date IS NULL FOR UPDATE"
+    cursor.execute(existing_customer_query, (passport,))
+    if cursor.fetchall():
+        raise CheckInError("A customer with this passport number is already checked in.")
+
+    insert_customer_query = """
+        INSERT INTO customers (passport_number, last_name, first_name, middle_name, city, check_in_date, assigned_room_id)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+    """
+    cursor.execute(insert_customer_query, (passport, last_name, first_name, middle_name, city, check_in, room_id))
+    customer_id = cursor.lastrowid
+
+    if reservation_id:
+        cursor.execute("""
+            UPDATE reservations SET customer_id = %s, start_date = %s, end_date = %s, status = 'in_house'
+            WHERE reservation_id = %s AND room_id = %s AND status = 'booked'
+        """, (customer_id, check_in, check_out or OPEN_STAY_END, reservation_id, room_id))
+        if cursor.rowcount != 1:
+            raise CheckInError("The reservation is no longer open for this room.")
+    else:
+        cursor.execute(INSERT_RESERVATION_QUERY, (room_id, customer_id, None, check_in, check_out or OPEN_STAY_END, 'in_house'))
+    return customer_id
 
 @app.route('/customer/check_in', methods=['GET', 'POST'])
+@query_budget(6)
 def check_in_customer():
-    """Form to check in a new customer"""
-    # Get available rooms
-    available_rooms_query = """
-        SELECT r.room_id, r.room_number, rt.name as type_name
-        FROM rooms r
-        JOIN room_types rt ON r.type_id = rt.type_id
-        WHERE r.is_occupied = FALSE
-        ORDER BY r.room_number
-    """
-    available_rooms = execute_query(available_rooms_query, fetch_all=True)
-
+    """Form to check in a new customer, optionally for an existing reservation"""
     if request.method == 'POST':
         passport = request.form['passport_number']
         last_name = request.form['last_name']
@@ -164,65 +982,207 @@ def check_in_customer():
         middle_name = request.form.get('middle_name')
         city = request.form['city']
         check_in = request.form['check_in_date']
+        check_out = request.form.get('expected_check_out_date') or None
+        reservation_id = request.form.get('reservation_id', type=int)
         room_id = request.form.get('room_id') # Use get to handle if no rooms available
 
         if not all([passport, last_name, first_name, city, check_in, room_id]):
             flash("All fields except middle name are required.", "warning")
-            return render_template('customer_form.html', rooms=available_rooms or [], form_data=request.form, action="Check In")
-
-        # Check if passport number already exists for a checked-in customer
-        existing_customer_query = "SELECT 1 FROM customers WHERE passport_number = %s AND check_out_date IS NULL"
-        if execute_query(existing_customer_query, (passport,), fetch_one=True):
-             flash("A customer with this passport number is already checked in.", "danger")
-             return render_template('customer_form.html', rooms=available_rooms or [], form_data=request.form, action="Check In")
-
+            return render_template('customer_form.html', rooms=get_available_rooms() or [], form_data=request.form, action="Check In")
+        if check_out and check_out <= check_in:
+            flash("Expected check-out must be after the check-in date.", "warning")
+            return render_template('customer_form.html', rooms=get_available_rooms() or [], form_data=request.form, action="Check In")
 
-        # Check if room is still available (race condition possible, use transaction ideally)
-        room_status_query = "SELECT is_occupied FROM rooms WHERE room_id = %s"
-        room = execute_query(room_status_query, (room_id,), fetch_one=True)
-        if not room or room['is_occupied']:
-            flash("Selected room is no longer available.", "warning")
-            # Refresh available rooms list
-            available_rooms = execute_query(available_rooms_query, fetch_all=True)
-            return render_template('customer_form.html', rooms=available_rooms or [], form_data=request.form, action="Check In")
-
-        # Use a transaction to ensure atomicity
         conn = get_db_connection()
         if not conn:
             return redirect(url_for('check_in_customer'))
 
-        cursor = conn.cursor()
         try:
-            # Insert Customer
-            insert_customer_query = """
-                INSERT INTO customers (passport_number, last_name, first_name, middle_name, city, check_in_date, assigned_room_id)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-            """
-            cursor.execute(insert_customer_query, (passport, last_name, first_name, middle_name, city, check_in, room_id))
-
-            # Update Room Status
-            update_room_query = "UPDATE rooms SET is_occupied = TRUE WHERE room_id = %s"
-            cursor.execute(update_room_query, (room_id,))
-
-            conn.commit()
-            flash(f"Customer {first_name} {last_name} checked into Room {request.form.get('room_number_display', room_id)} successfully!", "success") # Use display if passed
-            return redirect(url_for('view_customers'))
-
+            run_in_transaction(conn, lambda cursor: check_in_one(
+                cursor, passport, last_name, first_name, middle_name, city, check_in, room_id,
+                check_out, reservation_id), name='check_in')
+        except CheckInError as err:
+            flash(str(err), "warning")
         except mysql.connector.Error as err:
-            conn.rollback()
             flash(f"Check-in failed: {err}", "danger")
             print(f"Check-in Error: {err}")
-            # Refresh available rooms list
-            available_rooms = execute_query(available_rooms_query, fetch_all=True)
-            return render_template('customer_form.html', rooms=available_rooms or [], form_data=request.form, action="Check In")
-        finally:
-            cursor.close()
-            conn.close()
+        else:
+            stays_changed(new_cities=[city], occupied=[room_id])
+            flash(f"Customer {first_name} {last_name} checked into Room {request.form.get('room_number_display', room_id)} successfully!", "success") # Use display if passed
+            return redirect(url_for('view_customers'))
+        # Refresh available rooms list
+        return render_template('customer_form.html', rooms=get_available_rooms() or [], form_data=request.form, action="Check In")
+
+    # GET request; ?reservation_id= prefills the form from a booking
+    form_data = {}
+    reservation = None
+    if request.args.get('reservation_id', type=int):
+        reservation = execute_query("""
+            SELECT v.*, r.room_number FROM reservations v JOIN rooms r ON v.room_id = r.room_id
+            WHERE v.reservation_id = %s AND v.status = 'booked'
+        """,
+                                    (request.args.get('reservation_id', type=int),), fetch_one=True)
+        if reservation:
+            form_data = {
+                'reservation_id': str(reservation['reservation_id']),
+                'room_id': str(reservation['room_id']),
+                'check_in_date': str(reservation['start_date']),
+                'expected_check_out_date': str(reservation['end_date']),
+            }
+        else:
+            flash("That reservation is no longer open.", "warning")
+    return render_template('customer_form.html', rooms=get_available_rooms() or [], action="Check In",
+                           form_data=form_data, reservation=reservation)
+
+GUEST_FIELDS = ['passport_number', 'last_name', 'first_name', 'middle_name', 'city', 'room_id']
+
+def validate_group_guests(guests):
+    """Checks required fields and duplicates within the group. Returns cleaned guest dicts."""
+    cleaned, errors = [], []
+    for number, guest in enumerate(guests, start=1):
+        guest = {field: str(guest.get(field) or '').strip() for field in GUEST_FIELDS}
+        if not any(guest.values()):
+            continue # Blank form row
+        missing = [field for field in GUEST_FIELDS if field != 'middle_name' and not guest[field]]
+        if missing:
+            errors.append(f"Guest {number}: missing {', '.join(missing)}")
+            continue
+        try:
+            guest['room_id'] = int(guest['room_id'])
+        except ValueError:
+            errors.append(f"Guest {number}: invalid room")
+            continue
+        guest['middle_name'] = guest['middle_name'] or None
+        cleaned.append(guest)
+    passports = [guest['passport_number'] for guest in cleaned]
+    duplicates = sorted({p for p in passports if passports.count(p) > 1})
+    if duplicates:
+        errors.append(f"Passport number(s) listed more than once: {', '.join(duplicates)}")
+    if errors:
+        raise CheckInError('; '.join(errors))
+    if not cleaned:
+        raise CheckInError("Add at least one guest.")
+    return cleaned
+
+def check_in_group(conn, guests, check_in):
+    """Checks in all guests in one transaction, or none of them.
+
+    Passports are validated with a single locking IN (...) query, the rooms are locked with
+    SELECT ... FOR UPDATE (in room_id order), then guests are inserted with executemany and
+    the rooms flagged in one UPDATE. Deadlocks with concurrent check-ins are retried.
+    Several guests may share a room, but every room must be free before the group arrives.
+    Returns the rooms that were assigned.
+    """
+    passports = [guest['passport_number'] for guest in guests]
+    room_ids = sorted({guest['room_id'] for guest in guests})
+
+    def work(cursor):
+        placeholders = ', '.join(['%s'] * len(passports))
+        cursor.execute(f"SELECT passport_number FROM customers WHERE check_out_date IS NULL AND passport_number IN ({placeholders}) FOR UPDATE", passports)
+        already_in = sorted(row['passport_number'] for row in cursor.fetchall())
+        if already_in:
+            raise CheckInError(f"Already checked in: {', '.join(already_in)}")
+
+        placeholders = ', '.join(['%s'] * len(room_ids))
+        cursor.execute(f"SELECT room_id, room_number, is_occupied FROM rooms WHERE room_id IN ({placeholders}) ORDER BY room_id FOR UPDATE", room_ids)
+        rooms = {row['room_id']: row for row in cursor.fetchall()}
+        if len(rooms) != len(room_ids):
+            raise CheckInError("One or more selected rooms do not exist.")
+        occupied = [str(row['room_number']) for row in rooms.values() if row['is_occupied']]
+        if occupied:
+            raise CheckInError(f"Room(s) no longer available: {', '.join(occupied)}")
+
+        # Group stays are open-ended, so any reservation from the arrival date on is a conflict
+        cursor.execute(f"""
+            SELECT DISTINCT room_id FROM reservations
+            WHERE room_id IN ({placeholders}) AND end_date > %s AND status IN ('booked', 'in_house')
+        """, (*room_ids, check_in))
+        reserved = sorted(str(rooms[row['room_id']]['room_number']) for row in cursor.fetchall())
+        if reserved:
+            raise CheckInError(f"Room(s) have upcoming reservations: {', '.join(reserved)}")
+
+        insert_customer_query = """
+            INSERT INTO customers (passport_number, last_name, first_name, middle_name, city, check_in_date, assigned_room_id)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """
+        cursor.executemany(insert_customer_query, [
+            (guest['passport_number'], guest['last_name'], guest['first_name'], guest['middle_name'], guest['city'], check_in, guest['room_id'])
+            for guest in guests
+        ])
+        cursor.execute(f"UPDATE rooms SET is_occupied = TRUE WHERE room_id IN ({placeholders})", room_ids)
+        passport_placeholders = ', '.join(['%s'] * len(passports))
+        cursor.execute(f"""
+            INSERT INTO reservations (room_id, customer_id, start_date, end_date, status)
+            SELECT assigned_room_id, customer_id, check_in_date, %s, 'in_house'
+            FROM customers
+            WHERE check_out_date IS NULL AND passport_number IN ({passport_placeholders})
+        """, (OPEN_STAY_END, *passports))
+        return list(rooms.values())
+
+    rooms = run_in_transaction(conn, work, name='group_check_in')
+    stays_changed(new_cities=[guest['city'] for guest in guests], occupied=room_ids)
+    return rooms
+
+def parse_check_in_date(value):
+    try:
+        return date.fromisoformat(value).isoformat()
+    except (TypeError, ValueError):
+        raise CheckInError("A valid check-in date is required.")
+
+@app.route('/customer/group_check_in', methods=['GET', 'POST'])
+@query_budget(7)
+def group_check_in():
+    """Form to check in a group of guests at once"""
+    if request.method == 'POST':
+        columns = {field: request.form.getlist(field) for field in GUEST_FIELDS}
+        rows = [dict(zip(GUEST_FIELDS, values)) for values in zip(*columns.values())]
+        try:
+            check_in = parse_check_in_date(request.form.get('check_in_date'))
+            guests = validate_group_guests(rows)
+            conn = get_db_connection()
+            if not conn:
+                raise CheckInError("Database unavailable.")
+            rooms = check_in_group(conn, guests, check_in)
+        except CheckInError as err:
+            flash(f"Group check-in failed: {err}", "warning")
+        except mysql.connector.Error as err:
+            flash(f"Group check-in failed: {err}", "danger")
+            print(f"Group Check-in Error: {err}")
+        else:
+            flash(f"Checked in {len(guests)} guest(s) into {len(rooms)} room(s).", "success")
+            return redirect(url_for('view_customers'))
+        return render_template('group_check_in_form.html', rooms=get_available_rooms() or [], guests=rows, check_in_date=request.form.get('check_in_date', ''))
+
+    return render_template('group_check_in_form.html', rooms=get_available_rooms() or [], guests=[], check_in_date='')
+
+@app.route('/api/group_check_in', methods=['POST'])
+@query_budget(7)
+def group_check_in_api():
+    """JSON group check-in: {"check_in_date": "YYYY-MM-DD", "guests": [{passport_number, last_name, first_name, middle_name, city, room_id}, ...]}"""
+    payload = request.get_json(silent=True) or {}
+    try:
+        check_in = parse_check_in_date(payload.get('check_in_date'))
+        guests = payload.get('guests')
+        if not isinstance(guests, list) or not all(isinstance(guest, dict) for guest in guests):
+            raise CheckInError("'guests' must be a list of objects.")
+        guests = validate_group_guests(guests)
+    except CheckInError as err:
+        return jsonify({'error': str(err)}), 400
 
-    # GET request
-    return render_template('customer_form.html', rooms=available_rooms or [], action="Check In", form_data={})
+    conn = get_db_connection()
+    if not conn:
+        return jsonify({'error': "Database unavailable."}), 503
+    try:
+        rooms = check_in_group(conn, guests, check_in)
+    except CheckInError as err:
+        return jsonify({'error': str(err)}), 409
+    except mysql.connector.Error as err:
+        print(f"Group Check-in Error: {err}")
+        return jsonify({'error': f"Group check-in failed: {err}"}), 500
+    return jsonify({'checked_in': len(guests), 'rooms': [row['room_number'] for row in rooms]}), 201
 
 @app.route('/customer/check_out/<int:customer_id>', methods=['POST'])
+@query_budget(7)
 def check_out_customer(customer_id):
     """Checks out a customer"""
     today = date.today().isoformat()
@@ -237,40 +1197,73 @@ def check_out_customer(customer_id):
          return redirect(url_for('view_customers'))
 
     room_id = customer['assigned_room_id']
+    check_in_date = customer['check_in_date']
+    if isinstance(check_in_date, str): check_in_date = date.fromisoformat(check_in_date)
+    same_day = check_in_date >= date.today() # Checked out before spending a night
 
-    # Use a transaction
     conn = get_db_connection()
     if not conn: return redirect(url_for('view_customers'))
-    cursor = conn.cursor()
-    try:
-        # Update Customer Check-out Date
-        update_customer_query = "UPDATE customers SET check_out_date = %s WHERE customer_id = %s"
+
+    def work(cursor):
+        # Update Customer Check-out Date (only if nobody checked them out concurrently), freezing
+        # the rate the stay is billed at; the invoice and revenue jobs read it later
+        update_customer_query = """
+            UPDATE customers
+            SET check_out_date = %s,
+                billed_rate = (SELECT rt.cost_per_day FROM rooms r JOIN room_types rt ON r.type_id = rt.type_id
+                               WHERE r.room_id = customers.assigned_room_id)
+            WHERE customer_id = %s AND check_out_date IS NULL
+        """
         cursor.execute(update_customer_query, (today, customer_id))
+        if cursor.rowcount != 1:
+            return None
 
-        # Update Room Status
-        if room_id: # Should always have a room if checked in
-            update_room_query = "UPDATE rooms SET is_occupied = FALSE WHERE room_id = %s"
-            cursor.execute(update_room_query, (room_id,))
+        # Close the stay's interval [check-in, today) at check-out, freeing the room from tonight;
+        # a same-day stay covers no night, so its interval goes
+        if same_day:
+            cursor.execute("DELETE FROM reservations WHERE customer_id = %s AND status = 'in_house'", (customer_id,))
+        else:
+            cursor.execute("UPDATE reservations SET status = 'completed', end_date = %s WHERE customer_id = %s AND status = 'in_house'",
+                           (today, customer_id))
 
-        conn.commit()
-        flash(f"Customer {customer['first_name']} {customer['last_name']} checked out successfully.", "success")
-        return redirect(url_for('generate_invoice', customer_id=customer_id))
+        # The invoice and the revenue rollup are background jobs, committed with the check-out
+        job_queue.enqueue(cursor, 'issue_invoice', {'customer_id': customer_id})
+        job_queue.enqueue(cursor, 'revenue_rollup', {'revenue_date': today})
 
+        # Update Room Status, unless other guests (e.g. from a group check-in) are still in the room
+        if room_id: # Should always have a room if checked in
+            update_room_query = """
+                UPDATE rooms SET is_occupied = FALSE
+                WHERE room_id = %s
+                  AND NOT EXISTS (SELECT 1 FROM customers WHERE assigned_room_id = %s AND check_out_date IS NULL)
+            """
+            cursor.execute(update_room_query, (room_id, room_id))
+            return cursor.rowcount == 1
+        return False
 
+    try:
+        room_freed = run_in_transaction(conn, work, name='check_out') # None if already checked out
     except mysql.connector.Error as err:
-        conn.rollback()
         flash(f"Check-out failed: {err}", "danger")
         print(f"Check-out Error: {err}")
         return redirect(url_for('view_customers'))
-    finally:
-        cursor.close()
-        conn.close()
+
+    if room_freed is None:
+        flash("Customer is already checked out.", "warning")
+        return redirect(url_for('view_customers'))
+
+    wake_job_worker()
+    stays_changed(freed=[room_id] if room_freed else ())
+    flash(f"Customer {customer['first_name']} {customer['last_name']} checked out successfully.", "success")
+    # Usually the invoice job is done by now; if not, generate_invoice issues it (the job then finds it stored)
+    return redirect(url_for('generate_invoice', customer_id=customer_id))
 
 # --- Employee Management ---
 @app.route('/employees')
+@query_budget(1)
 def view_employees():
     """View all employees"""
-    employees = execute_query("SELECT * FROM employees ORDER BY last_name, first_name", fetch_all=True)
+    employees = execute_query(f"SELECT {EMPLOYEE_COLUMNS} FROM employees e ORDER BY e.last_name, e.first_name", fetch_all=True, model=Employee)
     return render_template('employees.html', employees=employees or [])
 
 @app.route('/employee/add', methods=['GET', 'POST'])
@@ -289,6 +1282,7 @@ def add_employee():
         employee_id = execute_query(query, (last_name, first_name, middle_name), commit=True)
 
         if employee_id is not None:
+            employees_changed()
             flash(f"Employee {first_name} {last_name} hired successfully.", "success")
             return redirect(url_for('view_employees'))
         else:
@@ -309,6 +1303,7 @@ def delete_employee(employee_id):
     # Deletion will cascade to cleaning_schedule due to ON DELETE CASCADE
     query = "DELETE FROM employees WHERE employee_id = %s"
     execute_query(query, (employee_id,), commit=True)
+    employees_changed()
     # Check if deletion actually happened
     flash(f"Employee {employee['first_name']} {employee['last_name']} dismissed.", "success")
     return redirect(url_for('view_employees'))
@@ -316,28 +1311,15 @@ def delete_employee(employee_id):
 
 # --- Schedule Management ---
 @app.route('/schedule')
+@query_budget(3)
+@render_cached('schedule', 'employees')
 def view_schedule():
     """View cleaning schedule"""
-    query = """
-        SELECT cs.schedule_id, e.first_name, e.last_name, cs.floor, cs.day_of_week
-        FROM cleaning_schedule cs
-        JOIN employees e ON cs.employee_id = e.employee_id
-        ORDER BY cs.day_of_week, cs.floor, e.last_name
-    """
-    schedule = execute_query(query, fetch_all=True)
-    employees = execute_query("SELECT employee_id, first_name, last_name FROM employees ORDER BY last_name", fetch_all=True)
-    days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-    # Get distinct floors from rooms table
-    floors_query = "SELECT DISTINCT floor FROM rooms ORDER BY floor"
-    floors_result = execute_query(floors_query, fetch_all=True)
-    floors = [f['floor'] for f in floors_result] if floors_result else []
-
-
     return render_template('schedule.html',
-                           schedule=schedule or [],
-                           employees=employees or [],
-                           days=days,
-                           floors=floors)
+                           schedule=get_schedule_list() or [],
+                           employees=get_employee_list() or [],
+                           days=DAYS_OF_WEEK,
+                           floors=get_floor_list() or [])
 
 @app.route('/schedule/add', methods=['POST'])
 def add_schedule_entry():
@@ -361,6 +1343,7 @@ def add_schedule_entry():
     schedule_id = execute_query(query, (employee_id, floor, day), commit=True)
 
     if schedule_id is not None:
+        schedule_changed()
         flash("Schedule entry added successfully.", "success")
     else:
         pass # Redirect anyway
@@ -371,69 +1354,109 @@ def delete_schedule_entry(schedule_id):
     """Delete a schedule entry"""
     query = "DELETE FROM cleaning_schedule WHERE schedule_id = %s"
     execute_query(query, (schedule_id,), commit=True)
+    schedule_changed()
     flash("Schedule entry deleted.", "success")
     return redirect(url_for('view_schedule'))
 
+@app.route('/schedule/optimize', methods=['POST'])
+@query_budget(4) # Floors, employees (cold cache), the delete and the batched insert
+def optimize_schedule():
+    """Replace the cleaning schedule with a generated week that balances floors across employees"""
+    floors_query = """
+        SELECT floor, COUNT(*) as rooms, COALESCE(SUM(is_occupied = TRUE), 0) as occupied
+        FROM rooms
+        GROUP BY floor
+    """
+    floors = execute_query(floors_query, fetch_all=True)
+    employees = get_employee_list()
+    if not floors or not employees:
+        flash("Need at least one floor with rooms and one employee to build a schedule.", "warning")
+        return redirect(url_for('view_schedule'))
+
+    weights = floor_weights({row['floor']: int(row['rooms']) for row in floors},
+                            {row['floor']: int(row['occupied']) for row in floors})
+    entries, loads = optimize_week(weights, [e['employee_id'] for e in employees], DAYS_OF_WEEK)
+
+    conn = get_db_connection()
+    if not conn:
+        return redirect(url_for('view_schedule'))
+
+    def work(cursor):
+        cursor.execute("DELETE FROM cleaning_schedule")
+        insert_query = "INSERT INTO cleaning_schedule (employee_id, floor, day_of_week) VALUES (%s, %s, %s)"
+        cursor.executemany(insert_query, entries)
+
+    try:
+        run_in_transaction(conn, work, name='optimize_schedule')
+    except mysql.connector.Error as err:
+        flash(f"Schedule generation failed: {err}", "danger")
+        print(f"Schedule Optimize Error: {err}")
+        return redirect(url_for('view_schedule'))
+
+    schedule_changed()
+    flash(f"Generated {len(entries)} schedule entries for {len(employees)} employee(s) "
+          f"(weekly load {min(loads.values()):g}-{max(loads.values()):g}).", "success")
+    return redirect(url_for('view_schedule'))
+
 # --- Queries & Reports ---
 @app.route('/reports')
+@query_budget(3)
 def reports_page():
      """Page with forms for various queries"""
-     # Data needed for forms
-     rooms = execute_query("SELECT room_id, room_number FROM rooms ORDER BY room_number", fetch_all=True)
-     customers = execute_query("SELECT customer_id, first_name, last_name FROM customers WHERE check_out_date IS NULL ORDER BY last_name", fetch_all=True)
-     days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-     cities = execute_query("SELECT DISTINCT city FROM customers ORDER BY city", fetch_all=True)
-
-     return render_template('reports.html',
-                            rooms=rooms or [],
-                            customers=customers or [],
-                            days=days,
-                            cities=[c['city'] for c in cities] if cities else [])
+     return render_template('reports.html', **get_report_form_data())
+
+def render_query_results(title, results):
+    """Renders the reports page with results directly, and keeps them under a token so the page can be revisited."""
+    token = secrets.token_urlsafe(8)
+    if results is not None:
+        query_results_store.set(token, (title, results))
+    return render_template('reports.html',
+                            query_results=results,
+                            query_title=title,
+                            results_token=token if results is not None else None,
+                            **get_report_form_data())
 
 @app.route('/query/occupants_by_room', methods=['POST'])
+@query_budget(4)
 def query_occupants_by_room():
     room_id = request.form.get('room_id')
     if not room_id:
         flash("Please select a room.", "warning")
         return redirect(url_for('reports_page'))
 
-    query = """
-        SELECT c.*, r.room_number
+    query = f"""
+        SELECT {CUSTOMER_COLUMNS}
         FROM customers c
         JOIN rooms r ON c.assigned_room_id = r.room_id
         WHERE c.assigned_room_id = %s AND c.check_out_date IS NULL
     """
-    results = execute_query(query, (room_id,), fetch_all=True)
-    room = get_room_details(room_id)
-    room_number = room['room_number'] if room else 'Unknown'
+    results = execute_query(query, (room_id,), fetch_all=True, model=Customer)
+    room_number = next((room['room_number'] for room in get_room_list() or [] if str(room['room_id']) == room_id), 'Unknown')
     flash(f"Showing occupants for Room {room_number}", "info")
-    # Re-render reports page with results section
-    session['query_results'] = results # Use session to pass results
-    session['query_title'] = f"Occupants in Room {room_number}"
-    return redirect(url_for('reports_page_with_results'))
+    return render_query_results(f"Occupants in Room {room_number}", results)
 
 @app.route('/query/customers_by_city', methods=['POST'])
+@query_budget(4)
 def query_customers_by_city():
     city = request.form.get('city')
     if not city:
         flash("Please enter a city.", "warning")
         return redirect(url_for('reports_page'))
 
-    query = """
-        SELECT c.*, r.room_number
+    query = f"""
+        SELECT {CUSTOMER_COLUMNS}
         FROM customers c
         LEFT JOIN rooms r ON c.assigned_room_id = r.room_id
         WHERE c.city = %s AND c.check_out_date IS NULL
         ORDER BY c.last_name, c.first_name
     """
-    results = execute_query(query, (city,), fetch_all=True)
+    results = execute_query(query, (city,), fetch_all=True, model=Customer)
     flash(f"Showing current guests from {city}", "info")
-    session['query_results'] = results
-    session['query_title'] = f"Current Guests from {city}"
-    return redirect(url_for('reports_page_with_results'))
+    return render_query_results(f"Current Guests from {city}", results)
 
 
 @app.route('/query/cleaner_for_customer_stay', methods=['POST'])
+@query_budget(5)
 def query_cleaner_for_customer_stay():
     customer_id = request.form.get('customer_id')
     day_of_week = request.form.get('day_of_week')
@@ -460,145 +1483,978 @@ def query_cleaner_for_customer_stay():
     room_number = customer_info['room_number']
 
     # Find the employee(s) cleaning that floor on that day
-    cleaner_query = """
-        SELECT e.first_name, e.last_name, e.middle_name
-        FROM cleaning_schedule cs
-        JOIN employees e ON cs.employee_id = e.employee_id
-        WHERE cs.floor = %s AND cs.day_of_week = %s
-    """
-    results = execute_query(cleaner_query, (floor, day_of_week), fetch_all=True)
+    results = (get_cleaner_index() or {}).get((floor, day_of_week), [])
     flash(f"Showing cleaner(s) for Floor {floor} (Room {room_number}, Customer: {customer_name}) on {day_of_week}", "info")
-    session['query_results'] = results
-    session['query_title'] = f"Cleaner(s) for Floor {floor} on {day_of_week}"
-    return redirect(url_for('reports_page_with_results'))
-
+    return render_query_results(f"Cleaner(s) for Floor {floor} on {day_of_week}", results)
 
-@app.route('/reports/results')
-def reports_page_with_results():
-    """Display the reports page with results stored in session"""
-    results = session.pop('query_results', None) # Get and remove from session
-    title = session.pop('query_title', 'Query Results')
 
-    # Data needed for forms (same as reports_page)
-    rooms = execute_query("SELECT room_id, room_number FROM rooms ORDER BY room_number", fetch_all=True)
-    customers = execute_query("SELECT customer_id, first_name, last_name FROM customers WHERE check_out_date IS NULL ORDER BY last_name", fetch_all=True)
-    days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-    cities = execute_query("SELECT DISTINCT city FROM customers ORDER BY city", fetch_all=True)
+@app.route('/api/cleaners', methods=['POST'])
+@query_budget(2)
+def cleaners_for_guests_api():
+    """Who cleans each guest's room on a given day, for many guests in one call.
 
+    Body: {"lookups": [{"customer_id": 1, "day_of_week": "Monday"}, ...]}
+       or {"customer_ids": [1, 2, ...], "day_of_week": "Monday"}
+    """
+    payload = request.get_json(silent=True) or {}
+    lookups = payload.get('lookups')
+    if lookups is None and isinstance(payload.get('customer_ids'), list):
+        lookups = [{'customer_id': customer_id, 'day_of_week': payload.get('day_of_week')} for customer_id in payload['customer_ids']]
+    if not isinstance(lookups, list) or not lookups:
+        return jsonify({'error': "Provide 'lookups' or 'customer_ids' with 'day_of_week'."}), 400
+    try:
+        lookups = [(int(item['customer_id']), item['day_of_week']) for item in lookups]
+    except (KeyError, TypeError, ValueError):
+        return jsonify({'error': "Each lookup needs an integer customer_id and a day_of_week."}), 400
+    invalid_days = sorted({day for _, day in lookups if day not in DAYS_OF_WEEK}, key=str)
+    if invalid_days:
+        return jsonify({'error': f"Invalid day_of_week: {', '.join(map(str, invalid_days))}"}), 400
+
+    # One query for every guest's floor, then pure in-memory lookups
+    customer_ids = sorted({customer_id for customer_id, _ in lookups})
+    placeholders = ', '.join(['%s'] * len(customer_ids))
+    stays_query = f"""
+        SELECT c.customer_id, c.first_name, c.last_name, r.floor, r.room_number
+        FROM customers c
+        JOIN rooms r ON c.assigned_room_id = r.room_id
+        WHERE c.customer_id IN ({placeholders}) AND c.check_out_date IS NULL
+    """
+    stays = {row['customer_id']: row for row in execute_query(stays_query, tuple(customer_ids), fetch_all=True) or []}
+    index = get_cleaner_index() or {}
+
+    results, not_found = [], []
+    for customer_id, day in lookups:
+        stay = stays.get(customer_id)
+        if stay is None:
+            not_found.append(customer_id)
+            continue
+        results.append({
+            'customer_id': customer_id,
+            'customer_name': f"{stay['first_name']} {stay['last_name']}",
+            'room_number': stay['room_number'],
+            'floor': stay['floor'],
+            'day_of_week': day,
+            'cleaners': index.get((stay['floor'], day), []),
+        })
+    return jsonify({'results': results, 'not_found': not_found})
+
+@app.route('/reports/results/<token>')
+@query_budget(3)
+def reports_page_with_results(token):
+    """Display the reports page with previously stored query results"""
+    stored = query_results_store.get(token)
+    if stored is None:
+        flash("These query results have expired. Please run the query again.", "warning")
+        return redirect(url_for('reports_page'))
+    title, results = stored
     return render_template('reports.html',
-                            rooms=rooms or [],
-                            customers=customers or [],
-                            days=days,
-                            cities=[c['city'] for c in cities] if cities else [],
                             query_results=results,
-                            query_title=title)
+                            query_title=title,
+                            results_token=token,
+                            **get_report_form_data())
 
 
 # --- Invoice Generation ---
-@app.route('/invoice/<int:customer_id>')
-def generate_invoice(customer_id):
-    """Generate and display an invoice for a customer"""
-    customer = get_customer_details(customer_id)
-    if not customer:
-        flash("Customer not found.", "danger")
-        return redirect(url_for('view_all_customers')) # Redirect to list of all customers
-
-    if not customer['check_out_date']:
-         check_out_date = date.today()
-         flash("Warning: Customer has not checked out. Invoice calculated based on today's date.", "warning")
-    else:
-         check_out_date = customer['check_out_date']
-
-
-    if not customer['assigned_room_id']:
-         flash("Customer is not currently assigned to a room (may have already checked out without room info). Cannot calculate cost.", "danger")
-         return redirect(url_for('view_all_customers'))
-
-
-    room = get_room_details(customer['assigned_room_id'])
-    if not room:
-        flash("Room details not found for this customer's stay.", "danger")
-        return redirect(url_for('view_all_customers'))
-
-    check_in_date = customer['check_in_date']
-
-    # Calculate duration (number of nights)
-    # Ensure dates are date objects
+# Invoices are issued once, at check-out, and stored rendered in the invoices table
+# (migrations/0005_invoices.sql). Reprints serve the stored HTML, so they never change
+# when room prices do; its SHA-256 is the ETag.
+INVOICE_RENDER_WORKERS = int(os.getenv('INVOICE_RENDER_WORKERS', 4))
+INVOICE_BATCH_SIZE = 200
+
+invoice_render_pool = ThreadPoolExecutor(max_workers=INVOICE_RENDER_WORKERS, thread_name_prefix='invoice-render')
+
+# A completed stay's nightly rate is the one frozen at check-out (migrations/0010); guests
+# still in house (and stays seeded without one) are priced at the room type's current rate
+STAY_RATE_SQL = "COALESCE(c.billed_rate, rt.cost_per_day)"
+
+INVOICE_STAY_QUERY = f"""
+    SELECT c.customer_id, c.passport_number, c.last_name, c.first_name, c.middle_name, c.city,
+           c.check_in_date, c.check_out_date, c.assigned_room_id,
+           r.room_number, rt.name as type_name, {STAY_RATE_SQL} as cost_per_day
+    FROM customers c
+    LEFT JOIN rooms r ON c.assigned_room_id = r.room_id
+    LEFT JOIN room_types rt ON r.type_id = rt.type_id
+"""
+
+INSERT_INVOICE_QUERY = """
+    INSERT IGNORE INTO invoices (customer_id, check_in_date, check_out_date, room_number, type_name,
+                                 cost_per_day, nights, total, content_hash, html)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+def build_invoice(stay):
+    """Prices a stay (customer joined with room and room type): at least one night at the current rate."""
+    check_in_date = stay['check_in_date']
+    check_out_date = stay['check_out_date'] or date.today() # Not checked out yet: estimate up to today
     if isinstance(check_in_date, str): check_in_date = date.fromisoformat(check_in_date)
     if isinstance(check_out_date, str): check_out_date = date.fromisoformat(check_out_date)
-
-    duration_delta = check_out_date - check_in_date
-    duration_days = max(1, duration_delta.days) # Stay is at least 1 day/night
-
-    cost_per_day = room['cost_per_day']
-    total_cost = duration_days * cost_per_day
-
-    invoice_data = {
-        'customer': customer,
-        'room': room,
-        'check_in': customer['check_in_date'], # Display original check-in
-        'check_out': check_out_date, # Display actual or calculated check-out
+    duration_days = max(1, (check_out_date - check_in_date).days) # Stay is at least 1 day/night
+    return {
+        'customer': stay,
+        'room': stay,
+        'check_in': check_in_date,
+        'check_out': check_out_date,
+        'issued': check_out_date,
         'duration_days': duration_days,
-        'total_cost': total_cost
+        'total_cost': duration_days * Decimal(str(stay['cost_per_day']))
     }
 
-    today = date.today().isoformat()
-    return render_template('invoice.html', invoice=invoice_data, today_date=today)
+def render_invoice_html(invoice):
+    """Renders the stored invoice body. Needs only an app context, so it runs in worker threads too."""
+    with app.app_context():
+        html = render_template('_invoice.html', invoice=invoice)
+    return html, hashlib.sha256(html.encode('utf-8')).hexdigest()
+
+def invoice_row(invoice, html, content_hash):
+    stay = invoice['customer']
+    return (stay['customer_id'], invoice['check_in'], invoice['check_out'], stay['room_number'], stay['type_name'],
+            stay['cost_per_day'], invoice['duration_days'], invoice['total_cost'], content_hash, html)
+
+def issue_invoice(cursor, customer_id):
+    """Renders and stores the invoice for a checked-out stay, unless it has one. Run by the issue_invoice job."""
+    cursor.execute(INVOICE_STAY_QUERY + " WHERE c.customer_id = %s", (customer_id,))
+    stay = cursor.fetchone()
+    if not stay or not stay['check_out_date'] or stay['room_number'] is None:
+        return
+    invoice = build_invoice(stay)
+    cursor.execute(INSERT_INVOICE_QUERY, invoice_row(invoice, *render_invoice_html(invoice)))
+
+def get_stored_invoice(customer_id):
+    return execute_query("SELECT content_hash, html FROM invoices WHERE customer_id = %s", (customer_id,), fetch_one=True)
+
+@app.route('/invoice/<int:customer_id>')
+@query_budget(3)
+def generate_invoice(customer_id):
+    """Display a customer's invoice: the stored one once checked out, an estimate before"""
+    stored = get_stored_invoice(customer_id)
+    if not stored:
+        stay = execute_query(INVOICE_STAY_QUERY + " WHERE c.customer_id = %s", (customer_id,), fetch_one=True)
+        if not stay:
+            flash("Customer not found.", "danger")
+            return redirect(url_for('view_all_customers')) # Redirect to list of all customers
+
+        if not stay['assigned_room_id'] or stay['room_number'] is None:
+            flash("Room details not found for this customer's stay. Cannot calculate cost.", "danger")
+            return redirect(url_for('view_all_customers'))
+
+        invoice = build_invoice(stay)
+        if not stay['check_out_date']:
+            flash("Warning: Customer has not checked out. Invoice calculated based on today's date.", "warning")
+            return render_template('invoice.html', invoice=invoice)
+
+        # Checked out before invoices were stored, or the issue_invoice job hasn't run yet: issue it now
+        html, content_hash = render_invoice_html(invoice)
+        execute_query(INSERT_INVOICE_QUERY, invoice_row(invoice, html, content_hash), commit=True)
+        stored = {'content_hash': content_hash, 'html': html}
+
+    cacheable = '_flashes' not in session # Flash messages make the page differ from the stored invoice
+    response = Response(render_template('invoice.html', invoice_html=stored['html']))
+    if cacheable:
+        response.set_etag(stored['content_hash'])
+        response.headers['Cache-Control'] = 'private, no-cache'
+        response.make_conditional(request)
+    return response
+
+def load_or_issue_invoices(customer_ids):
+    """Stored invoice HTML for the given checked-out stays, issuing any that are missing."""
+    placeholders = ', '.join(['%s'] * len(customer_ids))
+    rows = execute_query(f"SELECT customer_id, html FROM invoices WHERE customer_id IN ({placeholders})",
+                         tuple(customer_ids), fetch_all=True) or []
+    html_by_customer = {row['customer_id']: row['html'] for row in rows}
+    missing = [customer_id for customer_id in customer_ids if customer_id not in html_by_customer]
+    if not missing:
+        return html_by_customer
+
+    placeholders = ', '.join(['%s'] * len(missing))
+    stays = execute_query(INVOICE_STAY_QUERY + f" WHERE c.customer_id IN ({placeholders}) AND r.room_id IS NOT NULL",
+                          tuple(missing), fetch_all=True) or []
+    invoices = [build_invoice(stay) for stay in stays]
+    rendered = list(invoice_render_pool.map(render_invoice_html, invoices))
+    conn = get_db_connection()
+    if conn and invoices:
+        run_in_transaction(conn, lambda cursor: cursor.executemany(
+            INSERT_INVOICE_QUERY, [invoice_row(invoice, *result) for invoice, result in zip(invoices, rendered)]),
+            name='issue_invoices')
+    for invoice, (html, _) in zip(invoices, rendered):
+        html_by_customer[invoice['customer']['customer_id']] = html
+    return html_by_customer
+
+class ZipBuffer(io.RawIOBase):
+    """Write-only, unseekable sink for zipfile; drain() hands over what was written so far."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+@app.route('/invoices/archive.zip')
+def invoice_archive():
+    """Zip of the invoices for every stay checked out between date_from and date_to.
+
+    Missing invoices are rendered in parallel on the render pool and stored, then every
+    invoice is written out as a standalone HTML file while the zip streams to the client.
+    """
+    date_from, date_to = parse_date_arg('date_from'), parse_date_arg('date_to')
+    if not date_from or not date_to:
+        abort(400, description="date_from and date_to (YYYY-MM-DD) are required.")
+    stays = execute_query("""
+        SELECT customer_id, check_out_date FROM customers
+        WHERE check_out_date BETWEEN %s AND %s AND assigned_room_id IS NOT NULL
+        ORDER BY check_out_date, customer_id
+    """, (date_from, date_to), fetch_all=True)
+    if stays is None:
+        abort(503, description="Could not read stays from the database.")
+
+    def render_document(item):
+        customer_id, html = item
+        with app.app_context():
+            return render_template('invoice_document.html', customer_id=customer_id, invoice_html=html)
+
+    def generate():
+        buffer = ZipBuffer()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for i in range(0, len(stays), INVOICE_BATCH_SIZE):
+                batch = stays[i:i + INVOICE_BATCH_SIZE]
+                html_by_customer = load_or_issue_invoices([stay['customer_id'] for stay in batch])
+                batch = [stay for stay in batch if stay['customer_id'] in html_by_customer]
+                items = [(stay['customer_id'], html_by_customer[stay['customer_id']]) for stay in batch]
+                for stay, document in zip(batch, invoice_render_pool.map(render_document, items)):
+                    archive.writestr(f"invoice-{stay['check_out_date']}-{stay['customer_id']}.html", document)
+                    yield buffer.drain()
+        yield buffer.drain() # Central directory
+
+    filename = f"invoices_{date_from}_{date_to}.zip"
+    return Response(stream_with_context(generate()), mimetype='application/zip',
+                    headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
+# Charge for a completed stay: at least one night, at the rate frozen at check-out, in DECIMAL
+STAY_NIGHTS_SQL = "GREATEST(DATEDIFF(c.check_out_date, c.check_in_date), 1)"
+
+# Recomputes one day of revenue_daily (keyed by check-out date and room type) from the stays
+# checked out that day. Idempotent, so the revenue_rollup job can safely run more than once.
+REVENUE_ROLLUP_QUERY = f"""
+    INSERT INTO revenue_daily (revenue_date, type_id, stays, nights, revenue)
+    SELECT c.check_out_date, r.type_id, COUNT(*), SUM({STAY_NIGHTS_SQL}), SUM({STAY_NIGHTS_SQL} * {STAY_RATE_SQL})
+    FROM customers c
+    JOIN rooms r ON c.assigned_room_id = r.room_id
+    JOIN room_types rt ON r.type_id = rt.type_id
+    WHERE c.check_out_date = %s AND c.check_in_date IS NOT NULL
+    GROUP BY c.check_out_date, r.type_id
+    ON DUPLICATE KEY UPDATE
+        stays = VALUES(stays),
+        nights = VALUES(nights),
+        revenue = VALUES(revenue)
+"""
 
 @app.route('/hotel_report')
+@query_budget(4)
+@render_cached('stays', 'revenue', daily=True)
 def hotel_report():
     """Generate a report on room occupancy and total income"""
-    report_data = {'occupancy': {}, 'income': 0.0}
+    report_data = {}
 
     # --- Occupancy Report ---
-    # Calculate how many days each room was occupied and free
-    rooms_query = """
-        SELECT r.room_number, r.is_occupied, rt.name as type_name
+    rooms_query = f"""
+        SELECT {ROOM_COLUMNS}
         FROM rooms r JOIN room_types rt ON r.type_id = rt.type_id
         ORDER BY r.room_number
     """
-    all_rooms = execute_query(rooms_query, fetch_all=True)
+    all_rooms = execute_query(rooms_query, fetch_all=True, model=Room)
     report_data['rooms_status'] = all_rooms
 
     # --- Income Report ---
-    # Calculate total income from completed stays (where check_out_date is set)
-    income_query = """
-        SELECT
-            c.customer_id,
-            c.check_in_date,
-            c.check_out_date,
-            rt.cost_per_day
+    # Read from the revenue_daily rollup (kept up to date by the revenue_rollup job) instead of scanning every stay
+    by_type_query = """
+        SELECT rt.name as type_name, SUM(rd.stays) as stays, SUM(rd.nights) as nights, SUM(rd.revenue) as revenue
+        FROM revenue_daily rd
+        JOIN room_types rt ON rd.type_id = rt.type_id
+        GROUP BY rt.type_id, rt.name
+        ORDER BY rt.type_id
+    """
+    by_month_query = """
+        SELECT YEAR(revenue_date) as year, MONTH(revenue_date) as month,
+               SUM(stays) as stays, SUM(nights) as nights, SUM(revenue) as revenue
+        FROM revenue_daily
+        GROUP BY YEAR(revenue_date), MONTH(revenue_date)
+        ORDER BY year DESC, month DESC
+        LIMIT 12
+    """
+    by_day_query = """
+        SELECT revenue_date, SUM(stays) as stays, SUM(nights) as nights, SUM(revenue) as revenue
+        FROM revenue_daily
+        WHERE revenue_date >= %s
+        GROUP BY revenue_date
+        ORDER BY revenue_date DESC
+    """
+    report_data['income_by_type'] = execute_query(by_type_query, fetch_all=True) or []
+    report_data['income_by_month'] = execute_query(by_month_query, fetch_all=True) or []
+    report_data['income_by_day'] = execute_query(by_day_query, ((date.today() - timedelta(days=30)).isoformat(),), fetch_all=True) or []
+    report_data['total_income'] = sum((Decimal(row['revenue']) for row in report_data['income_by_type']), Decimal('0.00'))
+
+    return render_template('hotel_report.html', report=report_data)
+
+# --- Occupancy Report ---
+def get_occupancy_period():
+    """Reads start/end from the query string, defaulting to the last 30 days."""
+    today = date.today()
+    try:
+        start = date.fromisoformat(request.args.get('start') or (today - timedelta(days=29)).isoformat())
+        end = date.fromisoformat(request.args.get('end') or today.isoformat())
+    except ValueError:
+        return None, None
+    if end < start:
+        return None, None
+    return start, end
+
+def build_occupancy_report(start, end):
+    """Per-room days occupied/free between start and end from customer stay history."""
+    rooms_query = """
+        SELECT r.room_id, r.room_number, r.floor, rt.name as type_name
+        FROM rooms r JOIN room_types rt ON r.type_id = rt.type_id
+        ORDER BY r.room_number
+    """
+    # Only stays overlapping the period; served by idx_customers_stay_interval
+    stays_query = """
+        SELECT assigned_room_id, check_in_date, check_out_date
+        FROM customers
+        WHERE assigned_room_id IS NOT NULL
+          AND check_in_date <= %s
+          AND (check_out_date IS NULL OR check_out_date >= %s)
+    """
+    rooms = execute_query(rooms_query, fetch_all=True) or []
+    # (room_id, check_in, check_out) tuples, consumed as they arrive
+    stays = iter_query(stays_query, (end.isoformat(), start.isoformat()))
+    return occupancy_report(rooms, stays, start, end)
+
+@app.route('/reports/occupancy')
+@query_budget(2)
+def occupancy_report_page():
+    """Days occupied and free per room over a period"""
+    start, end = get_occupancy_period()
+    if start is None:
+        flash("Invalid period. Use YYYY-MM-DD dates with the start before the end.", "warning")
+        return redirect(url_for('occupancy_report_page'))
+    return render_template('occupancy_report.html', report=build_occupancy_report(start, end))
+
+@app.route('/api/occupancy')
+@query_budget(2)
+def occupancy_api():
+    """JSON version of the occupancy report"""
+    start, end = get_occupancy_period()
+    if start is None:
+        return jsonify({'error': "Invalid period. Use start/end as YYYY-MM-DD with start <= end."}), 400
+    report = build_occupancy_report(start, end)
+    report['start'], report['end'] = start.isoformat(), end.isoformat()
+    return jsonify(report)
+
+# --- Group Report ---
+# Occupancy and income across every property. Each property's summary is loaded on
+# property_report_pool with its own connection to that property's database, so the
+# report takes about as long as the slowest property rather than the sum of them all.
+# Summaries are cached per property until its stays or revenue change; a property that
+# fails or doesn't answer within PROPERTY_REPORT_TIMEOUT seconds is listed as unavailable
+# and left out of the totals.
+PROPERTY_REPORT_WORKERS = int(os.getenv('PROPERTY_REPORT_WORKERS', 8))
+PROPERTY_REPORT_TIMEOUT = float(os.getenv('PROPERTY_REPORT_TIMEOUT', 10))
+
+property_report_pool = ThreadPoolExecutor(max_workers=PROPERTY_REPORT_WORKERS, thread_name_prefix='property-report')
+property_summary_cache = TTLCache(maxsize=8 * len(properties), ttl=float(os.getenv('PROPERTY_SUMMARY_TTL', 300)))
+
+PROPERTY_ROOMS_QUERY = """
+    SELECT COUNT(*) AS rooms, COALESCE(SUM(is_occupied), 0) AS occupied_now
+    FROM rooms
+"""
+# Only stays overlapping the period; served by idx_customers_stay_interval
+PROPERTY_STAYS_QUERY = """
+    SELECT assigned_room_id, check_in_date, check_out_date
+    FROM customers
+    WHERE assigned_room_id IS NOT NULL
+      AND check_in_date <= %s
+      AND (check_out_date IS NULL OR check_out_date >= %s)
+"""
+PROPERTY_REVENUE_QUERY = """
+    SELECT rt.name AS type_name, SUM(rd.stays) AS stays, SUM(rd.nights) AS nights, SUM(rd.revenue) AS revenue
+    FROM revenue_daily rd
+    JOIN room_types rt ON rd.type_id = rt.type_id
+    WHERE rd.revenue_date BETWEEN %s AND %s
+    GROUP BY rt.type_id, rt.name
+    ORDER BY rt.type_id
+"""
+
+def load_property_summary(prop, start, end):
+    """Rooms, nights occupied and income (by room type) of one property over the period."""
+    def work(cursor):
+        cursor.execute(PROPERTY_ROOMS_QUERY)
+        rooms = cursor.fetchone()
+        cursor.execute(PROPERTY_STAYS_QUERY, (end.isoformat(), start.isoformat()))
+        nights = occupied_days(((row['assigned_room_id'], row['check_in_date'], row['check_out_date'])
+                                for row in iter_rows(cursor)), start, end)
+        cursor.execute(PROPERTY_REVENUE_QUERY, (start.isoformat(), end.isoformat()))
+        by_type = {row['type_name']: {'stays': int(row['stays'] or 0), 'nights': int(row['nights'] or 0),
+                                      'revenue': Decimal(str(row['revenue'] or 0))} for row in cursor.fetchall()}
+        return {
+            'rooms': int(rooms['rooms']),
+            'occupied_now': int(rooms['occupied_now']),
+            'nights_occupied': sum(nights.values()),
+            'by_type': by_type,
+        }
+
+    conn = acquire_connection(prop)
+    try:
+        return run_in_transaction(conn, work, name='property_summary')
+    finally:
+        release_connection(conn, prop)
+
+def get_property_summary(prop, start, end):
+    """load_property_summary() through property_summary_cache, keyed by the property's stays/revenue stamp."""
+    key = (prop.property_id, start, end, get_data_versions(prop).stamp('stays', 'revenue'), date.today())
+    return property_summary_cache.get_or_load(key, lambda: load_property_summary(prop, start, end))
+
+def build_group_report(start, end):
+    """Loads every property's summary in parallel and merges them into group totals."""
+    futures = {prop: property_report_pool.submit(get_property_summary, prop, start, end) for prop in properties}
+    wait(futures.values(), timeout=PROPERTY_REPORT_TIMEOUT)
+    period_days = (end - start).days + 1
+    rows, unavailable = [], []
+    totals = {'rooms': 0, 'occupied_now': 0, 'room_nights': 0, 'nights_occupied': 0, 'stays': 0, 'revenue': Decimal('0.00')}
+    by_type = {}
+    for prop, future in futures.items():
+        if not future.done():
+            unavailable.append({'code': prop.code, 'name': prop.name, 'error': 'timed out'})
+            continue
+        try:
+            summary = future.result()
+        except Exception as err: # One property being down mustn't take the group report with it
+            print(f"Group report: property {prop.code} failed: {err}") # Log error
+            unavailable.append({'code': prop.code, 'name': prop.name, 'error': str(err)})
+            continue
+        room_nights = summary['rooms'] * period_days
+        stays = sum(row['stays'] for row in summary['by_type'].values())
+        revenue = sum((row['revenue'] for row in summary['by_type'].values()), Decimal('0.00'))
+        rows.append({
+            'code': prop.code, 'name': prop.name,
+            'rooms': summary['rooms'], 'occupied_now': summary['occupied_now'],
+            'nights_occupied': summary['nights_occupied'], 'room_nights': room_nights,
+            'occupancy_rate': summary['nights_occupied'] / room_nights if room_nights else 0.0,
+            'stays': stays, 'revenue': revenue,
+        })
+        for key, value in (('rooms', summary['rooms']), ('occupied_now', summary['occupied_now']), ('room_nights', room_nights),
+                           ('nights_occupied', summary['nights_occupied']), ('stays', stays), ('revenue', revenue)):
+            totals[key] += value
+        for type_name, row in summary['by_type'].items():
+            merged = by_type.setdefault(type_name, {'type_name': type_name, 'stays': 0, 'nights': 0, 'revenue': Decimal('0.00')})
+            for key in ('stays', 'nights', 'revenue'):
+                merged[key] += row[key]
+    totals['occupancy_rate'] = totals['nights_occupied'] / totals['room_nights'] if totals['room_nights'] else 0.0
+    return {
+        'start': start.isoformat(), 'end': end.isoformat(), 'period_days': period_days,
+        'properties': rows, 'unavailable': unavailable, 'totals': totals,
+        'by_type': sorted(by_type.values(), key=lambda row: row['revenue'], reverse=True),
+    }
+
+@app.route('/reports/group')
+@query_budget(0) # Every query runs on the properties' own connections
+def group_report_page():
+    """Occupancy and income of every property over a period"""
+    start, end = get_occupancy_period()
+    if start is None:
+        flash("Invalid period. Use YYYY-MM-DD dates with the start before the end.", "warning")
+        return redirect(url_for('group_report_page'))
+    return render_template('group_report.html', report=build_group_report(start, end))
+
+@app.route('/api/group_report')
+@query_budget(0)
+def group_report_api():
+    """JSON version of the group report"""
+    start, end = get_occupancy_period()
+    if start is None:
+        return jsonify({'error': "Invalid period. Use start/end as YYYY-MM-DD with start <= end."}), 400
+    return jsonify(build_group_report(start, end))
+
+# --- Data Export ---
+EXPORT_BATCH_SIZE = 1000
+
+def parse_date_arg(name):
+    """Returns a YYYY-MM-DD query string argument, or None if absent. Aborts with 400 if malformed."""
+    value = request.args.get(name, '').strip()
+    if not value:
+        return None
+    try:
+        date.fromisoformat(value)
+    except ValueError:
+        abort(400, description=f"Invalid {name} '{value}'. Use YYYY-MM-DD.")
+    return value
+
+def stream_export(query, params, fmt, filename):
+    """Streams query results as CSV or NDJSON without loading them into memory.
+
+    Uses its own pooled connection with an unbuffered cursor, so rows are read from
+    the server in batches as the client consumes the response.
+    """
+    if fmt not in ('csv', 'ndjson'):
+        abort(404)
+    try:
+        conn = acquire_connection()
+    except (mysql.connector.Error, PoolTimeout) as err:
+        abort(503, description=f"Database Connection Error: {err}")
+
+    prop = current_property()
+    released = []
+
+    def release():
+        """Returns the connection to the pool once, from the generator or when the response closes."""
+        if not released:
+            released.append(True)
+            release_connection(conn, prop)
+
+    def generate():
+        try:
+            cursor = InstrumentedCursor(conn.cursor(buffered=False), app_metrics)
+            finished = False
+            try:
+                cursor.execute(query, params)
+                columns = [d[0] for d in cursor.description]
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                if fmt == 'csv':
+                    writer.writerow(columns)
+                    yield buffer.getvalue() # Send the header before the first batch arrives
+                while True:
+                    rows = cursor.fetchmany(EXPORT_BATCH_SIZE)
+                    if not rows:
+                        break
+                    buffer.seek(0)
+                    buffer.truncate()
+                    if fmt == 'csv':
+                        writer.writerows(rows)
+                    else:
+                        for row in rows:
+                            buffer.write(json.dumps(dict(zip(columns, row)), default=str))
+                            buffer.write('\n')
+                    yield buffer.getvalue()
+                finished = True
+            except mysql.connector.Error as err:
+                finished = True
+                print(f"Export Error: {err}\nQuery: {query}\nParams: {params}") # Log error; headers are already sent
+            finally:
+                try:
+                    if not finished:
+                        cursor.fetchall() # The client went away: the rest must be read before the cursor can close
+                    cursor.close()
+                except mysql.connector.Error as err:
+                    print(f"Export cleanup error: {err}") # Log error; the pool discards the connection if unusable
+        finally:
+            release()
+
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    response = Response(generate(), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}.{fmt}'
+    response.headers['X-Accel-Buffering'] = 'no' # Don't let a reverse proxy buffer the stream
+    response.call_on_close(release) # For a response closed before the generator started
+    return response
+
+@app.route('/export/customers.<fmt>')
+def export_customers(fmt):
+    """Export customer history, optionally filtered by check-in date range"""
+    query, params = export_customers_query(parse_date_arg('date_from'), parse_date_arg('date_to'))
+    return stream_export(query, params, fmt, 'customers')
+
+def export_customers_query(date_from, date_to):
+    """The customer history export's query and params, for check-ins between the dates (either may be None)."""
+    where, params = [], []
+    if date_from:
+        where.append("c.check_in_date >= %s")
+        params.append(date_from)
+    if date_to:
+        where.append("c.check_in_date <= %s")
+        params.append(date_to)
+    query = f"""
+        SELECT c.customer_id, c.passport_number, c.last_name, c.first_name, c.middle_name, c.city,
+               c.check_in_date, c.check_out_date, r.room_number
         FROM customers c
-        JOIN rooms r ON c.assigned_room_id = r.room_id -- Use the room assigned during stay
+        LEFT JOIN rooms r ON c.assigned_room_id = r.room_id
+        {'WHERE ' + ' AND '.join(where) if where else ''}
+        ORDER BY c.check_in_date, c.customer_id
+    """
+    return query, tuple(params)
+
+@app.route('/export/income.<fmt>')
+def export_income(fmt):
+    """Export completed stays with their charge, optionally filtered by check-out date range"""
+    query, params = export_income_query(parse_date_arg('date_from'), parse_date_arg('date_to'))
+    return stream_export(query, params, fmt, 'income')
+
+def export_income_query(date_from, date_to):
+    """The income export's query and params, for check-outs between the dates (either may be None)."""
+    where, params = [], []
+    if date_from:
+        where.append("c.check_out_date >= %s")
+        params.append(date_from)
+    if date_to:
+        where.append("c.check_out_date <= %s")
+        params.append(date_to)
+    query = f"""
+        SELECT c.customer_id, c.last_name, c.first_name, r.room_number, rt.name as type_name,
+               c.check_in_date, c.check_out_date,
+               GREATEST(DATEDIFF(c.check_out_date, c.check_in_date), 1) as nights,
+               {STAY_RATE_SQL} as cost_per_day,
+               GREATEST(DATEDIFF(c.check_out_date, c.check_in_date), 1) * {STAY_RATE_SQL} as amount
+        FROM customers c
+        JOIN rooms r ON c.assigned_room_id = r.room_id
         JOIN room_types rt ON r.type_id = rt.type_id
         WHERE c.check_out_date IS NOT NULL
           AND c.check_in_date IS NOT NULL
-          AND c.assigned_room_id IS NOT NULL
+          {''.join(' AND ' + clause for clause in where)}
+        ORDER BY c.check_out_date, c.customer_id
     """
-    completed_stays = execute_query(income_query, fetch_all=True)
-
-    total_income = 0.0
-    if completed_stays:
-        for stay in completed_stays:
-            try:
-                check_in = stay['check_in_date']
-                check_out = stay['check_out_date']
-                cost = stay['cost_per_day']
-
-                # Ensure dates are date objects
-                if isinstance(check_in, str): check_in = date.fromisoformat(check_in)
-                if isinstance(check_out, str): check_out = date.fromisoformat(check_out)
+    return query, tuple(params)
+
+# --- Background Jobs ---
+# Side effects that don't have to finish before the user gets a response (issuing the
+# invoice and the revenue rollup after a check-out) are enqueued into the jobs table in the
+# same transaction as the write (migrations/0008_jobs.sql), so they happen exactly when it
+# commits, and are run by a job worker with retries and backoff (jobs.py). JOB_WORKER=thread
+# runs one in each app process, woken right after the enqueueing transaction commits;
+# JOB_WORKER=off leaves the jobs to `flask jobs-worker` processes. Each property's jobs live
+# in its own database; a worker serves every property.
+JOB_WORKER = os.getenv('JOB_WORKER', 'thread')
+JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', 2.0))
+JOB_BATCH_SIZE = int(os.getenv('JOB_BATCH_SIZE', 20))
+JOB_RETENTION = timedelta(days=int(os.getenv('JOB_RETENTION_DAYS', 7)))
+JOB_PURGE_INTERVAL = 3600 # Seconds between deletions of done jobs past retention
+JOB_WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+job_queue = JobQueue(max_attempts=int(os.getenv('JOB_MAX_ATTEMPTS', 5)),
+                     backoff=float(os.getenv('JOB_RETRY_BACKOFF', 5.0)),
+                     max_backoff=float(os.getenv('JOB_MAX_BACKOFF', 3600.0)),
+                     lease=float(os.getenv('JOB_LEASE_SECONDS', 300.0)))
+job_worker = None
+job_worker_lock = threading.Lock()
+last_job_purge = {} # property_id -> time.monotonic() of the last purge
+
+@job_queue.handler('issue_invoice')
+def issue_invoice_job(cursor, payload):
+    issue_invoice(cursor, payload['customer_id'])
+
+@job_queue.handler('revenue_rollup', after=lambda payload: get_data_versions().bump('revenue'))
+def revenue_rollup_job(cursor, payload):
+    cursor.execute(REVENUE_ROLLUP_QUERY, (payload['revenue_date'],))
+
+def run_job(conn, job):
+    """Runs one claimed job in its own transaction; on failure, schedules a retry or marks it failed."""
+    run_at = job['run_at']
+    if isinstance(run_at, str): run_at = datetime.fromisoformat(run_at)
+    wait = max((datetime.now() - run_at).total_seconds(), 0.0)
+    started = time.perf_counter()
+    try:
+        run_in_transaction(conn, lambda cursor: job_queue.run(cursor, job), name=f"job_{job['kind']}")
+        outcome = 'done'
+    except Exception as err: # Any handler error; the job is retried
+        print(f"Job {job['job_id']} ({job['kind']}) failed on attempt {job['attempts']}: {err}") # Log error
+        try:
+            outcome = run_in_transaction(conn, lambda cursor: job_queue.retry_or_fail(cursor, job, err), name='job_retry')
+        except mysql.connector.Error as retry_err:
+            print(f"Could not reschedule job {job['job_id']}: {retry_err}") # Its lease runs out and it's retried
+            outcome = 'error'
+    app_metrics.observe_job(job['kind'], outcome, wait, time.perf_counter() - started)
+    if outcome == 'done':
+        job_queue.after(job)
+
+def run_property_jobs(prop, limit):
+    """Claims and runs up to limit of the property's due jobs. Returns how many were claimed."""
+    try:
+        conn = acquire_connection(prop)
+    except (mysql.connector.Error, PoolTimeout) as err:
+        print(f"Job worker could not connect to {prop.code}: {err}") # Log error
+        return 0
+    try:
+        with app.app_context():
+            g.property = prop # For the handlers' after-commit hooks
+            jobs = run_in_transaction(conn, lambda cursor: job_queue.claim(cursor, JOB_WORKER_ID, limit), name='job_claim')
+            for job in jobs:
+                run_job(conn, job)
+        if not jobs and time.monotonic() - last_job_purge.get(prop.property_id, 0.0) >= JOB_PURGE_INTERVAL:
+            last_job_purge[prop.property_id] = time.monotonic()
+            run_in_transaction(conn, lambda cursor: job_queue.purge(cursor, JOB_RETENTION), name='job_purge')
+        return len(jobs)
+    finally:
+        release_connection(conn, prop)
+
+def run_job_batch(limit=JOB_BATCH_SIZE):
+    """Claims and runs up to limit due jobs of each property. Returns how many were claimed."""
+    return sum(run_property_jobs(prop, limit) for prop in properties)
+
+def start_job_worker():
+    global job_worker
+    with job_worker_lock:
+        if job_worker is None:
+            job_worker = JobWorker(run_job_batch, poll_interval=JOB_POLL_INTERVAL)
+            job_worker.start()
+
+def wake_job_worker():
+    """Starts the jobs just enqueued (by a committed transaction) without waiting for the next poll."""
+    if job_worker is not None:
+        job_worker.wake()
+
+if JOB_WORKER == 'thread':
+    @app.before_request
+    def ensure_job_worker():
+        # Started with the first request rather than at import, so CLI commands and the reloader's parent don't run one
+        if job_worker is None:
+            start_job_worker()
+
+def get_job_stats(prop=None):
+    """A property's queue depth by status and the age of its oldest due job, or None if its database is unreachable."""
+    prop = prop or current_property()
+    try:
+        conn = acquire_connection(prop)
+    except (mysql.connector.Error, PoolTimeout):
+        return None
+    try:
+        return run_in_transaction(conn, job_queue.stats, name='job_stats')
+    except mysql.connector.Error as err:
+        print(f"Job stats error ({prop.code}): {err}") # Log error
+        return None
+    finally:
+        release_connection(conn, prop)
+
+@app.cli.command('jobs-worker')
+@click.option('--once', is_flag=True, help="Run the jobs that are due now, then exit.")
+def jobs_worker_command(once):
+    """Run background jobs (for JOB_WORKER=off, or to add workers)."""
+    if once:
+        total = 0
+        while (claimed := run_job_batch()):
+            total += claimed
+        click.echo(f"Ran {total} job(s).")
+        return
+    click.echo(f"Job worker {JOB_WORKER_ID} polling every {JOB_POLL_INTERVAL}s")
+    JobWorker(run_job_batch, poll_interval=JOB_POLL_INTERVAL).run() # In the foreground
+
+# --- Diagnostics ---
+@app.route('/api/db_pool')
+def db_pool_stats():
+    """Connection pool metrics (checkouts, wait time, size) of the current property"""
+    return jsonify(properties.pool(current_property()).stats())
+
+@app.route('/api/cache')
+def cache_stats():
+    """Hit/miss counters for the in-memory caches"""
+    return jsonify({
+        'availability': availability_cache.stats(),
+        'reference': reference_cache.stats(),
+        'query_results': query_results_store.stats(),
+        'render': render_cache.stats(),
+        'room_events': get_room_events().stats()
+    })
+
+@app.route('/api/jobs')
+def job_stats():
+    """Background job queue depth, the oldest due job's age, and the most recent failures"""
+    stats = get_job_stats()
+    if stats is None:
+        return jsonify({'error': "Could not read the jobs table."}), 503
+    stats['failures'] = execute_query("""
+        SELECT job_id, kind, payload, attempts, last_error, finished_at
+        FROM jobs WHERE status = 'failed'
+        ORDER BY job_id DESC LIMIT 20
+    """, fetch_all=True) or []
+    stats['worker'] = JOB_WORKER_ID if job_worker is not None else None
+    return jsonify(stats)
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus metrics: request/query/transaction latency histograms, pool and cache gauges"""
+    pools = {prop.code: properties.pool(prop).stats() for prop in properties}
+    caches = {'availability': availability_cache, 'reference': reference_cache, 'query_results': query_results_store, 'render': render_cache}
+    cache_stats = {name: cache.stats() for name, cache in caches.items()}
+    events = {prop.code: get_room_events(prop).stats() for prop in properties}
+    # Each property's stats come from its own database, in parallel like the group report
+    jobs = dict(zip((prop.code for prop in properties), property_report_pool.map(get_job_stats, properties)))
+    jobs = {code: stats for code, stats in jobs.items() if stats is not None}
+    gauges = [
+        ('hotel_db_pool_connections', "Pooled database connections by property and state.",
+         {(('property', code), ('state', state)): pool[key] for code, pool in pools.items()
+          for state, key in (('open', 'open'), ('idle', 'idle'), ('in_use', 'in_use'), ('max', 'size'))}),
+        ('hotel_db_pool_checkouts', "Connections checked out of the pool since start.", {(('property', code),): pool['checkouts'] for code, pool in pools.items()}),
+        ('hotel_db_pool_timeouts', "Checkouts that timed out waiting for a connection.", {(('property', code),): pool['timeouts'] for code, pool in pools.items()}),
+        ('hotel_cache_hits', "Cache hits since start.", {(('cache', name),): stats['hits'] for name, stats in cache_stats.items()}),
+        ('hotel_cache_misses', "Cache misses since start.", {(('cache', name),): stats['misses'] for name, stats in cache_stats.items()}),
+        ('hotel_cache_entries', "Entries currently cached.", {(('cache', name),): stats['size'] for name, stats in cache_stats.items()}),
+        ('hotel_room_events_version', "Room occupancy events published since start.", {(('property', code),): stats['version'] for code, stats in events.items()}),
+        ('hotel_room_events_subscribers', "Open room event streams.", {(('property', code),): stats['subscribers'] for code, stats in events.items()}),
+        ('hotel_jobs', "Background jobs in the jobs table by property and status.",
+         {(('property', code), ('status', status)): n for code, stats in jobs.items() for status, n in stats['depth'].items()}),
+        ('hotel_job_oldest_due_seconds', "How long the oldest due queued job has been waiting.",
+         {(('property', code),): stats['oldest_due_seconds'] for code, stats in jobs.items()}),
+    ]
+    return Response(app_metrics.render(gauges), mimetype='text/plain; version=0.0.4')
+
+# --- Schema Migrations ---
+# `flask db-migrate` creates the database if needed and applies migrations/NNNN_*.sql in
+# order, recording them in schema_migrations; `flask index-advisor` EXPLAINs the app's SQL
+# against the current (ideally seeded) data. DB_AUTO_MIGRATE=1 migrates on `python app.py`.
+# With several properties, each one's database is migrated in turn.
+def run_migrations(target=None, log=print, prop=None):
+    """Migrates the property's database (every property's by default). Returns {code: versions applied}."""
+    applied = {}
+    for each in [prop] if prop else properties:
+        if len(properties) > 1:
+            log(f"Property {each.code} ({each.db_config['database']})")
+        ensure_database(each.db_config)
+        conn = mysql.connector.connect(**each.db_config)
+        try:
+            applied[each.code] = migrate(conn, target=target, log=log)
+            if target is None or target >= 9: # The property table comes with 0009_property
+                record_property(conn, each.property_id, each.code, each.name)
+        finally:
+            conn.close()
+    return applied
+
+def property_option(function):
+    """Adds --property CODE to a CLI command, passing the Property (None if not given)."""
+    def to_property(ctx, param, code):
+        if code is None:
+            return None
+        if properties.get(code) is None:
+            raise click.BadParameter(f"unknown property; choose from {', '.join(prop.code for prop in properties)}")
+        return properties.get(code)
+    return click.option('--property', 'prop', callback=to_property, help="Property code (default: all, or the first for reads).")(function)
+
+@app.cli.command('db-migrate')
+@click.option('--target', type=int, help="Stop after this migration version.")
+@click.option('--status', 'show_status', is_flag=True, help="List migrations and whether they have been applied.")
+@property_option
+def db_migrate_command(target, show_status, prop):
+    """Create the databases if needed and apply pending migrations."""
+    try:
+        if show_status:
+            for each in [prop] if prop else properties:
+                ensure_database(each.db_config)
+                conn = mysql.connector.connect(**each.db_config)
+                try:
+                    if len(properties) > 1:
+                        click.echo(f"Property {each.code} ({each.db_config['database']})")
+                    for version, name, state in status(conn):
+                        click.echo(f"{version:04d}_{name:40} {state}")
+                finally:
+                    conn.close()
+            return
+        applied = sum(len(versions) for versions in run_migrations(target, log=click.echo, prop=prop).values())
+    except (MigrationError, mysql.connector.Error) as err:
+        raise click.ClickException(str(err))
+    click.echo(f"Applied {applied} migration(s)." if applied else "Schema is up to date.")
+
+@app.cli.command('properties')
+def properties_command():
+    """List the configured properties and their databases."""
+    for prop in properties:
+        config = prop.db_config
+        click.echo(f"{prop.property_id:>4} {prop.code:20} {prop.name:30} {config['user']}@{config['host']}/{config['database']}")
+
+def runtime_query_samples():
+    """The queries built at runtime, as typical requests build them: [(function, sql, params), ...].
+
+    Lets the index advisor EXPLAIN the customer pages and exports, which it can't read from the source.
+    """
+    today = date.today()
+    month_ago = today - timedelta(days=30)
+    pages = [ # (query string, current guests only, order, cursor values of a next page)
+        ('', True, CURRENT_CUSTOMERS_ORDER, None),
+        ('', True, CURRENT_CUSTOMERS_ORDER, ['Ivanov', 'Anna', 1000]),
+        ('name=Iv', True, CURRENT_CUSTOMERS_ORDER, None),
+        ('city=Paris', True, CURRENT_CUSTOMERS_ORDER, None),
+        ('', False, CUSTOMER_HISTORY_ORDER, None),
+        ('', False, CUSTOMER_HISTORY_ORDER, [month_ago.isoformat(), 'Ivanov', 1000]),
+        ('city=Paris', False, CUSTOMER_HISTORY_ORDER, None),
+        (f'date_from={month_ago}&date_to={today}', False, CUSTOMER_HISTORY_ORDER, None),
+    ]
+    samples = []
+    for query_string, current, order_by, cursor_values in pages:
+        with app.test_request_context(query_string=query_string):
+            where, params, _ = get_customer_filters(allow_dates=not current)
+        if current:
+            where.insert(0, "c.check_out_date IS NULL")
+        samples.append(('customer_page_query', *customer_page_query(where, params, order_by, DEFAULT_PAGE_SIZE, cursor_values)))
+    for builder in (export_customers_query, export_income_query):
+        samples.append((builder.__name__, *builder(month_ago.isoformat(), today.isoformat())))
+        samples.append((builder.__name__, *builder(None, None)))
+    return samples
+
+@app.cli.command('index-advisor')
+@click.option('--min-rows', default=1000, show_default=True, help="Ignore problems on tables with fewer rows.")
+@property_option
+def index_advisor_command(min_rows, prop):
+    """EXPLAIN every SQL statement in app.py; report full scans and filesorts."""
+    conn = mysql.connector.connect(**(prop or properties.default).db_config)
+    try:
+        findings = advise(conn, min_rows=min_rows, log=click.echo, samples=runtime_query_samples())
+    finally:
+        conn.close()
+    if findings:
+        raise SystemExit(1)
 
-                duration_delta = check_out - check_in
-                duration_days = max(1, duration_delta.days) # Min 1 day charge
-                total_income += float(duration_days * cost)
-            except Exception as e:
-                 print(f"Error calculating income for stay customer_id {stay.get('customer_id', 'N/A')}: {e}")
+# --- Async Views ---
+# With ASYNC_VIEWS=1 (requires `pip install "flask[async]"`) the reports and schedule
+# pages are served by async views that load their independent data concurrently: each
+# loader runs on its own thread in a fresh app context, so it checks out its own pooled
+# connection, and the view awaits them together with asyncio.gather. The dashboard is a
+# single query, so it stays sync.
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', '0') == '1'
 
-    report_data['total_income'] = round(total_income, 2)
+def with_own_connection(loader):
+    """Wraps loader to run in a fresh app context (own g, so own connection) with a copy of the current request.
 
-    return render_template('hotel_report.html', report=report_data)
+    The request's query log goes along, so the loader's statements count against the view's budget.
+    """
+    loader = copy_current_request_context(loader)
+    prop = current_property()
+    query_log = g.get('query_log')
+    def call():
+        with app.app_context():
+            g.property = prop
+            if query_log is not None:
+                g.query_log = query_log
+            return loader()
+    return call
+
+async def gather_loaders(**loaders):
+    """Runs the loaders concurrently in worker threads and returns {name: result}."""
+    calls = [with_own_connection(loader) for loader in loaders.values()]
+    results = await asyncio.gather(*(asyncio.to_thread(call) for call in calls))
+    return dict(zip(loaders, results))
+
+if ASYNC_VIEWS:
+    if importlib.util.find_spec('asgiref') is None:
+        raise RuntimeError('ASYNC_VIEWS=1 needs Flask\'s async support: pip install "flask[async]"')
+
+    @query_budget(3)
+    async def reports_page_async():
+        """Page with forms for various queries"""
+        data = await gather_loaders(rooms=get_room_list, customers=get_active_customer_list, cities=get_city_list)
+        return render_template('reports.html', days=DAYS_OF_WEEK, **{name: value or [] for name, value in data.items()})
+
+    @query_budget(3)
+    @render_cached('schedule', 'employees')
+    async def view_schedule_async():
+        """View cleaning schedule"""
+        data = await gather_loaders(schedule=get_schedule_list, employees=get_employee_list, floors=get_floor_list)
+        return render_template('schedule.html', days=DAYS_OF_WEEK, **{name: value or [] for name, value in data.items()})
+
+    app.view_functions['reports_page'] = reports_page_async
+    app.view_functions['view_schedule'] = view_schedule_async
 
 if __name__ == '__main__':
-    # Ensure database exists? Could add a check here.
+    if os.getenv('DB_AUTO_MIGRATE') == '1':
+        run_migrations()
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,96 @@
+"""Throughput per worker of the sync views vs. ASYNC_VIEWS=1.
+
+Runs the reports and schedule pages (plus the single-query dashboard, which is sync in
+both modes, as a control) with cold caches, so every request hits the database, from a
+single client thread, once in each mode, against the SQLite stand-in with a simulated
+round trip per statement:
+
+    python bench/bench_async_views.py --db-latency-ms 5 --requests 200 --output async_results.json
+
+Each mode runs in its own process, since ASYNC_VIEWS is read at import time.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+ROUTES = {'index': '/', 'reports_page': '/reports', 'view_schedule': '/schedule'}
+
+
+def run_worker(path, latency_ms, requests):
+    """Measures each route in this process's mode; prints the results as JSON."""
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import sqlite_backend
+    import app as hotel_app
+
+    hotel_app.db_pool._connect = sqlite_backend.connect_factory(path, latency_ms)
+    client = hotel_app.app.test_client()
+    results = {}
+    for name, url in ROUTES.items():
+        latencies = []
+        for _ in range(requests):
+            hotel_app.availability_cache.clear() # Cold caches: every loader queries
+            hotel_app.reference_cache.clear()
+            hotel_app.render_cache.clear() # Else the schedule page is served rendered, without loading anything
+            started = time.perf_counter()
+            response = client.get(url)
+            latencies.append(time.perf_counter() - started)
+            assert response.status_code == 200, (url, response.status_code)
+        latencies.sort()
+        results[name] = {
+            'requests': requests,
+            'throughput_rps': round(requests / sum(latencies), 2),
+            'p50_ms': round(latencies[len(latencies) // 2] * 1000, 3),
+            'p95_ms': round(latencies[int(len(latencies) * 0.95)] * 1000, 3),
+        }
+    print(json.dumps(results))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--db-latency-ms', type=float, default=5.0)
+    parser.add_argument('--requests', type=int, default=200, help="requests per route and mode")
+    parser.add_argument('--rooms', type=int, default=200)
+    parser.add_argument('--output', default='async_results.json')
+    parser.add_argument('--worker', help=argparse.SUPPRESS) # Internal: SQLite path to measure against
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.db_latency_ms, args.requests)
+        return
+
+    import seed as seeder
+    import sqlite_backend
+
+    path = os.path.join(tempfile.mkdtemp(prefix='hotel-async-bench-'), 'hotel.db')
+    sqlite_backend.create_schema(path)
+    conn = sqlite_backend.connect_factory(path)()
+    seeder.seed(conn, rooms=args.rooms, years=1)
+    conn.close()
+
+    modes = {}
+    for mode, flag in (('sync', '0'), ('async', '1')):
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--worker', path,
+             '--db-latency-ms', str(args.db_latency_ms), '--requests', str(args.requests)],
+            env=dict(os.environ, ASYNC_VIEWS=flag), capture_output=True, text=True, check=True).stdout
+        modes[mode] = json.loads(output.strip().splitlines()[-1])
+
+    results = {'db_latency_ms': args.db_latency_ms, 'modes': modes, 'speedup': {}}
+    for name in ROUTES:
+        sync, concurrent = modes['sync'][name], modes['async'][name]
+        results['speedup'][name] = round(concurrent['throughput_rps'] / sync['throughput_rps'], 2)
+        print(f"{name:14} sync {sync['throughput_rps']:8} req/s (p50 {sync['p50_ms']} ms)   "
+              f"async {concurrent['throughput_rps']:8} req/s (p50 {concurrent['p50_ms']} ms)   x{results['speedup'][name]}")
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
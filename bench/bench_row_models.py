@@ -0,0 +1,147 @@
+"""Benchmark for the slotted row models (models.py) against dictionary-cursor rows.
+
+Builds customer history rows the way each cursor would hand them over and reports,
+per 100k rows, the memory the result holds on to, the time to build it, and the time
+to read three columns from every row in Python (row['city']) and in a template
+({{ row.city }}, the way the pages do):
+
+  dicts    what conn.cursor(dictionary=True) returns: one dict per row
+  models   a tuple cursor's rows as Customer instances (execute_query(..., model=Customer))
+  lazy     iter_rows() over a tuple cursor, batch by batch: peak memory stays one batch
+
+Needs no database:
+
+    python bench/bench_row_models.py --rows 100000
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jinja2 import Environment  # noqa: E402
+
+from models import Customer, iter_rows  # noqa: E402
+
+COLUMNS = Customer._fields
+TEMPLATE = Environment().from_string(
+    "{% for row in rows %}<td>{{ row.last_name }}</td><td>{{ row.city }}</td><td>{{ row.room_number }}</td>{% endfor %}")
+
+
+class FakeCursor:
+    """Hands out generated rows like a tuple cursor; the driver's own buffers are not counted."""
+
+    def __init__(self, count):
+        self.description = [(column,) for column in COLUMNS]
+        self._rows = generate_rows(count)
+
+    def fetchmany(self, size):
+        batch = []
+        for row in self._rows:
+            batch.append(row)
+            if len(batch) == size:
+                break
+        return batch
+
+    def fetchall(self):
+        return list(self._rows)
+
+
+def generate_rows(count):
+    start = date(2020, 1, 1)
+    for i in range(count):
+        check_in = start + timedelta(days=i % 1500)
+        yield (i + 1, f"P{i:09d}", f"Last{i % 5000}", f"First{i % 300}", None, f"City {i % 200}",
+               check_in, check_in + timedelta(days=1 + i % 7), 1 + i % 200, f"{100 + i % 200}")
+
+
+def build_dicts(count):
+    cursor = FakeCursor(count)
+    return [dict(zip(COLUMNS, row)) for row in cursor.fetchall()]
+
+
+def build_models(count):
+    cursor = FakeCursor(count)
+    return [Customer(*row) for row in cursor.fetchall()]
+
+
+def read(rows):
+    total = 0
+    for row in rows:
+        total += len(row['last_name']) + len(row['city']) + (row['assigned_room_id'] or 0)
+    return total
+
+
+def timed(function, *args):
+    started = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - started, result
+
+
+def memory(function, *args):
+    """Returns (bytes still allocated by function's result, peak bytes) while it runs."""
+    gc.collect()
+    tracemalloc.start()
+    result = function(*args)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return retained, peak
+
+
+def measure(build, count, repeat):
+    """Returns best-of-repeat (build, read, render) seconds, then (retained, peak) bytes."""
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        built, rows = timed(build, count)
+        read_time, _ = timed(read, rows)
+        render_time, _ = timed(lambda: TEMPLATE.render(rows=rows))
+        times.append((built, read_time, render_time))
+        del rows
+    return tuple(min(run[i] for run in times) for i in range(3)), memory(build, count)
+
+
+def measure_lazy(count, batch_size, repeat):
+    """Returns the best time to build and render in one pass, then (retained, peak) bytes of a read pass.
+
+    Memory is taken from read() rather than the render, whose output string would dominate it.
+    """
+    render = lambda: TEMPLATE.render(rows=iter_rows(FakeCursor(count), Customer, batch_size))
+    elapsed = min(timed(render)[0] for _ in range(repeat))
+    return elapsed, memory(lambda: read(iter_rows(FakeCursor(count), Customer, batch_size)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--batch-size', type=int, default=1000, help="fetchmany() size for the lazy variant")
+    parser.add_argument('--repeat', type=int, default=3, help="Best-of-N timings")
+    args = parser.parse_args()
+    scale = 100_000 / args.rows
+    mib = 1024 * 1024
+
+    print(f"{args.rows} customer rows; times (best of {args.repeat}) and memory per 100k rows")
+    print(f"{'':8} {'build ms':>9} {'read ms':>8} {'render ms':>10} {'retained MiB':>13} {'peak MiB':>9}")
+    results = {}
+    for name, build in (('dicts', build_dicts), ('models', build_models)):
+        (built, read_time, render_time), (retained, peak) = measure(build, args.rows, args.repeat)
+        results[name] = (built + render_time, retained)
+        print(f"{name:8} {built * 1000 * scale:>9.1f} {read_time * 1000 * scale:>8.1f} {render_time * 1000 * scale:>10.1f} "
+              f"{retained / mib * scale:>13.1f} {peak / mib * scale:>9.1f}")
+    elapsed, (retained, peak) = measure_lazy(args.rows, args.batch_size, args.repeat)
+    print(f"{'lazy':8} {'':>9} {'':>8} {elapsed * 1000 * scale:>10.1f} {retained / mib * scale:>13.1f} {peak / mib * scale:>9.1f}"
+          f"  (build + render in one pass)")
+
+    (dict_time, dict_bytes), (model_time, model_bytes) = results['dicts'], results['models']
+    print(f"models vs dicts, per 100k rows: {(dict_bytes - model_bytes) / mib * scale:.1f} MiB "
+          f"({(1 - model_bytes / dict_bytes) * 100:.0f}%) less memory held, "
+          f"{(dict_time - model_time) * 1000 * scale:.1f} ms less to build and render")
+
+
+if __name__ == '__main__':
+    main()
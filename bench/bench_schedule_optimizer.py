@@ -0,0 +1,38 @@
+"""Benchmark for the weekly cleaning schedule optimizer.
+
+Runs schedule_optimizer.optimize_week on synthetic hotels of increasing size and
+reports run time and how evenly the weekly load is spread. Needs no database:
+
+    python bench/bench_schedule_optimizer.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from schedule_optimizer import floor_weights, optimize_week  # noqa: E402
+
+SIZES = [(10, 5), (100, 50), (300, 200), (500, 500), (1000, 1000)] # (employees, floors)
+
+
+def main():
+    rng = random.Random(42)
+    print(f"{'employees':>9} {'floors':>6} {'entries':>8} {'ms':>8} {'min load':>9} {'max load':>9} {'max floor':>9}")
+    for employee_count, floor_count in SIZES:
+        rooms = {floor: rng.randint(10, 40) for floor in range(1, floor_count + 1)}
+        occupied = {floor: rng.randint(0, count) for floor, count in rooms.items()}
+        weights = floor_weights(rooms, occupied)
+        employees = list(range(1, employee_count + 1))
+
+        started = time.perf_counter()
+        entries, loads = optimize_week(weights, employees)
+        elapsed = (time.perf_counter() - started) * 1000
+
+        print(f"{employee_count:>9} {floor_count:>6} {len(entries):>8} {elapsed:>8.1f} "
+              f"{min(loads.values()):>9g} {max(loads.values()):>9g} {max(weights.values()):>9g}")
+
+
+if __name__ == '__main__':
+    main()
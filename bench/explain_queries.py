@@ -0,0 +1,41 @@
+"""Runs the index advisor against a seeded SQLite stand-in, without a MySQL server.
+
+    python bench/explain_queries.py --rooms 200 --years 3
+
+SQLite's planner is not MySQL's, so treat this as a first pass; `flask index-advisor`
+checks the real thing.
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import seed as seeder  # noqa: E402
+import sqlite_backend  # noqa: E402
+
+import app as hotel_app  # noqa: E402
+import index_advisor  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rooms', type=int, default=200)
+    parser.add_argument('--years', type=float, default=3)
+    parser.add_argument('--min-rows', type=int, default=1000, help="ignore problems on smaller tables")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(prefix='hotel-explain-'), 'hotel.db')
+    sqlite_backend.create_schema(path)
+    conn = sqlite_backend.connect_factory(path)()
+    print(f"Seeded: {seeder.seed(conn, rooms=args.rooms, years=args.years)}")
+    conn.db.execute('ANALYZE') # Give the planner statistics, as InnoDB keeps them
+    findings = index_advisor.advise(conn, dialect='sqlite', min_rows=args.min_rows, samples=hotel_app.runtime_query_samples())
+    conn.close()
+    sys.exit(1 if findings else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""Regression checks for fixed bugs, run through the app against a seeded SQLite stand-in.
+
+Needs no database server; exits with status 1 if any check fails:
+
+    python bench/regression_checks.py
+"""
+import os
+import sys
+import tempfile
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import seed as seeder  # noqa: E402
+import sqlite_backend  # noqa: E402
+
+import app as hotel_app  # noqa: E402
+from jobs import JobWorker  # noqa: E402
+
+
+def query(sql, params=(), one=False):
+    with hotel_app.app.test_request_context():
+        return hotel_app.execute_query(sql, params, fetch_one=one, fetch_all=not one)
+
+
+def check_in(client, room_id, passport):
+    return client.post('/customer/check_in', data={
+        'passport_number': passport, 'last_name': 'Check', 'first_name': 'Regression', 'middle_name': '',
+        'city': 'Testville', 'check_in_date': date.today().isoformat(), 'room_id': str(room_id),
+    })
+
+
+def same_day_check_out_frees_room(client):
+    """A guest checked in and out on the same day leaves the room free for a check-in today."""
+    today = date.today().isoformat()
+    room = query("""
+        SELECT r.room_id FROM rooms r
+        WHERE r.is_occupied = FALSE
+          AND NOT EXISTS (SELECT 1 FROM reservations v WHERE v.room_id = r.room_id AND v.end_date > %s AND v.status <> 'cancelled')
+        ORDER BY r.room_id LIMIT 1
+    """, (today,), one=True)
+    assert room, "no free room without bookings"
+    room_id = room['room_id']
+
+    check_in(client, room_id, 'REGRESSION-1')
+    first = query("SELECT customer_id FROM customers WHERE passport_number = %s", ('REGRESSION-1',), one=True)
+    assert first, "first check-in failed"
+    client.post(f"/customer/check_out/{first['customer_id']}")
+
+    with hotel_app.app.test_request_context():
+        free = [row['room_id'] for row in hotel_app.find_free_rooms(date.today(), date.today() + timedelta(days=1))]
+    assert room_id in free, "room not listed as free after a same-day check-out"
+
+    check_in(client, room_id, 'REGRESSION-2')
+    second = query("SELECT assigned_room_id FROM customers WHERE passport_number = %s AND check_out_date IS NULL",
+                   ('REGRESSION-2',), one=True)
+    assert second and second['assigned_room_id'] == room_id, "second check-in into the room was refused"
+
+
+def job_worker_stops_and_joins(client):
+    """A stopped job worker exits its loop and can be joined."""
+    worker = JobWorker(lambda: 0, poll_interval=0.05, name='regression-worker')
+    worker.start()
+    worker.stop()
+    worker.join(2)
+    assert not worker.is_alive(), "worker still running after stop()"
+
+
+CHECKS = [same_day_check_out_frees_room, job_worker_stops_and_joins]
+
+
+def main():
+    path = os.path.join(tempfile.mkdtemp(prefix='hotel-checks-'), 'hotel.db')
+    sqlite_backend.create_schema(path)
+    conn = sqlite_backend.connect_factory(path)()
+    seeder.seed(conn, rooms=20, years=0.2)
+    conn.close()
+    hotel_app.db_pool._connect = sqlite_backend.connect_factory(path)
+    client = hotel_app.app.test_client()
+
+    failed = 0
+    for check in CHECKS:
+        try:
+            check(client)
+            print(f"ok    {check.__name__}")
+        except AssertionError as err:
+            failed += 1
+            print(f"FAIL  {check.__name__}: {err}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
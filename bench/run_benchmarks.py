@@ -0,0 +1,473 @@
+"""Offline load test and benchmark suite.
+
+Seeds a synthetic hotel, drives the app's routes through the Flask test client, first
+one request at a time (latency and SQL statements per request), then from a pool of
+concurrent clients (throughput under load), and writes the results to a JSON file.
+
+    python bench/run_benchmarks.py                         # SQLite stand-in, no server needed
+    python bench/run_benchmarks.py --rooms 1000 --years 5 --threads 32
+    python bench/run_benchmarks.py --baseline results/before.json --output results/after.json
+    python bench/run_benchmarks.py --backend mysql --reset # scratch MySQL DB from DB_* settings
+
+With --baseline, routes whose p95 latency got worse than --threshold percent are listed
+and the exit status is 1.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import seed as seeder  # noqa: E402
+import sqlite_backend  # noqa: E402
+
+import app as hotel_app  # noqa: E402
+
+
+class HotelState:
+    """What the scenarios need to build valid requests, kept current as they check guests in and out."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.serial = 0
+        rows = query("SELECT room_id FROM rooms WHERE is_occupied = FALSE ORDER BY room_id")
+        self.free_rooms = [row['room_id'] for row in rows]
+        rows = query("SELECT DISTINCT room_id FROM reservations WHERE status = 'booked'")
+        self.booked_rooms = {row['room_id'] for row in rows} # Can't take open-ended stays
+        rows = query("SELECT customer_id, assigned_room_id FROM customers WHERE check_out_date IS NULL ORDER BY customer_id")
+        self.active = [(row['customer_id'], row['assigned_room_id']) for row in rows]
+        rows = query("SELECT customer_id FROM customers WHERE check_out_date IS NOT NULL ORDER BY customer_id DESC LIMIT 500")
+        self.past_customers = [row['customer_id'] for row in rows]
+        self.room_ids = [row['room_id'] for row in query("SELECT room_id FROM rooms ORDER BY room_id")]
+        self.cities = [row['city'] for row in query("SELECT DISTINCT city FROM customers ORDER BY city LIMIT 50")]
+
+    def next_serial(self):
+        with self.lock:
+            self.serial += 1
+            return self.serial
+
+    def take_free_room(self, rng, open_ended=False):
+        with self.lock:
+            candidates = [i for i, room_id in enumerate(self.free_rooms)
+                          if not open_ended or room_id not in self.booked_rooms]
+            if not candidates:
+                return None
+            return self.free_rooms.pop(rng.choice(candidates))
+
+    def take_active(self, rng):
+        with self.lock:
+            if not self.active:
+                return None
+            return self.active.pop(rng.randrange(len(self.active)))
+
+    def sample_active(self, rng, k=1):
+        with self.lock:
+            return rng.sample(self.active, min(k, len(self.active)))
+
+
+def query(sql, params=()):
+    with hotel_app.app.test_request_context():
+        return hotel_app.execute_query(sql, params, fetch_all=True) or []
+
+
+# --- Scenarios ---
+# Each returns (method, path, request kwargs, after) where after(response) updates the
+# state once the timed request is done, or None if the scenario can't run right now.
+
+def _get(path):
+    return lambda state, rng: ('GET', path, {}, None)
+
+
+def _invoice(state, rng):
+    if not state.past_customers:
+        return None
+    return 'GET', f"/invoice/{rng.choice(state.past_customers)}", {}, None
+
+
+def _occupants_by_room(state, rng):
+    return 'POST', '/query/occupants_by_room', {'data': {'room_id': str(rng.choice(state.room_ids))}}, None
+
+
+def _customers_by_city(state, rng):
+    return 'POST', '/query/customers_by_city', {'data': {'city': rng.choice(state.cities)}}, None
+
+
+def _cleaner_for_stay(state, rng):
+    guests = state.sample_active(rng)
+    if not guests:
+        return None
+    return 'POST', '/query/cleaner_for_customer_stay', {
+        'data': {'customer_id': str(guests[0][0]), 'day_of_week': rng.choice(hotel_app.DAYS_OF_WEEK)}}, None
+
+
+def _cleaners_api(state, rng):
+    guests = state.sample_active(rng, 20)
+    if not guests:
+        return None
+    return 'POST', '/api/cleaners', {
+        'json': {'customer_ids': [customer_id for customer_id, _ in guests], 'day_of_week': rng.choice(hotel_app.DAYS_OF_WEEK)}}, None
+
+
+def _check_in(state, rng):
+    room_id = state.take_free_room(rng)
+    if room_id is None:
+        return None
+    passport = f"BENCH-{os.getpid()}-{state.next_serial()}"
+
+    def after(response):
+        rows = query("SELECT customer_id FROM customers WHERE passport_number = %s AND check_out_date IS NULL", (passport,))
+        with state.lock:
+            if rows:
+                state.active.append((rows[0]['customer_id'], room_id))
+            else:
+                state.free_rooms.append(room_id) # Lost a race or failed; the room is still free
+
+    return 'POST', '/customer/check_in', {'data': {
+        'passport_number': passport, 'last_name': 'Bench', 'first_name': 'Guest', 'middle_name': '',
+        'city': rng.choice(state.cities), 'check_in_date': date.today().isoformat(), 'room_id': str(room_id),
+        'expected_check_out_date': (date.today() + timedelta(days=1)).isoformat(), # Before any seeded booking
+    }}, after
+
+
+def _check_out(state, rng):
+    guest = state.take_active(rng)
+    if guest is None:
+        return None
+    customer_id, room_id = guest
+
+    def after(response):
+        with state.lock:
+            state.free_rooms.append(room_id)
+            state.past_customers.append(customer_id)
+
+    return 'POST', f"/customer/check_out/{customer_id}", {}, after
+
+
+def _group_check_in(state, rng):
+    room_id = state.take_free_room(rng, open_ended=True) # Shared by both guests, then left occupied
+    if room_id is None:
+        return None
+    serial = state.next_serial()
+    guests = [{'passport_number': f"BENCH-G-{os.getpid()}-{serial}-{i}", 'last_name': 'Bench', 'first_name': f"Member{i}",
+               'middle_name': '', 'city': rng.choice(state.cities), 'room_id': room_id} for i in range(2)]
+    return 'POST', '/api/group_check_in', {'json': {'check_in_date': date.today().isoformat(), 'guests': guests}}, None
+
+
+def _stay_period(rng):
+    start = date.today() + timedelta(days=rng.randint(0, 90))
+    return start, start + timedelta(days=rng.randint(1, 7))
+
+
+def _availability(state, rng):
+    start, end = _stay_period(rng)
+    return 'GET', f"/rooms/availability?start={start.isoformat()}&end={end.isoformat()}", {}, None
+
+
+def _availability_api(state, rng):
+    start, end = _stay_period(rng)
+    return 'GET', f"/api/rooms/available?start={start.isoformat()}&end={end.isoformat()}", {}, None
+
+
+def _book(state, rng):
+    start, end = _stay_period(rng)
+    room_id = rng.choice(state.room_ids)
+    with state.lock:
+        state.booked_rooms.add(room_id)
+    return 'POST', '/reservations/book', {'data': {
+        'guest_name': f"Bench Booking {state.next_serial()}", 'room_id': str(room_id),
+        'start_date': start.isoformat(), 'end_date': end.isoformat()}}, None
+
+
+def _add_employee(state, rng):
+    return 'POST', '/employee/add', {'data': {'last_name': 'Bench', 'first_name': f"Worker{state.next_serial()}", 'middle_name': ''}}, None
+
+
+def _occupancy_api(state, rng):
+    start = (date.today() - timedelta(days=364)).isoformat()
+    return 'GET', f"/api/occupancy?start={start}", {}, None
+
+
+def _export_customers(state, rng):
+    return 'GET', f"/export/customers.csv?date_from={(date.today() - timedelta(days=30)).isoformat()}", {}, None
+
+
+# name -> (scenario, weight in the concurrent mix; 0 = sequential phase only)
+SCENARIOS = {
+    'index': (_get('/'), 10),
+    'view_rooms': (_get('/rooms'), 5),
+    'view_customers': (_get('/customers'), 5),
+    'view_customers_search': (_get('/customers?name=Iv'), 2),
+    'view_all_customers': (_get('/customers/all'), 5),
+    'view_all_customers_city': (lambda state, rng: ('GET', f"/customers/all?city={rng.choice(state.cities)}", {}, None), 2),
+    'check_in_form': (_get('/customer/check_in'), 2),
+    'check_in': (_check_in, 4),
+    'check_out': (_check_out, 4),
+    'group_check_in': (_group_check_in, 1),
+    'room_changes': (lambda state, rng: ('GET', f"/api/rooms/changes?since={max(hotel_app.get_room_events().version - 5, 0)}", {}, None), 2),
+    'room_availability': (_availability, 2),
+    'room_availability_api': (_availability_api, 1),
+    'room_calendar': (_get('/rooms/calendar'), 2),
+    'view_reservations': (_get('/reservations'), 1),
+    'book_reservation': (_book, 1),
+    'view_employees': (_get('/employees'), 2),
+    'add_employee': (_add_employee, 0),
+    'view_schedule': (_get('/schedule'), 3),
+    'optimize_schedule': (lambda state, rng: ('POST', '/schedule/optimize', {}, None), 0),
+    'reports_page': (_get('/reports'), 3),
+    'query_occupants_by_room': (_occupants_by_room, 2),
+    'query_customers_by_city': (_customers_by_city, 2),
+    'query_cleaner_for_customer_stay': (_cleaner_for_stay, 2),
+    'cleaners_api': (_cleaners_api, 1),
+    'generate_invoice': (_invoice, 3),
+    'hotel_report': (_get('/hotel_report'), 3),
+    'invoice_archive': (lambda state, rng: ('GET', f"/invoices/archive.zip?date_from={(date.today() - timedelta(days=30)).isoformat()}&date_to={date.today().isoformat()}", {}, None), 0),
+    'occupancy_report': (_get('/reports/occupancy'), 1),
+    'occupancy_api': (_occupancy_api, 1),
+    'group_report': (_get('/reports/group'), 1),
+    'export_customers': (_export_customers, 1),
+    'export_income': (_get('/export/income.ndjson'), 1),
+    'metrics': (_get('/metrics'), 1),
+}
+
+
+# --- Measurement ---
+def total_queries():
+    with hotel_app.app_metrics._lock:
+        return sum(histogram.count for histogram in hotel_app.app_metrics.queries.values())
+
+
+def timed_request(client, state, rng, scenario):
+    """Runs one scenario. Returns (seconds, status, statements) or None if it was skipped.
+
+    statements is the change in the app's statement count, so it is only exact when
+    nothing else runs at the same time.
+    """
+    built = scenario(state, rng)
+    if built is None:
+        return None
+    method, path, kwargs, after = built
+    queries_before = total_queries()
+    started = time.perf_counter()
+    response = client.open(path, method=method, **kwargs)
+    response.get_data() # Consume streamed responses inside the timing
+    response.close() # Returns a streaming export's connection to the pool
+    elapsed = time.perf_counter() - started
+    statements = total_queries() - queries_before
+    if after:
+        after(response)
+    return elapsed, response.status_code, statements
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def summarize(samples, wall_seconds, queries=None):
+    latencies = sorted(seconds for seconds, _ in samples)
+    statuses = {}
+    for _, status in samples:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    ms = lambda value: round(value * 1000, 3) if value is not None else None
+    summary = {
+        'requests': len(samples),
+        'errors': sum(1 for _, status in samples if status >= 500),
+        'statuses': statuses,
+        'throughput_rps': round(len(samples) / wall_seconds, 2) if wall_seconds else None,
+        'mean_ms': ms(sum(latencies) / len(latencies)) if latencies else None,
+        'p50_ms': ms(percentile(latencies, 50)),
+        'p95_ms': ms(percentile(latencies, 95)),
+        'p99_ms': ms(percentile(latencies, 99)),
+        'max_ms': ms(latencies[-1]) if latencies else None,
+    }
+    if queries is not None:
+        summary['queries_per_request'] = round(sum(queries) / len(queries), 2) if queries else None
+        summary['queries_max'] = max(queries) if queries else None
+    return summary
+
+
+def run_sequential(state, iterations, rng):
+    """Every scenario on its own, so per-request latency and SQL statement counts are exact."""
+    client = hotel_app.app.test_client()
+    results = {}
+    for name, (scenario, _) in SCENARIOS.items():
+        samples, queries = [], []
+        started = time.perf_counter()
+        for _ in range(iterations):
+            sample = timed_request(client, state, rng, scenario)
+            if sample is None:
+                continue
+            seconds, status, statements = sample
+            queries.append(statements)
+            samples.append((seconds, status))
+        results[name] = summarize(samples, time.perf_counter() - started, queries)
+        print(f"  {name:34} p50 {results[name]['p50_ms']} ms, {results[name]['queries_per_request']} queries/request")
+    return results
+
+
+def run_concurrent(state, threads, total_requests, random_seed):
+    """A weighted mix of scenarios from `threads` clients at once."""
+    names = [name for name, (_, weight) in SCENARIOS.items() if weight]
+    weights = [SCENARIOS[name][1] for name in names]
+    plan = random.Random(random_seed).choices(names, weights=weights, k=total_requests)
+    samples = {name: [] for name in names}
+    samples_lock = threading.Lock()
+    local = threading.local()
+
+    def worker(indexed):
+        index, name = indexed
+        if not hasattr(local, 'client'):
+            local.client = hotel_app.app.test_client()
+        sample = timed_request(local.client, state, random.Random(random_seed + index), SCENARIOS[name][0])
+        if sample is not None:
+            with samples_lock:
+                samples[name].append(sample[:2])
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(worker, enumerate(plan)))
+    wall = time.perf_counter() - started
+    every = [sample for route_samples in samples.values() for sample in route_samples]
+    return {
+        'threads': threads,
+        'wall_seconds': round(wall, 3),
+        'overall': summarize(every, wall),
+        'routes': {name: summarize(route_samples, wall) for name, route_samples in samples.items()},
+    }
+
+
+def compare(baseline, results, threshold):
+    """Lists routes whose p95 latency regressed by more than threshold percent."""
+    regressions = []
+    for phase in ('sequential', 'concurrent'):
+        old_routes = baseline.get(phase, {})
+        new_routes = results.get(phase, {})
+        if phase == 'concurrent':
+            old_routes, new_routes = old_routes.get('routes', {}), new_routes.get('routes', {})
+        for name, new in new_routes.items():
+            old = old_routes.get(name)
+            if not old or not old.get('p95_ms') or new.get('p95_ms') is None:
+                continue
+            change = (new['p95_ms'] - old['p95_ms']) / old['p95_ms'] * 100
+            if change > threshold:
+                regressions.append((phase, name, old['p95_ms'], new['p95_ms'], change))
+    return regressions
+
+
+# --- Setup ---
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def setup_database(args):
+    """Points the app's pool at the chosen backend and seeds it. Returns seeding stats."""
+    size = dict(rooms=args.rooms, floors=args.floors, years=args.years, employees=args.employees,
+                occupancy=args.occupancy, random_seed=args.seed)
+    if args.backend == 'sqlite':
+        path = args.sqlite_path or os.path.join(tempfile.mkdtemp(prefix='hotel-bench-'), 'hotel.db')
+        if os.path.exists(path):
+            os.remove(path)
+        sqlite_backend.create_schema(path)
+        hotel_app.db_pool._connect = sqlite_backend.connect_factory(path, args.db_latency_ms)
+        conn = hotel_app.db_pool._connect()
+    else:
+        hotel_app.run_migrations() # Brings an empty or older database up to the current schema
+        conn = hotel_app.db_pool._connect(**hotel_app.db_config)
+    try:
+        if seeder.has_data(conn):
+            if args.no_seed:
+                return {'seeded': False}
+            if not args.reset:
+                sys.exit("The database already has data. Use --reset to wipe it (scratch databases only) or --no-seed to benchmark it as is.")
+            seeder.clear(conn)
+        started = time.perf_counter()
+        counts = seeder.seed(conn, **size)
+        return {'seeded': True, 'seconds': round(time.perf_counter() - started, 3), 'rows': counts}
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--backend', choices=['sqlite', 'mysql'], default='sqlite')
+    parser.add_argument('--sqlite-path', help="SQLite file to (re)create; defaults to a temporary file")
+    parser.add_argument('--db-latency-ms', type=float, default=0.0, help="simulated round trip per statement (SQLite only)")
+    parser.add_argument('--reset', action='store_true', help="wipe existing data before seeding (MySQL)")
+    parser.add_argument('--no-seed', action='store_true', help="benchmark the existing data as is (MySQL)")
+    parser.add_argument('--rooms', type=int, default=200)
+    parser.add_argument('--floors', type=int, default=10)
+    parser.add_argument('--years', type=float, default=3)
+    parser.add_argument('--employees', type=int, default=30)
+    parser.add_argument('--occupancy', type=float, default=0.7)
+    parser.add_argument('--seed', type=int, default=42, help="random seed for data and request mix")
+    parser.add_argument('--iterations', type=int, default=30, help="sequential requests per route")
+    parser.add_argument('--requests', type=int, default=2000, help="total requests in the concurrent phase")
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--baseline', help="earlier results file to compare p95 latencies against")
+    parser.add_argument('--threshold', type=float, default=20.0, help="p95 regression threshold in percent")
+    args = parser.parse_args()
+
+    if args.backend == 'sqlite':
+        hotel_app.db_pool.size = max(hotel_app.db_pool.size, args.threads)
+    seeding = setup_database(args)
+    print(f"Seeded: {seeding}")
+    state = HotelState()
+    rng = random.Random(args.seed)
+
+    print("Sequential phase:")
+    sequential = run_sequential(state, args.iterations, rng)
+    print(f"Concurrent phase: {args.requests} requests from {args.threads} threads")
+    concurrent = run_concurrent(state, args.threads, args.requests, args.seed)
+    overall = concurrent['overall']
+    print(f"  {overall['throughput_rps']} requests/s, p50 {overall['p50_ms']} ms, p95 {overall['p95_ms']} ms, "
+          f"p99 {overall['p99_ms']} ms, {overall['errors']} errors")
+
+    results = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'backend': args.backend,
+            'db_latency_ms': args.db_latency_ms if args.backend == 'sqlite' else None,
+            'size': {'rooms': args.rooms, 'floors': args.floors, 'years': args.years,
+                     'employees': args.employees, 'occupancy': args.occupancy, 'seed': args.seed},
+            'iterations': args.iterations,
+        },
+        'seed': seeding,
+        'sequential': sequential,
+        'concurrent': concurrent,
+        'db_pool': hotel_app.db_pool.stats(),
+    }
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(json.load(f), results, args.threshold)
+        for phase, name, old, new, change in regressions:
+            print(f"REGRESSION {phase}/{name}: p95 {old} ms -> {new} ms (+{change:.0f}%)")
+        if regressions:
+            sys.exit(1)
+        print(f"No p95 regressions above {args.threshold:.0f}% against {args.baseline}")
+
+
+if __name__ == '__main__':
+    main()
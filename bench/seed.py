@@ -0,0 +1,186 @@
+"""Synthetic hotel data for benchmarks.
+
+seed(conn, ...) fills an empty database (MySQL or the SQLite stand-in) with room
+types, rooms, employees, a balanced cleaning schedule, several years of customer
+stays and some upcoming bookings, then backfills revenue_daily. The same random seed always produces the same hotel.
+"""
+import os
+import random
+import sys
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from schedule_optimizer import DEFAULT_DAYS, floor_weights, optimize_week  # noqa: E402
+
+ROOM_TYPES = [('Single', '50.00'), ('Double', '80.00'), ('Triple', '110.00'), ('Suite', '200.00')]
+FIRST_NAMES = ['Anna', 'Boris', 'Clara', 'Dmitri', 'Elena', 'Farid', 'Greta', 'Hugo', 'Irina', 'Jonas',
+               'Katya', 'Leon', 'Maria', 'Nikolai', 'Olga', 'Pavel', 'Quinn', 'Rosa', 'Sergei', 'Tanya']
+LAST_NAMES = ['Ivanov', 'Smith', 'Petrova', 'Garcia', 'Kowalski', 'Novak', 'Schmidt', 'Rossi', 'Dubois',
+              'Jensen', 'Costa', 'Horvat', 'Larsen', 'Moreau', 'Popescu', 'Sokolov', 'Varga', 'Weber',
+              'Young', 'Zhou']
+MIDDLE_NAMES = [None, None, 'Alexandrovich', 'Petrovna', 'Lee', 'Marie']
+CITIES = [f"City {i:03d}" for i in range(200)]
+
+BATCH_SIZE = 5000
+
+REVENUE_BACKFILL_QUERY = """
+    INSERT INTO revenue_daily (revenue_date, type_id, stays, nights, revenue)
+    SELECT c.check_out_date, r.type_id, COUNT(*),
+           SUM(GREATEST(DATEDIFF(c.check_out_date, c.check_in_date), 1)),
+           SUM(GREATEST(DATEDIFF(c.check_out_date, c.check_in_date), 1) * rt.cost_per_day)
+    FROM customers c
+    JOIN rooms r ON c.assigned_room_id = r.room_id
+    JOIN room_types rt ON r.type_id = rt.type_id
+    WHERE c.check_out_date IS NOT NULL AND c.check_in_date IS NOT NULL
+    GROUP BY c.check_out_date, r.type_id
+    ON DUPLICATE KEY UPDATE stays = VALUES(stays), nights = VALUES(nights), revenue = VALUES(revenue)
+"""
+
+# Every stay as a reservation interval; open stays hold the room until checked out
+RESERVATION_BACKFILL_QUERY = """
+    INSERT INTO reservations (room_id, customer_id, start_date, end_date, status)
+    SELECT assigned_room_id, customer_id, check_in_date, COALESCE(check_out_date, '9999-12-31'),
+           CASE WHEN check_out_date IS NULL THEN 'in_house' ELSE 'completed' END
+    FROM customers
+    WHERE assigned_room_id IS NOT NULL AND check_in_date IS NOT NULL
+"""
+
+TABLES = ['jobs', 'reservations', 'invoices', 'revenue_daily', 'cleaning_schedule', 'customers', 'rooms', 'room_types', 'employees']
+
+
+def _insert_batches(cursor, query, rows):
+    for i in range(0, len(rows), BATCH_SIZE):
+        cursor.executemany(query, rows[i:i + BATCH_SIZE])
+
+
+def _ids(cursor, table, column):
+    cursor.execute(f"SELECT {column} FROM {table} ORDER BY {column}")
+    return [row[0] for row in cursor.fetchall()]
+
+
+def generate_stays(room_ids, years, occupancy, rng, today):
+    """Back-to-back stays per room over the last `years` years.
+
+    Gaps between stays are sized so roughly `occupancy` of the nights are occupied;
+    a room's last stay is left open (guest still checked in) with that probability.
+    Returns (stays, occupied_room_ids), stays as (room_id, check_in, check_out or None).
+    """
+    start = today - timedelta(days=int(365 * years))
+    mean_gap = max(1.0, 3.5 * (1 - occupancy) / max(occupancy, 0.01))
+    stays, occupied = [], set()
+    for room_id in room_ids:
+        day = start + timedelta(days=rng.randint(0, 6))
+        while True:
+            nights = rng.randint(1, 6)
+            check_out = day + timedelta(days=nights)
+            if check_out > today:
+                if rng.random() < occupancy and day <= today:
+                    stays.append((room_id, day, None))
+                    occupied.add(room_id)
+                break
+            stays.append((room_id, day, check_out))
+            day = check_out + timedelta(days=int(rng.expovariate(1 / mean_gap)))
+    return stays, occupied
+
+
+def generate_bookings(room_ids, rng, today, horizon_days=60):
+    """A few non-overlapping future bookings for about half the free rooms, within the
+    next `horizon_days`; the rest stay open for walk-ins of unknown length.
+
+    Returns (room_id, start, end) tuples, end being the check-out day.
+    """
+    bookings = []
+    for room_id in room_ids:
+        if rng.random() < 0.5:
+            continue
+        day = today + timedelta(days=rng.randint(1, 10))
+        while day < today + timedelta(days=horizon_days):
+            end = day + timedelta(days=rng.randint(1, 6))
+            bookings.append((room_id, day, end))
+            day = end + timedelta(days=rng.randint(2, 15))
+    return bookings
+
+
+def seed(conn, rooms=200, floors=10, years=3, employees=30, occupancy=0.7, random_seed=42, today=None):
+    """Populates an empty schema. Returns a dict of row counts per table."""
+    rng = random.Random(random_seed)
+    today = today or date.today()
+    cursor = conn.cursor()
+
+    cursor.executemany("INSERT INTO room_types (name, cost_per_day) VALUES (%s, %s)", ROOM_TYPES)
+    type_ids = _ids(cursor, 'room_types', 'type_id')
+
+    rooms_per_floor = -(-rooms // floors)
+    room_rows = [(f"{room // rooms_per_floor + 1}{room % rooms_per_floor + 1:02d}",
+                  room // rooms_per_floor + 1,
+                  type_ids[rng.randrange(len(type_ids))])
+                 for room in range(rooms)]
+    _insert_batches(cursor, "INSERT INTO rooms (room_number, floor, type_id, is_occupied) VALUES (%s, %s, %s, FALSE)", room_rows)
+    room_ids = _ids(cursor, 'rooms', 'room_id')
+
+    employee_rows = [(rng.choice(LAST_NAMES), rng.choice(FIRST_NAMES), rng.choice(MIDDLE_NAMES)) for _ in range(employees)]
+    _insert_batches(cursor, "INSERT INTO employees (last_name, first_name, middle_name) VALUES (%s, %s, %s)", employee_rows)
+    employee_ids = _ids(cursor, 'employees', 'employee_id')
+
+    stays, occupied = generate_stays(room_ids, years, occupancy, rng, today)
+    # Completed stays carry the rate they were billed at, as check-out records it
+    rates = {type_id: cost for type_id, (_, cost) in zip(type_ids, ROOM_TYPES)}
+    room_rate = {room_id: rates[row[2]] for room_id, row in zip(room_ids, room_rows)}
+    customer_rows = [(f"P{i:09d}", rng.choice(LAST_NAMES), rng.choice(FIRST_NAMES), rng.choice(MIDDLE_NAMES),
+                      rng.choice(CITIES), check_in.isoformat(), check_out.isoformat() if check_out else None, room_id,
+                      room_rate[room_id] if check_out else None)
+                     for i, (room_id, check_in, check_out) in enumerate(stays)]
+    _insert_batches(cursor, """
+        INSERT INTO customers (passport_number, last_name, first_name, middle_name, city, check_in_date, check_out_date,
+                               assigned_room_id, billed_rate)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """, customer_rows)
+    if occupied:
+        _insert_batches(cursor, "UPDATE rooms SET is_occupied = TRUE WHERE room_id = %s", [(room_id,) for room_id in sorted(occupied)])
+
+    floor_of = {room_id: row[1] for room_id, row in zip(room_ids, room_rows)}
+    rooms_by_floor, occupied_by_floor = {}, {}
+    for room_id, floor in floor_of.items():
+        rooms_by_floor[floor] = rooms_by_floor.get(floor, 0) + 1
+        if room_id in occupied:
+            occupied_by_floor[floor] = occupied_by_floor.get(floor, 0) + 1
+    entries, _ = optimize_week(floor_weights(rooms_by_floor, occupied_by_floor), employee_ids, DEFAULT_DAYS)
+    _insert_batches(cursor, "INSERT INTO cleaning_schedule (employee_id, floor, day_of_week) VALUES (%s, %s, %s)", entries)
+
+    cursor.execute(RESERVATION_BACKFILL_QUERY)
+    bookings = generate_bookings([room_id for room_id in room_ids if room_id not in occupied], rng, today)
+    _insert_batches(cursor, """
+        INSERT INTO reservations (room_id, guest_name, start_date, end_date, status) VALUES (%s, %s, %s, %s, 'booked')
+    """, [(room_id, f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}", start.isoformat(), end.isoformat())
+          for room_id, start, end in bookings])
+
+    cursor.execute(REVENUE_BACKFILL_QUERY)
+    conn.commit()
+    cursor.close()
+    return {
+        'room_types': len(type_ids),
+        'rooms': len(room_ids),
+        'employees': len(employee_ids),
+        'cleaning_schedule': len(entries),
+        'customers': len(customer_rows),
+        'current_guests': sum(1 for stay in stays if stay[2] is None),
+        'bookings': len(bookings),
+    }
+
+
+def clear(conn):
+    """Deletes every row the seeder writes. Only for scratch databases."""
+    cursor = conn.cursor()
+    for table in TABLES:
+        cursor.execute(f"DELETE FROM {table}")
+    conn.commit()
+    cursor.close()
+
+
+def has_data(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM rooms")
+    count = cursor.fetchone()[0]
+    cursor.close()
+    return count > 0
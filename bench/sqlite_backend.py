@@ -0,0 +1,275 @@
+"""SQLite stand-in for MySQL, so the app can be benchmarked fully offline.
+
+connect_factory(path) returns a drop-in for mysql.connector.connect that speaks the
+subset of the mysql-connector API the app uses (dictionary cursors, executemany,
+lastrowid/rowcount, commit/rollback, ping). Statements are translated on the fly:
+%s placeholders, GREATEST/LEAST, DATEDIFF/YEAR/MONTH/CURDATE, FOR UPDATE,
+INSERT IGNORE and ON DUPLICATE KEY UPDATE.
+
+SQLite locks the whole database for writes, so lock contention behaves differently
+from InnoDB row locks; "database is locked" is reported as a MySQL lock wait timeout
+(errno 1205) so the app's retry logic still runs.
+"""
+import re
+import sqlite3
+import time
+from datetime import date
+from decimal import Decimal
+
+import mysql.connector
+
+sqlite3.register_converter('DECIMAL', lambda value: Decimal(value.decode()))
+sqlite3.register_adapter(Decimal, str)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS room_types (
+    type_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    cost_per_day DECIMAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rooms (
+    room_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    room_number TEXT NOT NULL,
+    floor INTEGER NOT NULL,
+    type_id INTEGER NOT NULL REFERENCES room_types(type_id),
+    is_occupied BOOLEAN NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS customers (
+    customer_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    passport_number TEXT NOT NULL,
+    last_name TEXT NOT NULL,
+    first_name TEXT NOT NULL,
+    middle_name TEXT,
+    city TEXT NOT NULL,
+    check_in_date DATE NOT NULL,
+    check_out_date DATE,
+    assigned_room_id INTEGER REFERENCES rooms(room_id),
+    billed_rate DECIMAL
+);
+CREATE TABLE IF NOT EXISTS employees (
+    employee_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    last_name TEXT NOT NULL,
+    first_name TEXT NOT NULL,
+    middle_name TEXT
+);
+CREATE TABLE IF NOT EXISTS cleaning_schedule (
+    schedule_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    employee_id INTEGER NOT NULL REFERENCES employees(employee_id) ON DELETE CASCADE,
+    floor INTEGER NOT NULL,
+    day_of_week TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS revenue_daily (
+    revenue_date DATE NOT NULL,
+    type_id INTEGER NOT NULL,
+    stays INTEGER NOT NULL DEFAULT 0,
+    nights INTEGER NOT NULL DEFAULT 0,
+    revenue DECIMAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (revenue_date, type_id)
+);
+CREATE TABLE IF NOT EXISTS invoices (
+    invoice_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    customer_id INTEGER NOT NULL UNIQUE REFERENCES customers(customer_id),
+    check_in_date DATE NOT NULL,
+    check_out_date DATE NOT NULL,
+    room_number TEXT NOT NULL,
+    type_name TEXT NOT NULL,
+    cost_per_day DECIMAL NOT NULL,
+    nights INTEGER NOT NULL,
+    total DECIMAL NOT NULL,
+    content_hash TEXT NOT NULL,
+    html TEXT NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS reservations (
+    reservation_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    room_id INTEGER NOT NULL REFERENCES rooms(room_id),
+    customer_id INTEGER REFERENCES customers(customer_id),
+    guest_name TEXT,
+    start_date DATE NOT NULL,
+    end_date DATE NOT NULL,
+    status TEXT NOT NULL DEFAULT 'booked',
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 5,
+    run_at TIMESTAMP NOT NULL,
+    created_at TIMESTAMP NOT NULL,
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP,
+    locked_by TEXT,
+    locked_until TIMESTAMP,
+    last_error TEXT
+);
+CREATE TABLE IF NOT EXISTS property (
+    property_id INTEGER PRIMARY KEY,
+    code TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    recorded_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_due ON jobs (status, run_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_lease ON jobs (status, locked_until);
+CREATE INDEX IF NOT EXISTS idx_reservations_room_interval ON reservations (room_id, end_date, start_date, status);
+CREATE INDEX IF NOT EXISTS idx_reservations_window ON reservations (end_date, start_date);
+CREATE INDEX IF NOT EXISTS idx_reservations_customer ON reservations (customer_id, status);
+CREATE INDEX IF NOT EXISTS idx_invoices_check_out ON invoices (check_out_date, customer_id);
+CREATE INDEX IF NOT EXISTS idx_customers_history ON customers (check_in_date DESC, last_name, customer_id);
+CREATE INDEX IF NOT EXISTS idx_customers_city_history ON customers (city, check_in_date DESC, last_name, customer_id);
+CREATE INDEX IF NOT EXISTS idx_customers_current ON customers (check_out_date, last_name, first_name, customer_id);
+CREATE INDEX IF NOT EXISTS idx_customers_name ON customers (last_name, first_name, customer_id);
+CREATE INDEX IF NOT EXISTS idx_customers_stay_interval ON customers (check_out_date, check_in_date, assigned_room_id);
+CREATE INDEX IF NOT EXISTS idx_customers_passport ON customers (passport_number, check_out_date);
+CREATE INDEX IF NOT EXISTS idx_customers_room_current ON customers (assigned_room_id, check_out_date);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_rooms_number ON rooms (room_number);
+CREATE INDEX IF NOT EXISTS idx_rooms_available ON rooms (is_occupied, room_number);
+CREATE INDEX IF NOT EXISTS idx_rooms_floor ON rooms (floor, room_number, is_occupied);
+CREATE INDEX IF NOT EXISTS idx_customers_city_current ON customers (city, check_out_date, last_name, first_name);
+CREATE INDEX IF NOT EXISTS idx_cleaning_schedule_slot ON cleaning_schedule (floor, day_of_week, employee_id);
+CREATE INDEX IF NOT EXISTS idx_cleaning_schedule_employee ON cleaning_schedule (employee_id, floor, day_of_week);
+CREATE INDEX IF NOT EXISTS idx_employees_name ON employees (last_name, first_name);
+CREATE INDEX IF NOT EXISTS idx_customers_check_in_order ON customers (check_in_date, customer_id);
+CREATE INDEX IF NOT EXISTS idx_customers_check_out_order ON customers (check_out_date, customer_id);
+"""
+
+_TRANSLATIONS = [
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\bFOR UPDATE(\s+SKIP LOCKED)?\b', re.I), ''),
+    (re.compile(r'\bINSERT IGNORE\b', re.I), 'INSERT OR IGNORE'),
+    (re.compile(r'\bGREATEST\(', re.I), 'MAX('),
+    (re.compile(r'\bLEAST\(', re.I), 'MIN('),
+    (re.compile(r'\bLIKE \?', re.I), "LIKE ? ESCAPE '\\'"),
+    (re.compile(r'\bON DUPLICATE KEY UPDATE\b', re.I), 'ON CONFLICT DO UPDATE SET'),
+    (re.compile(r'\bVALUES\((\w+)\)', re.I), r'excluded.\1'),
+]
+
+
+def translate(query):
+    """Rewrites the MySQL dialect used by the app into SQLite."""
+    for pattern, replacement in _TRANSLATIONS:
+        query = pattern.sub(replacement, query)
+    return query
+
+
+def _as_date(value):
+    return value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+
+
+def _datediff(a, b):
+    if a is None or b is None:
+        return None
+    return (_as_date(a) - _as_date(b)).days
+
+
+def _wrap_error(err):
+    if 'locked' in str(err) or 'busy' in str(err):
+        return mysql.connector.Error(msg=str(err), errno=1205) # Looks like a lock wait timeout to the app
+    return mysql.connector.Error(msg=str(err))
+
+
+class Cursor:
+    def __init__(self, conn, dictionary=False):
+        self._conn = conn
+        self._cursor = conn.db.cursor()
+        self._dictionary = dictionary
+        self.lastrowid = None
+        self.rowcount = -1
+        self.description = None
+
+    def execute(self, query, params=()):
+        self._conn.simulate_latency()
+        try:
+            self._cursor.execute(translate(query), tuple(params or ()))
+        except sqlite3.Error as err:
+            raise _wrap_error(err) from err
+        self.lastrowid = self._cursor.lastrowid
+        self.rowcount = self._cursor.rowcount
+        self.description = self._cursor.description
+
+    def executemany(self, query, seq_params):
+        self._conn.simulate_latency()
+        try:
+            self._cursor.executemany(translate(query), [tuple(params) for params in seq_params])
+        except sqlite3.Error as err:
+            raise _wrap_error(err) from err
+        self.rowcount = self._cursor.rowcount
+        self.description = None
+
+    def _row(self, row):
+        if row is None or not self._dictionary:
+            return row
+        return {column[0]: value for column, value in zip(self.description, row)}
+
+    def fetchone(self):
+        return self._row(self._cursor.fetchone())
+
+    def fetchall(self):
+        return [self._row(row) for row in self._cursor.fetchall()]
+
+    def fetchmany(self, size=1):
+        return [self._row(row) for row in self._cursor.fetchmany(size)]
+
+    def __iter__(self):
+        return (self._row(row) for row in self._cursor)
+
+    def close(self):
+        self._cursor.close()
+
+
+class Connection:
+    dialect = 'sqlite' # For tools that need to tell it apart from MySQL (index_advisor)
+
+    def __init__(self, path, latency=0.0):
+        self.db = sqlite3.connect(path, detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False, timeout=30)
+        self.db.execute('PRAGMA foreign_keys = ON')
+        self.db.create_function('DATEDIFF', 2, _datediff, deterministic=True)
+        self.db.create_function('YEAR', 1, lambda d: _as_date(d).year if d else None, deterministic=True)
+        self.db.create_function('MONTH', 1, lambda d: _as_date(d).month if d else None, deterministic=True)
+        self.db.create_function('CURDATE', 0, lambda: date.today().isoformat())
+        self.latency = latency
+        self._open = True
+
+    def simulate_latency(self):
+        if self.latency:
+            time.sleep(self.latency) # Stand-in for a network round trip to a real server
+
+    def cursor(self, dictionary=False, buffered=None, **kwargs):
+        return Cursor(self, dictionary)
+
+    def start_transaction(self, **kwargs):
+        pass # sqlite3 opens transactions implicitly before writes
+
+    def commit(self):
+        self.db.commit()
+
+    def rollback(self):
+        self.db.rollback()
+
+    def ping(self, reconnect=False, attempts=1, delay=0):
+        if not self._open:
+            raise mysql.connector.Error(msg="Connection is closed")
+
+    def is_connected(self):
+        return self._open
+
+    def close(self):
+        self._open = False
+        self.db.close()
+
+
+def create_schema(path):
+    db = sqlite3.connect(path)
+    db.execute('PRAGMA journal_mode = WAL') # Readers don't block on the writer
+    db.executescript(SCHEMA)
+    db.commit()
+    db.close()
+
+
+def connect_factory(path, latency_ms=0.0):
+    """Returns a mysql.connector.connect replacement bound to the SQLite file at path."""
+    def connect(**config):
+        return Connection(path, latency_ms / 1000.0)
+    return connect
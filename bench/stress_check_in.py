@@ -0,0 +1,116 @@
+"""Concurrency stress check for check-in room assignment.
+
+Fires many parallel check-ins at a small set of free rooms through the Flask app
+and verifies that no room ended up assigned to more than one guest.
+
+Run it against a scratch database (uses the same DB_* settings as the app):
+
+    python bench/stress_check_in.py --rooms 5 --requests 300 --threads 32
+
+Everything it inserts is removed again and the rooms are freed afterwards.
+"""
+import argparse
+import os
+import sys
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as hotel_app  # noqa: E402
+
+
+def query(sql, params=(), commit=False):
+    with hotel_app.app.test_request_context():
+        result = hotel_app.execute_query(sql, params, fetch_all=not commit, commit=commit)
+    return result
+
+
+def run(rooms, requests, threads):
+    # Free now and not booked later either: an open-ended check-in would conflict with the booking
+    room_ids = [row['room_id'] for row in query("""
+        SELECT r.room_id FROM rooms r
+        WHERE r.is_occupied = FALSE
+          AND NOT EXISTS (
+              SELECT 1 FROM reservations v
+              WHERE v.room_id = r.room_id AND v.end_date > %s AND v.status <> 'cancelled'
+          )
+        ORDER BY r.room_id
+        LIMIT %s
+    """, (date.today().isoformat(), rooms))]
+    if len(room_ids) < rooms:
+        sys.exit(f"Need {rooms} free rooms, found {len(room_ids)}")
+    prefix = f"STRESS-{uuid.uuid4().hex[:8]}-"
+    today = date.today().isoformat()
+
+    def check_in(i):
+        client = hotel_app.app.test_client()
+        response = client.post('/customer/check_in', data={
+            'passport_number': f"{prefix}{i}",
+            'last_name': 'Stress',
+            'first_name': f"Guest{i}",
+            'middle_name': '',
+            'city': 'Stresstown',
+            'check_in_date': today,
+            'room_id': str(room_ids[i % len(room_ids)]),
+        })
+        return response.status_code == 302 # Redirect to the guest list means success
+
+    try:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            succeeded = sum(pool.map(check_in, range(requests)))
+
+        placeholders = ', '.join(['%s'] * len(room_ids))
+        assignments = query(f"""
+            SELECT assigned_room_id, COUNT(*) as guests
+            FROM customers
+            WHERE passport_number LIKE %s AND check_out_date IS NULL AND assigned_room_id IN ({placeholders})
+            GROUP BY assigned_room_id
+        """, (prefix + '%', *room_ids))
+        double_booked = {row['assigned_room_id']: row['guests'] for row in assignments if row['guests'] > 1}
+
+        print(f"{requests} check-ins at {len(room_ids)} rooms with {threads} threads: {succeeded} succeeded")
+        if double_booked:
+            print(f"FAIL: double-booked rooms {double_booked}")
+            return 1
+        if succeeded != len(room_ids):
+            print(f"FAIL: expected exactly {len(room_ids)} successful check-ins")
+            return 1
+        print("OK: every room was assigned exactly once")
+        return 0
+    finally:
+        cleanup(prefix, room_ids)
+
+
+def cleanup(prefix, room_ids):
+    """Removes the stress guests and their stays and frees the rooms, all or nothing."""
+    placeholders = ', '.join(['%s'] * len(room_ids))
+
+    def work(cursor):
+        # Stays first: reservations.customer_id references customers
+        cursor.execute("""
+            DELETE FROM reservations
+            WHERE customer_id IN (SELECT customer_id FROM customers WHERE passport_number LIKE %s)
+        """, (prefix + '%',))
+        cursor.execute("DELETE FROM customers WHERE passport_number LIKE %s", (prefix + '%',))
+        cursor.execute(f"UPDATE rooms SET is_occupied = FALSE WHERE room_id IN ({placeholders})", tuple(room_ids))
+
+    with hotel_app.app.test_request_context():
+        conn = hotel_app.get_db_connection()
+        if conn is None:
+            sys.exit("Cleanup failed: no database connection")
+        hotel_app.run_in_transaction(conn, work, name='stress_cleanup')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rooms', type=int, default=5, help="number of free rooms to contend for")
+    parser.add_argument('--requests', type=int, default=300, help="total check-in attempts")
+    parser.add_argument('--threads', type=int, default=32, help="concurrent clients")
+    args = parser.parse_args()
+    sys.exit(run(args.rooms, args.requests, args.threads))
+
+
+if __name__ == '__main__':
+    main()
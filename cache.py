@@ -0,0 +1,142 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """A thread-safe LRU cache whose entries also expire after a fixed TTL.
+
+    Values are loaded on demand with get_or_load(). Invalidation bumps a
+    generation counter so a load that raced with a write is not stored.
+    With maxweight, the total weigh(value) of the entries is bounded too
+    (e.g. weigh=len for rendered pages), evicting least recently used first.
+    """
+
+    def __init__(self, maxsize=128, ttl=300, maxweight=None, weigh=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.maxweight = maxweight
+        self._weigh = weigh or (lambda value: 0)
+        self.weight = 0
+        self._data = OrderedDict() # key -> (value, expires_at, weight), least recently used first
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """Returns the cached value for key, or default if missing or expired."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[1] <= time.monotonic():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def get_or_load(self, key, loader):
+        """Returns the cached value for key, calling loader() on a miss. None results are not cached."""
+        missing = object()
+        value = self.get(key, missing)
+        if value is not missing:
+            return value
+        with self._lock:
+            generation = self._generation
+        value = loader()
+        if value is not None:
+            with self._lock:
+                if self._generation == generation:
+                    self._store(key, value)
+        return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._store(key, value)
+
+    def update(self, key, func):
+        """Write-through: replaces a cached value with func(value). Missing keys are left missing."""
+        with self._lock:
+            self._generation += 1
+            entry = self._data.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                value = func(entry[0])
+                weight = self._weigh(value)
+                self._data[key] = (value, entry[1], weight)
+                self.weight += weight - entry[2]
+
+    def invalidate(self, *keys):
+        with self._lock:
+            self._generation += 1
+            for key in keys:
+                if key in self._data:
+                    self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._data.clear()
+            self.weight = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'weight': self.weight,
+                'maxweight': self.maxweight,
+                'ttl': self.ttl,
+            }
+
+    def _store(self, key, value):
+        if key in self._data:
+            self._remove(key)
+        weight = self._weigh(value)
+        if self.maxweight is not None and weight > self.maxweight:
+            return # Would evict everything else and still not fit
+        self._data[key] = (value, time.monotonic() + self.ttl, weight)
+        self.weight += weight
+        while len(self._data) > self.maxsize or (self.maxweight is not None and self.weight > self.maxweight):
+            _, (_, _, evicted_weight) = self._data.popitem(last=False)
+            self.weight -= evicted_weight
+            self.evictions += 1
+
+    def _remove(self, key):
+        self.weight -= self._data.pop(key)[2]
+
+
+class DataVersions:
+    """Change counters per data domain (e.g. 'stays', 'schedule'), bumped by writes.
+
+    A cache key that includes stamp() of the domains a value was built from goes
+    stale by itself when any of them changes, so nothing has to be invalidated.
+    """
+
+    def __init__(self, *domains):
+        started = time.time()
+        self._lock = threading.Lock()
+        self._versions = {domain: 0 for domain in domains}
+        self._changed_at = {domain: started for domain in domains}
+
+    def bump(self, *domains):
+        with self._lock:
+            for domain in domains:
+                self._versions[domain] += 1
+                self._changed_at[domain] = time.time()
+
+    def stamp(self, *domains):
+        with self._lock:
+            return tuple(self._versions[domain] for domain in domains)
+
+    def last_modified(self, *domains):
+        """Wall-clock time of the latest change to any of the domains (process start if none)."""
+        with self._lock:
+            return max(self._changed_at[domain] for domain in domains)
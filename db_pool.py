@@ -0,0 +1,137 @@
+import threading
+import time
+
+import mysql.connector
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection could be checked out within the pool timeout."""
+
+
+class ConnectionPool:
+    """A bounded pool of MySQL connections with health checks and usage metrics."""
+
+    def __init__(self, config, size=10, timeout=5.0, recycle=3600, ping_interval=30, connect=None):
+        self.config = config
+        self.size = size
+        self.timeout = timeout
+        self.recycle = recycle # Seconds before a connection is replaced regardless of health
+        self.ping_interval = ping_interval # Idle seconds before a connection is pinged on checkout
+        self._connect = connect or mysql.connector.connect
+        self._idle = [] # (conn, created_at, last_used_at), most recently used last
+        self._created_at = {} # id(conn) -> creation time, for every open connection
+        self._open = 0
+        self._cond = threading.Condition()
+        self._stats = {
+            'checkouts': 0,
+            'connects': 0,
+            'reconnects': 0,
+            'discarded': 0,
+            'timeouts': 0,
+            'wait_time_total': 0.0,
+            'wait_time_max': 0.0,
+        }
+
+    def acquire(self):
+        """Checks out a healthy connection, opening a new one if the pool is not full."""
+        started = time.monotonic()
+        deadline = started + self.timeout
+        with self._cond:
+            while not self._idle and self._open >= self.size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolTimeout(f"No database connection available after {self.timeout}s (pool size {self.size})")
+                self._cond.wait(remaining)
+            if self._idle:
+                conn, created_at, last_used_at = self._idle.pop()
+            else:
+                conn, created_at, last_used_at = None, None, None
+                self._open += 1 # Reserve the slot before connecting outside the lock
+            waited = time.monotonic() - started
+            self._stats['checkouts'] += 1
+            self._stats['wait_time_total'] += waited
+            self._stats['wait_time_max'] = max(self._stats['wait_time_max'], waited)
+
+        try:
+            if conn is None:
+                return self._new_connection()
+            return self._checked(conn, created_at, last_used_at)
+        except Exception:
+            self._release_slot()
+            raise
+
+    def release(self, conn):
+        """Returns a connection to the pool, discarding it if it is no longer usable."""
+        created_at = self._created_at.get(id(conn))
+        try:
+            # End whatever transaction the request left open so the next user gets a fresh snapshot
+            conn.rollback()
+        except mysql.connector.Error:
+            self._discard(conn)
+            return
+        if created_at is None or time.monotonic() - created_at > self.recycle:
+            self._discard(conn)
+            return
+        with self._cond:
+            self._idle.append((conn, created_at, time.monotonic()))
+            self._cond.notify()
+
+    def stats(self):
+        """Returns a snapshot of pool size and checkout metrics."""
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update(size=self.size, open=self._open, idle=len(self._idle), in_use=self._open - len(self._idle))
+        stats['wait_time_avg'] = stats['wait_time_total'] / stats['checkouts'] if stats['checkouts'] else 0.0
+        return stats
+
+    def close_all(self):
+        """Closes every idle connection; connections in use are closed when released."""
+        with self._cond:
+            idle, self._idle = self._idle, []
+        for conn, _, _ in idle:
+            self._discard(conn)
+
+    def _new_connection(self):
+        conn = self._connect(**self.config)
+        self._created_at[id(conn)] = time.monotonic()
+        with self._cond:
+            self._stats['connects'] += 1
+        return conn
+
+    def _checked(self, conn, created_at, last_used_at):
+        now = time.monotonic()
+        if now - created_at > self.recycle:
+            self._close_quietly(conn)
+            self._created_at.pop(id(conn), None)
+            return self._new_connection()
+        if now - last_used_at > self.ping_interval:
+            try:
+                conn.ping(reconnect=True, attempts=1, delay=0)
+            except mysql.connector.Error:
+                # Stale connection (server restart, wait_timeout) - replace it
+                self._close_quietly(conn)
+                self._created_at.pop(id(conn), None)
+                with self._cond:
+                    self._stats['reconnects'] += 1
+                return self._new_connection()
+        return conn
+
+    def _discard(self, conn):
+        self._close_quietly(conn)
+        self._created_at.pop(id(conn), None)
+        with self._cond:
+            self._stats['discarded'] += 1
+        self._release_slot()
+
+    def _release_slot(self):
+        with self._cond:
+            self._open -= 1
+            self._cond.notify()
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
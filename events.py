@@ -0,0 +1,60 @@
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+
+class EventHub:
+    """In-process publish/subscribe with a version counter and a bounded history.
+
+    Every publish() gets the next version. Readers ask for everything after the
+    version they already have, optionally blocking until there is something new.
+    A reader that fell behind the history (or comes from before a restart) gets
+    None and has to reload its snapshot.
+    """
+
+    def __init__(self, history=1000):
+        self._events = deque(maxlen=history) # (version, payload), oldest first
+        self._cond = threading.Condition()
+        self.version = 0
+        self.subscribers = 0
+
+    def publish(self, payload):
+        """Appends payload as the next version and wakes every waiting reader. Returns the version."""
+        with self._cond:
+            self.version += 1
+            self._events.append((self.version, payload))
+            self._cond.notify_all()
+            return self.version
+
+    def since(self, version):
+        """Returns [(version, payload), ...] newer than version, or None if some were dropped."""
+        with self._cond:
+            return self._since(version)
+
+    def wait(self, version, timeout):
+        """Like since(), but blocks up to timeout seconds while there is nothing newer."""
+        with self._cond:
+            self._cond.wait_for(lambda: self.version != version, timeout)
+            return self._since(version)
+
+    @contextmanager
+    def subscribe(self):
+        """Counts an open stream for stats() while the block runs."""
+        with self._cond:
+            self.subscribers += 1
+        try:
+            yield self
+        finally:
+            with self._cond:
+                self.subscribers -= 1
+
+    def _since(self, version):
+        if version == self.version:
+            return []
+        if version > self.version or not self._events or self._events[0][0] > version + 1:
+            return None
+        return [event for event in self._events if event[0] > version]
+
+    def stats(self):
+        with self._cond:
+            return {'version': self.version, 'history': len(self._events), 'subscribers': self.subscribers}
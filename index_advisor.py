@@ -0,0 +1,287 @@
+import ast
+import os
+import re
+
+APP_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py')
+SQL_START = re.compile(r'^\s*(SELECT|INSERT|UPDATE|DELETE|WITH)\s') # The app writes SQL keywords in upper case
+_TABLE_ALIAS = re.compile(r'\b(?:FROM|JOIN|UPDATE|INTO)\s+(\w+)(?:\s+(?:AS\s+)?(?!ON\b|WHERE\b|JOIN\b|LEFT\b|SET\b|GROUP\b|ORDER\b)(\w+))?')
+
+# Sample literals for %s placeholders, picked from the column the placeholder is compared with
+_PLACEHOLDER = re.compile(r'%s')
+_TEXT_COLUMNS = re.compile(r'passport|name|city|guest|day_of_week|status|fingerprint|hash|html', re.I)
+
+# Problems that are there by design, as (function or query constant, table, problem) -> why.
+# They are listed as expected but not counted as findings, so a failing run means a new one.
+EXPECTED_PROBLEMS = {
+    ('hotel_report', 'revenue_daily', 'full table scan'): "income by type and month totals the whole rollup (a row per day and room type)",
+    ('hotel_report', 'revenue_daily', 'temporary table'): "income by month groups the rollup by YEAR() and MONTH()",
+    ('REVENUE_ROLLUP_QUERY', 'customers', 'temporary table'): "groups one day's check-outs by room type",
+}
+
+
+class Statement:
+    """One SQL statement found in the source, with where it came from."""
+
+    def __init__(self, sql, path, lineno, function, params=None):
+        self.sql = sql
+        self.path = path
+        self.lineno = lineno
+        self.function = function
+        self.params = params # Real parameters of a runtime sample; None to use sample literals
+
+    @property
+    def location(self):
+        return f"{os.path.basename(self.path)}:{self.lineno} ({self.function})"
+
+
+def extract_statements(path=APP_SOURCE):
+    """Returns (statements, skipped) for the SQL string literals in a Python file.
+
+    f-strings are rendered when every interpolated name is a module-level string constant
+    (defined there or imported from a sibling module) or an IN-list of placeholders; the
+    rest (built at runtime) are returned in skipped. A constant only ever used as the start
+    of a longer query (QUERY + " WHERE ...") is checked with each suffix, where it's used.
+    """
+    with open(path) as f:
+        tree = ast.parse(f.read(), filename=path)
+    constants = _module_constants(tree, os.path.dirname(os.path.abspath(path)))
+    prefixes = _prefix_constants(tree, constants)
+
+    statements, skipped, seen = [], [], set()
+
+    def add(text, lineno, function):
+        if isinstance(text, str) and SQL_START.match(text):
+            sql = ' '.join(text.split())
+            if sql not in seen:
+                seen.add(sql)
+                statements.append(Statement(sql, path, lineno, function))
+
+    def visit(node, function):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            function = node.name
+        elif function == '<module>' and isinstance(node, ast.Assign) and isinstance(node.targets[0], ast.Name):
+            function = node.targets[0].id # A module-level query constant
+            if function in prefixes:
+                return # A fragment: checked where it's completed
+        if _is_prefixed(node, prefixes):
+            suffix = _literal(node.right, constants)
+            if suffix is None:
+                skipped.append(Statement(' '.join(constants[node.left.id].split()) + ' {...}', path, node.lineno, function))
+            else:
+                add(constants[node.left.id] + suffix, node.lineno, function)
+            return
+        if isinstance(node, (ast.Constant, ast.JoinedStr)):
+            text = node.value if isinstance(node, ast.Constant) else _render(node, constants)
+            if isinstance(node, ast.JoinedStr) and text is None:
+                if SQL_START.match(_fragment(node)):
+                    skipped.append(Statement(_fragment(node), path, node.lineno, function))
+                return
+            add(text, node.lineno, function)
+            return
+        for child in ast.iter_child_nodes(node):
+            visit(child, function)
+
+    visit(tree, '<module>')
+    return statements, skipped
+
+
+def _is_prefixed(node, prefixes):
+    return (isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add)
+            and isinstance(node.left, ast.Name) and node.left.id in prefixes)
+
+
+def _prefix_constants(tree, constants):
+    """Names of the SQL constants that are only ever used as the left side of a + (incomplete statements)."""
+    prefix_nodes = {id(node.left) for node in ast.walk(tree)
+                    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add) and isinstance(node.left, ast.Name)}
+    as_prefix, other_uses = set(), set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load) and node.id in constants:
+            (as_prefix if id(node) in prefix_nodes else other_uses).add(node.id)
+    return {name for name in as_prefix - other_uses if SQL_START.match(constants[name])}
+
+
+def _module_constants(tree, directory):
+    """String constants assigned at module level, including those imported from sibling modules."""
+    constants = {}
+    for node in tree.body:
+        if isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+            source = os.path.join(directory, node.module.replace('.', os.sep) + '.py')
+            if os.path.exists(source):
+                with open(source) as f:
+                    imported = _module_constants(ast.parse(f.read(), filename=source), os.path.dirname(source))
+                for alias in node.names:
+                    if alias.name in imported:
+                        constants[alias.asname or alias.name] = imported[alias.name]
+        elif isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            value = _literal(node.value, constants)
+            if value is not None:
+                constants[node.targets[0].id] = value
+    return constants
+
+
+def _literal(node, constants):
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    if isinstance(node, ast.JoinedStr):
+        return _render(node, constants)
+    return None
+
+
+def _render(node, constants):
+    parts = []
+    for value in node.values:
+        if isinstance(value, ast.Constant):
+            parts.append(value.value)
+        elif isinstance(value.value, ast.Name) and value.value.id in constants:
+            parts.append(constants[value.value.id])
+        elif isinstance(value.value, ast.Name) and 'placeholders' in value.value.id:
+            parts.append('%s, %s')
+        else:
+            return None
+    return ''.join(parts)
+
+
+def _fragment(node):
+    """The literal text of an f-string, with {...} for the interpolated parts."""
+    return ' '.join(''.join(value.value if isinstance(value, ast.Constant) else '{...}' for value in node.values).split())
+
+
+def with_sample_values(sql):
+    """Replaces each %s with a literal of a plausible type, so the statement can be EXPLAINed."""
+    def sample(match):
+        before = sql[max(0, match.start() - 60):match.start()]
+        if re.search(r'\bLIMIT\s*$', before, re.I):
+            return '50'
+        words = re.findall(r'[A-Za-z_][A-Za-z_0-9.]*', before)
+        column = words[-1] if words else ''
+        if column.upper() in ('IN', 'VALUES', 'LIKE', 'AND', 'OR') and len(words) > 1:
+            column = words[-2]
+        if 'date' in column.lower() or 'revenue_date' in before[-30:]:
+            return 'CURDATE()'
+        if _TEXT_COLUMNS.search(column):
+            return "'x'"
+        return '1'
+    return _PLACEHOLDER.sub(sample, sql)
+
+
+def explain(conn, statement, dialect='mysql'):
+    """Returns [(table, problem, rows or None), ...] for one statement's query plan.
+
+    Plans name tables by alias; they are resolved from the statement. MySQL estimates
+    rows, for SQLite they are left to the caller.
+    """
+    cursor = conn.cursor(dictionary=True) if dialect == 'mysql' else conn.cursor()
+    if statement.params is None:
+        sql, params = with_sample_values(statement.sql), ()
+    else:
+        sql, params = statement.sql, statement.params
+    aliases = {alias or table: table for table, alias in _TABLE_ALIAS.findall(statement.sql)}
+    try:
+        if dialect == 'mysql':
+            cursor.execute(f"EXPLAIN {sql}", params)
+            problems = _mysql_problems(cursor.fetchall())
+        else:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            problems = _sqlite_problems(cursor.fetchall())
+        return [(aliases.get(table, table), problem, rows) for table, problem, rows in problems]
+    finally:
+        cursor.close()
+
+
+def _mysql_problems(plan):
+    problems = []
+    for row in plan:
+        extra = row.get('Extra') or ''
+        if row.get('type') == 'ALL':
+            problems.append((row.get('table'), 'full table scan', row.get('rows')))
+        if 'Using filesort' in extra:
+            problems.append((row.get('table'), 'filesort', row.get('rows')))
+        if 'Using temporary' in extra:
+            problems.append((row.get('table'), 'temporary table', row.get('rows')))
+    return problems
+
+
+def _sqlite_problems(plan):
+    """Sorts are charged to the first table in the plan, the one driving the loop."""
+    problems, driving = [], None
+    for row in plan:
+        detail = row[-1]
+        match = re.match(r'(SCAN|SEARCH) (?:TABLE )?(\w+)', detail)
+        if match:
+            driving = driving or match.group(2)
+            if match.group(1) == 'SCAN' and 'INDEX' not in detail:
+                problems.append((match.group(2), 'full table scan', None))
+        elif 'TEMP B-TREE FOR ORDER BY' in detail or 'TEMP B-TREE FOR RIGHT PART OF ORDER BY' in detail:
+            problems.append((driving, 'filesort', None))
+        elif 'TEMP B-TREE' in detail:
+            problems.append((driving, 'temporary table', None))
+    return problems
+
+
+def table_sizes(conn):
+    """Rows per table of the SQLite stand-in, whose plans carry no row estimates."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'")
+    sizes = {}
+    for (table,) in cursor.fetchall():
+        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        sizes[table] = cursor.fetchone()[0]
+    cursor.close()
+    return sizes
+
+
+def advise(conn, path=APP_SOURCE, dialect='mysql', min_rows=1000, log=print, expected=EXPECTED_PROBLEMS, samples=()):
+    """EXPLAINs every SQL statement in path and logs full scans and filesorts.
+
+    Statements built at runtime are checked through samples, [(function, sql, params), ...]
+    rendered by the function that builds them; those of functions without samples count
+    as findings, since nothing vouches for them. Problems on tables with fewer than
+    min_rows rows (room types, say) are not reported, and those in expected are listed but
+    not counted. Returns the findings as [(statement, table, problem, rows), ...].
+    """
+    statements, skipped = extract_statements(path)
+    lines = {statement.function: statement.lineno for statement in skipped}
+    seen = {statement.sql for statement in statements}
+    for function, sql, params in samples:
+        sql = ' '.join(sql.split())
+        if sql not in seen:
+            seen.add(sql)
+            statements.append(Statement(sql, path, lines.get(function, 0), function, tuple(params)))
+    sampled = {function for function, _, _ in samples}
+    skipped = [statement for statement in skipped if statement.function not in sampled]
+    sizes = table_sizes(conn) if dialect == 'sqlite' else {}
+    findings, allowed, errors = [], [], []
+    for statement in statements:
+        try:
+            problems = explain(conn, statement, dialect)
+        except Exception as err: # Driver-specific errors; report and keep going
+            errors.append((statement, err))
+            continue
+        for table, problem, rows in problems:
+            if rows is None:
+                rows = sizes.get(table)
+            if rows is not None and rows < min_rows:
+                continue
+            reason = expected.get((statement.function, table, problem))
+            if reason:
+                allowed.append((statement, table, problem, reason))
+            else:
+                findings.append((statement, table, problem, rows))
+    conn.rollback()
+
+    for statement, table, problem, rows in findings:
+        size = f", ~{rows} rows" if rows is not None else ''
+        log(f"{statement.location}: {problem}{' of ' + table if table else ''}{size}")
+        log(f"    {statement.sql[:160]}")
+    for statement, table, problem, reason in allowed:
+        log(f"{statement.location}: expected {problem} of {table}: {reason}")
+    for statement, err in errors:
+        log(f"{statement.location}: could not EXPLAIN: {err}")
+    for statement in skipped:
+        log(f"{statement.location}: built at runtime, no sample to check: {statement.sql[:100]}")
+    log(f"{len(statements)} statements checked: {len(findings)} findings, {len(allowed)} expected, "
+        f"{len(errors)} errors, {len(skipped)} not checked")
+    # Statements that couldn't be checked fail the run too: nothing vouches for their plans
+    return (findings + [(statement, None, 'could not EXPLAIN', None) for statement, _ in errors]
+            + [(statement, None, 'not checked', None) for statement in skipped])
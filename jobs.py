@@ -0,0 +1,153 @@
+import json
+import random
+import threading
+from datetime import datetime, timedelta
+
+JOB_STATUSES = ('queued', 'running', 'done', 'failed')
+
+
+class JobQueue:
+    """Durable background jobs kept in the `jobs` table.
+
+    enqueue() runs inside the caller's transaction, so a job exists exactly when the
+    write that needs it commits. Workers claim due jobs with FOR UPDATE SKIP LOCKED,
+    so several can share the table, and each claim is a lease: a job whose worker
+    died is picked up again once the lease runs out. A handler runs in the same
+    transaction that marks its job done, and must be safe to run more than once.
+    Failed jobs are retried with jittered exponential backoff up to max_attempts.
+    """
+
+    def __init__(self, max_attempts=5, backoff=5.0, max_backoff=3600.0, lease=300.0):
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.lease = lease
+        self.handlers = {} # kind -> (work(cursor, payload), after(payload) or None)
+
+    def handler(self, kind, after=None):
+        """Decorator registering work(cursor, payload) for a job kind; after(payload) runs once it commits."""
+        def decorator(work):
+            self.handlers[kind] = (work, after)
+            return work
+        return decorator
+
+    def enqueue(self, cursor, kind, payload, delay=0.0):
+        if kind not in self.handlers:
+            raise ValueError(f"No handler for job kind {kind!r}")
+        now = datetime.now()
+        cursor.execute("""
+            INSERT INTO jobs (kind, payload, status, attempts, max_attempts, run_at, created_at)
+            VALUES (%s, %s, 'queued', 0, %s, %s, %s)
+        """, (kind, json.dumps(payload), self.max_attempts, now + timedelta(seconds=delay), now))
+
+    def claim(self, cursor, worker_id, limit=10):
+        """Leases up to limit due jobs to worker_id. Returns them as dicts with decoded payloads."""
+        now = datetime.now()
+        # Jobs whose worker died mid-run go back in the queue; that run counted as an attempt
+        cursor.execute("""
+            UPDATE jobs SET status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'queued' END,
+                            locked_by = NULL, last_error = 'lease expired'
+            WHERE status = 'running' AND locked_until < %s
+        """, (now,))
+        cursor.execute("""
+            SELECT job_id, kind, payload, attempts, max_attempts, run_at
+            FROM jobs
+            WHERE status = 'queued' AND run_at <= %s
+            ORDER BY run_at
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        """, (now, limit))
+        jobs = cursor.fetchall()
+        if not jobs:
+            return []
+        placeholders = ', '.join(['%s'] * len(jobs))
+        cursor.execute(f"""
+            UPDATE jobs SET status = 'running', attempts = attempts + 1, locked_by = %s, locked_until = %s, started_at = %s
+            WHERE job_id IN ({placeholders})
+        """, (worker_id, now + timedelta(seconds=self.lease), now, *[job['job_id'] for job in jobs]))
+        for job in jobs:
+            job['payload'] = json.loads(job['payload'])
+            job['attempts'] += 1
+        return jobs
+
+    def run(self, cursor, job):
+        """Runs the job's handler and marks it done, in the caller's transaction."""
+        work, _ = self.handlers[job['kind']]
+        work(cursor, job['payload'])
+        cursor.execute("""
+            UPDATE jobs SET status = 'done', locked_by = NULL, finished_at = %s, last_error = NULL
+            WHERE job_id = %s
+        """, (datetime.now(), job['job_id']))
+
+    def after(self, job):
+        _, after = self.handlers[job['kind']]
+        if after is not None:
+            after(job['payload'])
+
+    def retry_or_fail(self, cursor, job, error):
+        """Schedules the next attempt, or gives up after max_attempts. Returns 'retry' or 'failed'."""
+        message = f"{type(error).__name__}: {error}"[:2000]
+        if job['attempts'] >= job['max_attempts']:
+            cursor.execute("""
+                UPDATE jobs SET status = 'failed', locked_by = NULL, finished_at = %s, last_error = %s
+                WHERE job_id = %s
+            """, (datetime.now(), message, job['job_id']))
+            return 'failed'
+        cursor.execute("""
+            UPDATE jobs SET status = 'queued', locked_by = NULL, run_at = %s, last_error = %s
+            WHERE job_id = %s
+        """, (datetime.now() + timedelta(seconds=self.backoff_for(job['attempts'])), message, job['job_id']))
+        return 'retry'
+
+    def backoff_for(self, attempts):
+        """Seconds before retry number `attempts`: doubling from backoff, capped, with +-50% jitter."""
+        delay = min(self.backoff * (2 ** (attempts - 1)), self.max_backoff)
+        return delay * (0.5 + random.random())
+
+    def purge(self, cursor, older_than):
+        """Deletes finished jobs (done, not failed) older than the given age."""
+        cursor.execute("DELETE FROM jobs WHERE status = 'done' AND finished_at < %s", (datetime.now() - older_than,))
+        return cursor.rowcount
+
+    def stats(self, cursor):
+        """Returns {'depth': {status: jobs}, 'oldest_due_seconds': age of the oldest due queued job}."""
+        cursor.execute("SELECT status, COUNT(*) AS jobs FROM jobs GROUP BY status")
+        depth = dict.fromkeys(JOB_STATUSES, 0)
+        depth.update({row['status']: int(row['jobs']) for row in cursor.fetchall()})
+        cursor.execute("SELECT MIN(run_at) AS oldest FROM jobs WHERE status = 'queued' AND run_at <= %s", (datetime.now(),))
+        oldest = cursor.fetchone()['oldest']
+        if isinstance(oldest, str): # The SQLite stand-in returns text
+            oldest = datetime.fromisoformat(oldest)
+        return {'depth': depth, 'oldest_due_seconds': (datetime.now() - oldest).total_seconds() if oldest else 0.0}
+
+
+class JobWorker(threading.Thread):
+    """Background thread calling run_batch() until it reports no work, then sleeping.
+
+    wake() cuts the sleep short, so jobs enqueued by this process start right after
+    their transaction commits; poll_interval picks up everything else.
+    """
+
+    def __init__(self, run_batch, poll_interval=2.0, name='job-worker'):
+        super().__init__(name=name, daemon=True)
+        self.run_batch = run_batch
+        self.poll_interval = poll_interval
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+
+    def wake(self):
+        self._wake.set()
+
+    def stop(self):
+        self._stop_event.set()
+        self._wake.set()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                while self.run_batch() and not self._stop_event.is_set():
+                    pass
+            except Exception as err: # Keep the worker alive; the jobs' leases run out and they're retried
+                print(f"Job worker error: {err}")
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
@@ -0,0 +1,230 @@
+import hashlib
+import logging
+import re
+import threading
+import time
+
+# Latency buckets in seconds (Prometheus conventions)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+slow_query_log = logging.getLogger('hotel.slow_queries')
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(query):
+    """Normalizes SQL so queries differing only in literals/parameters share one key."""
+    text = query.replace('%s', '?')
+    text = _STRING_LITERAL.sub('?', text)
+    text = _NUMBER_LITERAL.sub('?', text)
+    text = _WHITESPACE.sub(' ', text).strip()
+    text = _PLACEHOLDER_LIST.sub('(?+)', text) # IN lists of any length
+    return text
+
+
+def fingerprint_id(text):
+    return hashlib.sha1(text.encode()).hexdigest()[:12]
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+class MetricsRegistry:
+    """Request, query, transaction, connection-acquire and background job timings for the /metrics endpoint."""
+
+    def __init__(self, slow_query_ms=None, buckets=DEFAULT_BUCKETS):
+        self.slow_query_ms = slow_query_ms
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self.requests = {} # (route, method, status) -> Histogram
+        self.queries = {} # fingerprint -> Histogram
+        self.query_rows = {} # fingerprint -> rows returned or affected
+        self.query_errors = {} # fingerprint -> failed executions
+        self.transactions = {} # (name, outcome) -> Histogram
+        self.acquire = Histogram(buckets)
+        self.job_waits = {} # (kind,) -> Histogram of enqueue-to-start delay
+        self.job_runs = {} # (kind, outcome) -> Histogram
+        self.query_listeners = [] # Called as listener(fingerprint, seconds, rows, failed) for every statement
+
+    def observe_request(self, route, method, status, seconds):
+        with self._lock:
+            self._histogram(self.requests, (route, method, str(status))).observe(seconds)
+
+    def observe_query(self, fingerprint_text, seconds, rows, failed=False):
+        with self._lock:
+            self._histogram(self.queries, fingerprint_text).observe(seconds)
+            self.query_rows[fingerprint_text] = self.query_rows.get(fingerprint_text, 0) + max(rows, 0)
+            if failed:
+                self.query_errors[fingerprint_text] = self.query_errors.get(fingerprint_text, 0) + 1
+        for listener in self.query_listeners:
+            listener(fingerprint_text, seconds, rows, failed)
+        if self.slow_query_ms is not None and seconds * 1000 >= self.slow_query_ms:
+            slow_query_log.warning("Slow query (%.1f ms, %d rows) [%s]: %s",
+                                   seconds * 1000, rows, fingerprint_id(fingerprint_text), fingerprint_text)
+
+    def observe_transaction(self, name, outcome, seconds):
+        with self._lock:
+            self._histogram(self.transactions, (name, outcome)).observe(seconds)
+
+    def observe_acquire(self, seconds):
+        with self._lock:
+            self.acquire.observe(seconds)
+
+    def observe_job(self, kind, outcome, wait_seconds, run_seconds):
+        with self._lock:
+            self._histogram(self.job_waits, (kind,)).observe(wait_seconds)
+            self._histogram(self.job_runs, (kind, outcome)).observe(run_seconds)
+
+    def render(self, extra_gauges=()):
+        """Prometheus text exposition format. extra_gauges: iterable of (name, help, {labels tuple: value})."""
+        lines = []
+        with self._lock:
+            self._render_histograms(lines, 'hotel_request_duration_seconds', "HTTP request latency by route.",
+                                    ('route', 'method', 'status'), self.requests)
+            self._render_histograms(lines, 'hotel_query_duration_seconds', "SQL statement latency (execute and fetch) by query fingerprint.",
+                                    ('query_id', 'query'), {(fingerprint_id(fp), fp[:200]): h for fp, h in self.queries.items()})
+            self._render_counter(lines, 'hotel_query_rows_total', "Rows returned or affected by query fingerprint.",
+                                 ('query_id',), {(fingerprint_id(fp),): n for fp, n in self.query_rows.items()})
+            self._render_counter(lines, 'hotel_query_errors_total', "Failed SQL statements by query fingerprint.",
+                                 ('query_id',), {(fingerprint_id(fp),): n for fp, n in self.query_errors.items()})
+            self._render_histograms(lines, 'hotel_transaction_duration_seconds', "Explicit transaction latency by name and outcome.",
+                                    ('transaction', 'outcome'), self.transactions)
+            self._render_histograms(lines, 'hotel_db_connection_acquire_seconds', "Time to check a connection out of the pool.",
+                                    (), {(): self.acquire})
+            self._render_histograms(lines, 'hotel_job_wait_seconds', "Background job delay from due time to start, by kind.",
+                                    ('kind',), self.job_waits)
+            self._render_histograms(lines, 'hotel_job_duration_seconds', "Background job run time by kind and outcome.",
+                                    ('kind', 'outcome'), self.job_runs)
+        for name, help_text, values in extra_gauges:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            for labels, value in values.items():
+                lines.append(f"{name}{_labels(labels)} {value}")
+        return '\n'.join(lines) + '\n'
+
+    def _histogram(self, table, key):
+        histogram = table.get(key)
+        if histogram is None:
+            histogram = table[key] = Histogram(self.buckets)
+        return histogram
+
+    @staticmethod
+    def _render_histograms(lines, name, help_text, label_names, histograms):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        for label_values, histogram in histograms.items():
+            labels = list(zip(label_names, label_values))
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                lines.append(f"{name}_bucket{_labels(labels + [('le', repr(bound))])} {count}")
+            lines.append(f"{name}_bucket{_labels(labels + [('le', '+Inf')])} {histogram.count}")
+            lines.append(f"{name}_sum{_labels(labels)} {histogram.sum}")
+            lines.append(f"{name}_count{_labels(labels)} {histogram.count}")
+
+    @staticmethod
+    def _render_counter(lines, name, help_text, label_names, values):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        for label_values, value in values.items():
+            lines.append(f"{name}{_labels(list(zip(label_names, label_values)))} {value}")
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', ' ')
+
+
+def _labels(pairs):
+    pairs = list(pairs)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in pairs) + '}'
+
+
+class InstrumentedCursor:
+    """Wraps a DB-API cursor and reports each statement's duration and row count.
+
+    A statement's time includes its fetches, so it is recorded when the next statement
+    starts or the cursor is closed.
+    """
+
+    def __init__(self, cursor, registry):
+        self._cursor = cursor
+        self._registry = registry
+        self._pending = None # [fingerprint, seconds, rows, failed]
+
+    def execute(self, query, params=()):
+        return self._timed(query, self._cursor.execute, query, params)
+
+    def executemany(self, query, seq_params):
+        return self._timed(query, self._cursor.executemany, query, seq_params)
+
+    def fetchone(self):
+        row = self._fetch(self._cursor.fetchone)
+        self._add_rows(1 if row is not None else 0)
+        return row
+
+    def fetchall(self):
+        rows = self._fetch(self._cursor.fetchall)
+        self._add_rows(len(rows))
+        return rows
+
+    def fetchmany(self, size=1):
+        rows = self._fetch(self._cursor.fetchmany, size)
+        self._add_rows(len(rows))
+        return rows
+
+    def close(self):
+        self._finish()
+        return self._cursor.close()
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def _timed(self, query, method, *args):
+        self._finish()
+        self._pending = [fingerprint(query), 0.0, 0, False]
+        started = time.perf_counter()
+        try:
+            return method(*args)
+        except Exception:
+            self._pending[3] = True
+            raise
+        finally:
+            self._pending[1] += time.perf_counter() - started
+            if self._cursor.description is None and not self._pending[3]: # INSERT/UPDATE/DELETE
+                self._pending[2] = max(self._cursor.rowcount, 0)
+
+    def _fetch(self, method, *args):
+        started = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            if self._pending is not None:
+                self._pending[1] += time.perf_counter() - started
+
+    def _add_rows(self, count):
+        if self._pending is not None:
+            self._pending[2] += count
+
+    def _finish(self):
+        if self._pending is None:
+            return
+        fingerprint_text, seconds, rows, failed = self._pending
+        self._pending = None
+        self._registry.observe_query(fingerprint_text, seconds, rows, failed)
@@ -0,0 +1,154 @@
+import hashlib
+import os
+import re
+
+import mysql.connector
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+MIGRATION_FILE = re.compile(r'^(\d{4})_(\w+)\.sql$')
+
+# Safe to skip when re-applying a migration over a schema that already has its effect,
+# e.g. one applied by hand before schema_migrations existed, or a run that died halfway
+# (MySQL DDL commits implicitly, so a migration can't be rolled back as a whole).
+ALREADY_APPLIED_ERRNOS = {
+    1050, # ER_TABLE_EXISTS_ERROR
+    1060, # ER_DUP_FIELDNAME
+    1061, # ER_DUP_KEYNAME
+    1826, # ER_FK_DUP_NAME
+}
+
+CREATE_MIGRATIONS_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INT PRIMARY KEY,
+        name VARCHAR(255) NOT NULL,
+        checksum CHAR(64) NOT NULL,
+        applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+LOCK_NAME = 'hotel_schema_migrations'
+LOCK_TIMEOUT = 60
+
+
+class MigrationError(Exception):
+    """A migration statement failed; later migrations were not applied."""
+
+
+def discover(directory=MIGRATIONS_DIR):
+    """Returns [(version, name, path), ...] for the NNNN_name.sql files in directory, in order."""
+    migrations = []
+    for filename in sorted(os.listdir(directory)):
+        match = MIGRATION_FILE.match(filename)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), os.path.join(directory, filename)))
+    return migrations
+
+
+def split_statements(sql):
+    """Splits a migration file into statements: drops -- comments, splits on ';' at line ends."""
+    lines = [line for line in sql.splitlines() if not line.strip().startswith('--')]
+    statements = re.split(r';\s*$', '\n'.join(lines), flags=re.M)
+    return [statement.strip() for statement in statements if statement.strip()]
+
+
+def checksum(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def ensure_database(config):
+    """Creates config['database'] if it doesn't exist yet."""
+    server_config = {key: value for key, value in config.items() if key != 'database'}
+    conn = mysql.connector.connect(**server_config)
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{config['database']}` CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci")
+        cursor.close()
+    finally:
+        conn.close()
+
+
+def applied_migrations(conn):
+    """Returns {version: (name, checksum)} of the migrations recorded in schema_migrations."""
+    cursor = conn.cursor()
+    cursor.execute(CREATE_MIGRATIONS_TABLE)
+    cursor.execute("SELECT version, name, checksum FROM schema_migrations")
+    applied = {version: (name, digest) for version, name, digest in cursor.fetchall()}
+    cursor.close()
+    return applied
+
+
+def status(conn, directory=MIGRATIONS_DIR):
+    """Returns [(version, name, state), ...], state being 'applied', 'pending' or 'changed'."""
+    applied = applied_migrations(conn)
+    rows = []
+    for version, name, path in discover(directory):
+        if version not in applied:
+            rows.append((version, name, 'pending'))
+        else:
+            rows.append((version, name, 'applied' if applied[version][1] == checksum(path) else 'changed'))
+    return rows
+
+
+def migrate(conn, directory=MIGRATIONS_DIR, target=None, log=print):
+    """Applies the pending migrations up to target (all by default). Returns the versions applied.
+
+    Holds a MySQL named lock so several app processes starting at once don't race. Each
+    migration is recorded once all its statements have run; statements that fail only
+    because their object already exists are skipped.
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT GET_LOCK(%s, %s)", (LOCK_NAME, LOCK_TIMEOUT))
+    if cursor.fetchone()[0] != 1:
+        cursor.close()
+        raise MigrationError(f"Timed out waiting for another migration run ({LOCK_NAME}).")
+    try:
+        applied = applied_migrations(conn)
+        done = []
+        for version, name, path in discover(directory):
+            if version in applied or (target is not None and version > target):
+                continue
+            with open(path) as f:
+                statements = split_statements(f.read())
+            log(f"Applying {version:04d}_{name} ({len(statements)} statements)")
+            for statement in statements:
+                try:
+                    cursor.execute(statement)
+                    if cursor.with_rows:
+                        cursor.fetchall()
+                except mysql.connector.Error as err:
+                    if err.errno in ALREADY_APPLIED_ERRNOS:
+                        log(f"  skipped, already applied: {err.msg}")
+                        continue
+                    conn.rollback()
+                    raise MigrationError(f"{version:04d}_{name} failed: {err}\n{statement}") from err
+            cursor.execute("INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s)",
+                           (version, name, checksum(path)))
+            conn.commit()
+            done.append(version)
+        return done
+    finally:
+        cursor.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+        cursor.fetchall()
+        cursor.close()
+
+
+def record_property(conn, property_id, code, name):
+    """Records in the property table which property this database holds.
+
+    Raises MigrationError if it already holds another property's data, so a
+    misconfigured PROPERTY_<CODE>_DB_NAME can't mix two hotels in one database.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT property_id, code FROM property")
+        recorded = cursor.fetchall()
+        if any(row != (property_id, code) for row in recorded):
+            found = ', '.join(f"{row[1]} ({row[0]})" for row in recorded)
+            raise MigrationError(f"Database holds property {found}, not {code} ({property_id}).")
+        if not recorded:
+            cursor.execute("INSERT INTO property (property_id, code, name) VALUES (%s, %s, %s)", (property_id, code, name))
+        else:
+            cursor.execute("UPDATE property SET name = %s WHERE property_id = %s", (name, property_id))
+        conn.commit()
+    finally:
+        cursor.close()
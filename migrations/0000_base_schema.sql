@@ -0,0 +1,48 @@
+-- Base schema: the tables the application was originally set up with by hand.
+-- CREATE TABLE IF NOT EXISTS leaves existing installations untouched, so
+-- `flask db-migrate` can be run against them as well as against an empty database.
+CREATE TABLE IF NOT EXISTS room_types (
+    type_id INT AUTO_INCREMENT PRIMARY KEY,
+    name VARCHAR(50) NOT NULL,
+    cost_per_day DECIMAL(10, 2) NOT NULL,
+    UNIQUE KEY uq_room_types_name (name)
+);
+
+CREATE TABLE IF NOT EXISTS rooms (
+    room_id INT AUTO_INCREMENT PRIMARY KEY,
+    room_number VARCHAR(50) NOT NULL,
+    floor INT NOT NULL,
+    type_id INT NOT NULL,
+    is_occupied BOOLEAN NOT NULL DEFAULT FALSE,
+    UNIQUE KEY uq_rooms_number (room_number),
+    CONSTRAINT fk_rooms_type FOREIGN KEY (type_id) REFERENCES room_types (type_id)
+);
+
+CREATE TABLE IF NOT EXISTS customers (
+    customer_id INT AUTO_INCREMENT PRIMARY KEY,
+    passport_number VARCHAR(50) NOT NULL,
+    last_name VARCHAR(100) NOT NULL,
+    first_name VARCHAR(100) NOT NULL,
+    middle_name VARCHAR(100) NULL,
+    city VARCHAR(100) NOT NULL,
+    check_in_date DATE NOT NULL,
+    check_out_date DATE NULL,
+    assigned_room_id INT NULL,
+    CONSTRAINT fk_customers_room FOREIGN KEY (assigned_room_id) REFERENCES rooms (room_id)
+);
+
+CREATE TABLE IF NOT EXISTS employees (
+    employee_id INT AUTO_INCREMENT PRIMARY KEY,
+    last_name VARCHAR(100) NOT NULL,
+    first_name VARCHAR(100) NOT NULL,
+    middle_name VARCHAR(100) NULL
+);
+
+-- Dismissing an employee removes their schedule entries
+CREATE TABLE IF NOT EXISTS cleaning_schedule (
+    schedule_id INT AUTO_INCREMENT PRIMARY KEY,
+    employee_id INT NOT NULL,
+    floor INT NOT NULL,
+    day_of_week ENUM('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday') NOT NULL,
+    CONSTRAINT fk_cleaning_schedule_employee FOREIGN KEY (employee_id) REFERENCES employees (employee_id) ON DELETE CASCADE
+);
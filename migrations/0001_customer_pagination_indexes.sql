@@ -0,0 +1,14 @@
+-- Indexes for keyset pagination of /customers/all and /customers.
+-- Each page becomes an index range scan instead of a filesort over the whole customers table.
+
+-- /customers/all: ORDER BY check_in_date DESC, last_name, customer_id (optionally filtered by check-in date range)
+CREATE INDEX idx_customers_history ON customers (check_in_date DESC, last_name, customer_id);
+
+-- /customers/all?city=...: equality on city, then the same ordering
+CREATE INDEX idx_customers_city_history ON customers (city, check_in_date DESC, last_name, customer_id);
+
+-- /customers: current guests (check_out_date IS NULL) ordered by name; also serves name-prefix filters
+CREATE INDEX idx_customers_current ON customers (check_out_date, last_name, first_name, customer_id);
+
+-- /customers/all?name=...: last-name prefix range
+CREATE INDEX idx_customers_name ON customers (last_name, first_name, customer_id);
@@ -0,0 +1,30 @@
+-- Daily revenue rollup read by /hotel_report.
+-- One row per check-out date and room type. check_out_customer queues a revenue_rollup job,
+-- which recomputes the check-out date's rows after the check-out commits.
+CREATE TABLE IF NOT EXISTS revenue_daily (
+    revenue_date DATE NOT NULL,
+    type_id INT NOT NULL,
+    stays INT NOT NULL DEFAULT 0,
+    nights INT NOT NULL DEFAULT 0,
+    revenue DECIMAL(12, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (revenue_date, type_id),
+    KEY idx_revenue_daily_type (type_id)
+);
+
+-- Backfill from the stays completed before this migration
+INSERT INTO revenue_daily (revenue_date, type_id, stays, nights, revenue)
+SELECT c.check_out_date,
+       r.type_id,
+       COUNT(*),
+       SUM(GREATEST(DATEDIFF(c.check_out_date, c.check_in_date), 1)),
+       SUM(GREATEST(DATEDIFF(c.check_out_date, c.check_in_date), 1) * rt.cost_per_day)
+FROM customers c
+JOIN rooms r ON c.assigned_room_id = r.room_id
+JOIN room_types rt ON r.type_id = rt.type_id
+WHERE c.check_out_date IS NOT NULL
+  AND c.check_in_date IS NOT NULL
+GROUP BY c.check_out_date, r.type_id
+ON DUPLICATE KEY UPDATE
+    stays = VALUES(stays),
+    nights = VALUES(nights),
+    revenue = VALUES(revenue);
@@ -0,0 +1,4 @@
+-- Covering index for the occupancy report's overlap query:
+--   check_in_date <= :end AND (check_out_date IS NULL OR check_out_date >= :start)
+-- The range on check_out_date (including NULL for open stays) skips stays that ended before the period.
+CREATE INDEX idx_customers_stay_interval ON customers (check_out_date, check_in_date, assigned_room_id);
@@ -0,0 +1,7 @@
+-- Check-in takes a locking read on "passport_number = ? AND check_out_date IS NULL".
+-- Without an index InnoDB would lock every customers row it scans; with it, only the
+-- matching index range is locked, so unrelated check-ins don't block each other.
+CREATE INDEX idx_customers_passport ON customers (passport_number, check_out_date);
+
+-- Check-out only frees a room once no guest remains assigned to it
+CREATE INDEX idx_customers_room_current ON customers (assigned_room_id, check_out_date);
@@ -0,0 +1,23 @@
+-- Issued invoices, one row per stay. check_out_customer queues an issue_invoice job, which
+-- writes the row after the check-out commits, priced at the rate frozen at check-out
+-- (customers.billed_rate, 0010), so reprints never change.
+-- html is the rendered invoice (templates/_invoice.html); content_hash is its SHA-256 and
+-- doubles as the HTTP ETag. Stays checked out before this migration get their invoice
+-- the first time it is viewed or archived.
+CREATE TABLE IF NOT EXISTS invoices (
+    invoice_id INT AUTO_INCREMENT PRIMARY KEY,
+    customer_id INT NOT NULL,
+    check_in_date DATE NOT NULL,
+    check_out_date DATE NOT NULL,
+    room_number VARCHAR(50) NOT NULL,
+    type_name VARCHAR(50) NOT NULL,
+    cost_per_day DECIMAL(10, 2) NOT NULL,
+    nights INT NOT NULL,
+    total DECIMAL(12, 2) NOT NULL,
+    content_hash CHAR(64) NOT NULL,
+    html MEDIUMTEXT NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY uq_invoices_customer (customer_id),
+    KEY idx_invoices_check_out (check_out_date, customer_id),
+    CONSTRAINT fk_invoices_customer FOREIGN KEY (customer_id) REFERENCES customers (customer_id)
+);
@@ -0,0 +1,34 @@
+-- Room reservations and stays as date intervals, for availability search and the calendar.
+-- A row covers the nights [start_date, end_date). Stays are written by check-in (status
+-- 'in_house') and closed by check-out ('completed'); future bookings start as 'booked'.
+-- In-house guests without an expected check-out date hold the room until 9999-12-31.
+CREATE TABLE IF NOT EXISTS reservations (
+    reservation_id INT AUTO_INCREMENT PRIMARY KEY,
+    room_id INT NOT NULL,
+    customer_id INT NULL,
+    guest_name VARCHAR(200) NULL,
+    start_date DATE NOT NULL,
+    end_date DATE NOT NULL,
+    status ENUM('booked', 'in_house', 'completed', 'cancelled') NOT NULL DEFAULT 'booked',
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    -- "Is room R free between A and B": one range seek per room on end_date > A
+    KEY idx_reservations_room_interval (room_id, end_date, start_date, status),
+    -- Calendar window: every reservation ending after the window starts
+    KEY idx_reservations_window (end_date, start_date),
+    KEY idx_reservations_customer (customer_id, status),
+    CONSTRAINT fk_reservations_room FOREIGN KEY (room_id) REFERENCES rooms (room_id),
+    CONSTRAINT fk_reservations_customer FOREIGN KEY (customer_id) REFERENCES customers (customer_id)
+);
+
+-- Backfill from existing stays
+INSERT INTO reservations (room_id, customer_id, start_date, end_date, status)
+SELECT c.assigned_room_id,
+       c.customer_id,
+       c.check_in_date,
+       CASE WHEN c.check_out_date IS NULL THEN '9999-12-31'
+            ELSE GREATEST(c.check_out_date, c.check_in_date + INTERVAL 1 DAY) END,
+       CASE WHEN c.check_out_date IS NULL THEN 'in_house' ELSE 'completed' END
+FROM customers c
+WHERE c.assigned_room_id IS NOT NULL
+  AND c.check_in_date IS NOT NULL
+  AND NOT EXISTS (SELECT 1 FROM reservations v WHERE v.customer_id = c.customer_id);
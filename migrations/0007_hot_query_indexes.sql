@@ -0,0 +1,20 @@
+-- Indexes for the remaining hot lookups, found with `flask index-advisor`.
+
+-- Check-in forms: WHERE is_occupied = FALSE ORDER BY room_number, read in index order
+CREATE INDEX idx_rooms_available ON rooms (is_occupied, room_number);
+
+-- /rooms and the calendar (ORDER BY floor, room_number), the floor list and the
+-- per-floor occupancy the schedule optimizer groups by, all from the index
+CREATE INDEX idx_rooms_floor ON rooms (floor, room_number, is_occupied);
+
+-- "Current guests from city X": equality on both columns, then the name order
+CREATE INDEX idx_customers_city_current ON customers (city, check_out_date, last_name, first_name);
+
+-- Cleaner lookups by (floor, day); also replaces a full scan when building the cleaner index
+CREATE INDEX idx_cleaning_schedule_slot ON cleaning_schedule (floor, day_of_week, employee_id);
+
+-- Duplicate-assignment check when adding a schedule entry
+CREATE INDEX idx_cleaning_schedule_employee ON cleaning_schedule (employee_id, floor, day_of_week);
+
+-- Employee lists ordered by name
+CREATE INDEX idx_employees_name ON employees (last_name, first_name);
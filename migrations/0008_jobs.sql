@@ -0,0 +1,23 @@
+-- Background jobs (jobs.py). Work that doesn't have to finish before a request returns,
+-- e.g. issuing the invoice and updating revenue_daily after a check-out, is inserted here
+-- in the same transaction as the write that needs it, and run by the job worker.
+-- Workers claim due queued jobs with FOR UPDATE SKIP LOCKED and hold them until
+-- locked_until; failures are retried at run_at with backoff until max_attempts.
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    kind VARCHAR(50) NOT NULL,
+    payload TEXT NOT NULL,
+    status ENUM('queued', 'running', 'done', 'failed') NOT NULL DEFAULT 'queued',
+    attempts INT NOT NULL DEFAULT 0,
+    max_attempts INT NOT NULL DEFAULT 5,
+    run_at DATETIME(6) NOT NULL,
+    created_at DATETIME(6) NOT NULL,
+    started_at DATETIME(6) NULL,
+    finished_at DATETIME(6) NULL,
+    locked_by VARCHAR(100) NULL,
+    locked_until DATETIME(6) NULL,
+    last_error TEXT NULL,
+    -- Claiming: status = 'queued' AND run_at <= now ORDER BY run_at; also lease expiry and purging
+    KEY idx_jobs_due (status, run_at),
+    KEY idx_jobs_lease (status, locked_until)
+);
@@ -0,0 +1,18 @@
+-- Multiple properties (properties.py). Each hotel of the group has its own database, so
+-- its customers, rooms, stays, revenue and jobs are a shard of the group's data and the
+-- tables need no property_id column. The property table records, in each database,
+-- which property it belongs to; `flask db-migrate` fills it in and refuses to migrate a
+-- database recorded for another property, which guards against misconfigured routing.
+--
+-- Customer history is not partitioned by check-in year: InnoDB doesn't support foreign
+-- keys on partitioned tables (reservations and invoices reference customers, customers
+-- reference rooms), and every unique key would have to include check_in_date. Yearly
+-- history scans are range scans on idx_customers_history, within a single property's
+-- database, which keeps each shard's table to one hotel's stays.
+CREATE TABLE IF NOT EXISTS property (
+    property_id INT PRIMARY KEY,
+    code VARCHAR(50) NOT NULL,
+    name VARCHAR(200) NOT NULL,
+    recorded_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY uq_property_code (code)
+);
@@ -0,0 +1,19 @@
+-- The nightly rate a stay was billed at, frozen at check-out. check_out_customer sets it
+-- from the room type's rate in the check-out transaction; the issue_invoice and
+-- revenue_rollup jobs then price the stay from it, so a later rate change re-prices
+-- neither the invoice nor revenue_daily. Still NULL for guests in house.
+ALTER TABLE customers ADD COLUMN billed_rate DECIMAL(10, 2) NULL;
+
+-- Backfill completed stays: the rate on their issued invoice, else today's rate (the
+-- one revenue_daily was last computed with)
+UPDATE customers c
+JOIN invoices i ON i.customer_id = c.customer_id
+SET c.billed_rate = i.cost_per_day
+WHERE c.billed_rate IS NULL;
+
+UPDATE customers c
+JOIN rooms r ON c.assigned_room_id = r.room_id
+JOIN room_types rt ON r.type_id = rt.type_id
+SET c.billed_rate = rt.cost_per_day
+WHERE c.billed_rate IS NULL
+  AND c.check_out_date IS NOT NULL;
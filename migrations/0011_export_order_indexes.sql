@@ -0,0 +1,9 @@
+-- Found with `flask index-advisor` once it checks the queries built at runtime: the
+-- exports stream stays in (date, customer_id) order, which no index gave, so every
+-- export sorted its whole range before sending the first row.
+
+-- Customer history export: ORDER BY check_in_date, customer_id over a check-in range
+CREATE INDEX idx_customers_check_in_order ON customers (check_in_date, customer_id);
+
+-- Income export and the invoice archive: ORDER BY check_out_date, customer_id over a check-out range
+CREATE INDEX idx_customers_check_out_order ON customers (check_out_date, customer_id);
@@ -0,0 +1,127 @@
+from dataclasses import dataclass, fields
+
+
+class Row:
+    """Read access by column name (row['city'], keys(), values(), items(), get()).
+
+    Code and templates written against dictionary cursors keep working with the
+    models, which store one slot per column instead of a dict per row.
+    """
+
+    __slots__ = ()
+    _fields = ()
+    _field_set = frozenset()
+
+    def __getitem__(self, key):
+        if key not in self._field_set:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key):
+        return key in self._field_set
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def keys(self):
+        return self._fields
+
+    def values(self):
+        return [getattr(self, name) for name in self._fields]
+
+    def items(self):
+        return [(name, getattr(self, name)) for name in self._fields]
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self._field_set else default
+
+
+def row_model(cls):
+    """Makes cls a slotted dataclass whose fields are, in order, the columns its queries select."""
+    cls = dataclass(slots=True)(cls)
+    cls._fields = tuple(field.name for field in fields(cls))
+    cls._field_set = frozenset(cls._fields)
+    return cls
+
+
+@row_model
+class Customer(Row):
+    customer_id: int
+    passport_number: str
+    last_name: str
+    first_name: str
+    middle_name: str
+    city: str
+    check_in_date: object
+    check_out_date: object
+    assigned_room_id: int
+    room_number: str # From the joined room; None when the customer has none
+
+
+@row_model
+class Room(Row):
+    room_id: int
+    room_number: str
+    floor: int
+    type_id: int
+    type_name: str
+    cost_per_day: object
+    is_occupied: bool
+
+
+@row_model
+class Employee(Row):
+    employee_id: int
+    last_name: str
+    first_name: str
+    middle_name: str
+
+
+@row_model
+class ScheduleEntry(Row):
+    schedule_id: int
+    employee_id: int
+    first_name: str
+    last_name: str
+    floor: int
+    day_of_week: str
+
+
+# SELECT lists matching each model's fields, for queries aliasing customers c, rooms r,
+# room_types rt, employees e and cleaning_schedule cs
+CUSTOMER_COLUMNS = """c.customer_id, c.passport_number, c.last_name, c.first_name, c.middle_name, c.city,
+           c.check_in_date, c.check_out_date, c.assigned_room_id, r.room_number"""
+ROOM_COLUMNS = "r.room_id, r.room_number, r.floor, r.type_id, rt.name as type_name, rt.cost_per_day, r.is_occupied"
+EMPLOYEE_COLUMNS = "e.employee_id, e.last_name, e.first_name, e.middle_name"
+SCHEDULE_ENTRY_COLUMNS = "cs.schedule_id, cs.employee_id, e.first_name, e.last_name, cs.floor, cs.day_of_week"
+
+
+def check_columns(cursor, model):
+    """Raises ValueError unless the cursor's columns are the model's fields, in order."""
+    columns = tuple(column[0] for column in cursor.description or ())
+    if columns != model._fields:
+        raise ValueError(f"{model.__name__} expects columns {', '.join(model._fields)}; the query returned {', '.join(columns)}")
+
+
+def fetch_models(cursor, model, one=False):
+    """Builds models from a tuple cursor's result: a list, or with one=True the first row or None."""
+    check_columns(cursor, model)
+    if one:
+        row = cursor.fetchone()
+        return model(*row) if row is not None else None
+    return [model(*row) for row in cursor.fetchall()]
+
+
+def iter_rows(cursor, model=None, batch_size=1000):
+    """Yields a tuple cursor's rows batch by batch (as models if given), never holding the whole result."""
+    if model is not None:
+        check_columns(cursor, model)
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        if model is None:
+            yield from rows
+        else:
+            for row in rows:
+                yield model(*row)
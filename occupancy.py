@@ -0,0 +1,117 @@
+from collections import defaultdict
+from datetime import date, timedelta
+
+ONE_DAY = timedelta(days=1)
+
+
+def _as_date(value):
+    if value is None or isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def occupied_days(stays, start, end, today=None):
+    """Counts the nights each room was occupied between start and end (both inclusive).
+
+    stays is an iterable of (room_id, check_in_date, check_out_date) tuples. A stay
+    occupies the nights [check_in, check_out), and always at least one night (matching
+    how stays are billed). Stays still open count as occupied up to and including today.
+
+    Each room's stays are clipped to the period, sorted and merged in one sweep, so the
+    cost is O(n log n) in the number of overlapping stays regardless of period length.
+    Returns {room_id: nights occupied}.
+    """
+    today = today or date.today()
+    period_start = start
+    period_end = end + ONE_DAY # Exclusive
+    open_stay_end = min(today + ONE_DAY, period_end)
+
+    intervals = defaultdict(list)
+    for room_id, check_in, check_out in stays:
+        check_in, check_out = _as_date(check_in), _as_date(check_out)
+        if check_in is None:
+            continue
+        stay_end = max(check_out, check_in + ONE_DAY) if check_out else max(open_stay_end, check_in + ONE_DAY)
+        lo, hi = max(check_in, period_start), min(stay_end, period_end)
+        if lo < hi:
+            intervals[room_id].append((lo, hi))
+
+    occupied = {}
+    for room_id, room_intervals in intervals.items():
+        room_intervals.sort()
+        total = 0
+        current_lo, current_hi = room_intervals[0]
+        for lo, hi in room_intervals[1:]:
+            if lo > current_hi:
+                total += (current_hi - current_lo).days
+                current_lo, current_hi = lo, hi
+            elif hi > current_hi:
+                current_hi = hi # Overlapping stays (e.g. shared room) count once
+        total += (current_hi - current_lo).days
+        occupied[room_id] = total
+    return occupied
+
+
+def occupancy_report(rooms, stays, start, end, today=None):
+    """Builds per-room occupied/free day counts for the period.
+
+    rooms is a list of dicts with at least 'room_id'; each is returned with
+    'days_occupied', 'days_free' and 'occupancy_rate' added, plus overall totals.
+    """
+    period_days = (end - start).days + 1
+    occupied = occupied_days(stays, start, end, today)
+    rows = []
+    total_occupied = 0
+    for room in rooms:
+        days_occupied = occupied.get(room['room_id'], 0)
+        total_occupied += days_occupied
+        rows.append(dict(room,
+                         days_occupied=days_occupied,
+                         days_free=period_days - days_occupied,
+                         occupancy_rate=days_occupied / period_days if period_days else 0.0))
+    room_days = period_days * len(rows)
+    return {
+        'start': start,
+        'end': end,
+        'period_days': period_days,
+        'rooms': rows,
+        'days_occupied': total_occupied,
+        'days_free': room_days - total_occupied,
+        'occupancy_rate': total_occupied / room_days if room_days else 0.0,
+    }
+
+
+def calendar_rows(rooms, reservations, start, days):
+    """Lays out reservations as a room x day grid for `days` days from start.
+
+    reservations are dicts with 'room_id', 'start_date' and 'end_date' (exclusive). Each
+    room is returned with 'segments': consecutive runs of {'days', 'reservation'}, where
+    reservation is None for free days, so the grid renders as colspans instead of one
+    cell per day. Overlapping reservations (guests sharing a room) extend one segment.
+    """
+    end = start + timedelta(days=days)
+    by_room = defaultdict(list)
+    for reservation in reservations:
+        lo = max(_as_date(reservation['start_date']), start)
+        hi = min(_as_date(reservation['end_date']), end)
+        if lo < hi:
+            by_room[reservation['room_id']].append((lo, hi, reservation))
+
+    rows = []
+    for room in rooms:
+        segments = []
+        cursor = start
+        for lo, hi, reservation in sorted(by_room.get(room['room_id'], []), key=lambda item: (item[0], item[1])):
+            if lo < cursor: # Overlaps the previous segment
+                if hi > cursor:
+                    segments[-1]['days'] += (hi - cursor).days
+                    cursor = hi
+                continue
+            if lo > cursor:
+                segments.append({'days': (lo - cursor).days, 'reservation': None})
+            segments.append({'days': (hi - lo).days, 'reservation': reservation})
+            cursor = hi
+        if cursor < end:
+            segments.append({'days': (end - cursor).days, 'reservation': None})
+        rows.append(dict(room, segments=segments))
+    return rows
@@ -0,0 +1,76 @@
+import os
+import re
+
+PROPERTY_CODE = re.compile(r'^[a-z0-9_]{1,50}$')
+DB_SETTINGS = {'host': 'HOST', 'user': 'USER', 'password': 'PASSWORD', 'database': 'NAME'}
+
+
+class Property:
+    """One hotel of the group, with the database that holds its data."""
+
+    def __init__(self, property_id, code, name, db_config):
+        self.property_id = property_id
+        self.code = code
+        self.name = name
+        self.db_config = db_config
+
+    def __repr__(self):
+        return f"Property({self.property_id}, {self.code!r})"
+
+
+def load_properties(base_config, env=os.environ):
+    """Reads the properties from the environment.
+
+    HOTEL_PROPERTIES lists the property codes, e.g. "lisbon,porto". For each code,
+    PROPERTY_<CODE>_NAME, PROPERTY_<CODE>_ID (default: its position, from 1) and
+    PROPERTY_<CODE>_DB_HOST/_DB_USER/_DB_PASSWORD/_DB_NAME override the shared DB_*
+    settings in base_config. Without HOTEL_PROPERTIES there is one property, 'main',
+    on base_config, so single-hotel deployments need no changes.
+    """
+    codes = [code.strip().lower() for code in env.get('HOTEL_PROPERTIES', '').split(',') if code.strip()]
+    if not codes:
+        return [Property(1, 'main', env.get('HOTEL_NAME', 'Hotel'), dict(base_config))]
+
+    properties = []
+    for position, code in enumerate(codes, start=1):
+        if not PROPERTY_CODE.match(code):
+            raise ValueError(f"Invalid property code '{code}': use lowercase letters, digits and underscores.")
+        prefix = f"PROPERTY_{code.upper()}_"
+        db_config = {key: env.get(prefix + 'DB_' + setting, base_config.get(key)) for key, setting in DB_SETTINGS.items()}
+        properties.append(Property(int(env.get(prefix + 'ID', position)), code, env.get(prefix + 'NAME', code.title()), db_config))
+    return properties
+
+
+class PropertyRegistry:
+    """The group's properties, each with its own connection pool (one database per property)."""
+
+    def __init__(self, properties, make_pool):
+        if not properties:
+            raise ValueError("At least one property is required.")
+        self.properties = list(properties)
+        self.by_code = {prop.code: prop for prop in self.properties}
+        self.by_id = {prop.property_id: prop for prop in self.properties}
+        if len(self.by_code) != len(self.properties) or len(self.by_id) != len(self.properties):
+            raise ValueError("Property codes and ids must be unique.")
+        databases = {}
+        for prop in self.properties:
+            database = (prop.db_config.get('host'), prop.db_config.get('database'))
+            if database in databases:
+                # Tables have no property column: two properties in one database would see each other's data
+                raise ValueError(f"Properties '{databases[database]}' and '{prop.code}' share database {database[1]}; "
+                                 f"give each property its own (PROPERTY_<CODE>_DB_NAME).")
+            databases[database] = prop.code
+        self.default = self.properties[0]
+        self.pools = {prop.property_id: make_pool(prop.db_config) for prop in self.properties}
+
+    def __iter__(self):
+        return iter(self.properties)
+
+    def __len__(self):
+        return len(self.properties)
+
+    def get(self, code):
+        return self.by_code.get(code)
+
+    def pool(self, prop):
+        return self.pools[prop.property_id]
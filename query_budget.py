@@ -0,0 +1,61 @@
+import logging
+import threading
+from collections import Counter
+
+budget_log = logging.getLogger('hotel.query_budget')
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised in 'raise' mode when a request goes over its query budget or repeats a query shape."""
+
+
+def query_budget(max_queries, max_repeats=None):
+    """Declares how many SQL statements a view may run per request.
+
+    max_repeats overrides how often one query shape may repeat before it is reported
+    as an N+1 pattern. Only checked when the budget mode is switched on.
+    """
+    def decorator(view):
+        view.query_budget = max_queries
+        view.query_repeat_limit = max_repeats
+        return view
+    return decorator
+
+
+class RequestQueryLog:
+    """SQL statements and database round trips made while handling one request.
+
+    Thread-safe: the async views' loaders record into their request's log from worker threads.
+    """
+
+    def __init__(self):
+        self.statements = Counter() # fingerprint -> executions
+        self.round_trips = 0
+        self._lock = threading.Lock()
+
+    def record_statement(self, fingerprint_text):
+        with self._lock:
+            self.statements[fingerprint_text] += 1
+            self.round_trips += 1
+
+    def record_round_trip(self):
+        """A commit or rollback: no statement, but still a trip to the server."""
+        with self._lock:
+            self.round_trips += 1
+
+    @property
+    def count(self):
+        return sum(self.statements.values())
+
+    def repeated(self, limit):
+        return {fp: n for fp, n in self.statements.items() if n > limit}
+
+
+def check_budget(log, route, budget, repeat_limit):
+    """Returns a list of problems: over budget, and query shapes run more than repeat_limit times."""
+    problems = []
+    if budget is not None and log.count > budget:
+        problems.append(f"{route} ran {log.count} SQL statements (budget {budget})")
+    for fp, n in sorted(log.repeated(repeat_limit).items(), key=lambda item: -item[1]):
+        problems.append(f"{route} ran one query shape {n} times (possible N+1): {fp}")
+    return problems
@@ -0,0 +1,46 @@
+import heapq
+
+DEFAULT_DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+
+def floor_weights(rooms_per_floor, occupied_per_floor, occupied_weight=2.0):
+    """Cleaning effort per floor: every room counts once, occupied rooms count extra.
+
+    Both arguments map floor -> room count. Floors without rooms get no weight.
+    """
+    return {
+        floor: rooms + occupied_weight * occupied_per_floor.get(floor, 0)
+        for floor, rooms in rooms_per_floor.items()
+        if rooms
+    }
+
+
+def optimize_week(weights, employee_ids, days=DEFAULT_DAYS):
+    """Assigns every floor to one cleaner on every day, balancing the weekly workload.
+
+    weights maps floor -> cleaning effort. Each day, floors are handed out heaviest
+    first to the cleaner with the least work so far this week (LPT scheduling on a
+    min-heap). That is O(days * floors * log employees) and keeps every cleaner's weekly
+    load within one floor's weight of the others. Ties rotate across days, so the same
+    cleaner doesn't always get the heaviest floor.
+
+    Returns (entries, loads): entries is a list of (employee_id, floor, day) and loads
+    maps employee_id -> total weekly weight.
+    """
+    if not employee_ids or not weights:
+        return [], {employee_id: 0 for employee_id in employee_ids}
+
+    floors = sorted(weights, key=lambda floor: (-weights[floor], floor))
+    # Heap of (weekly load, rotation tiebreak, employee_id)
+    heap = [(0, index, employee_id) for index, employee_id in enumerate(employee_ids)]
+    heapq.heapify(heap)
+    entries = []
+    for day_index, day in enumerate(days):
+        for floor in floors:
+            load, _, employee_id = heapq.heappop(heap)
+            entries.append((employee_id, floor, day))
+            load += weights[floor]
+            tiebreak = (day_index * len(floors) + len(entries)) % len(employee_ids)
+            heapq.heappush(heap, (load, tiebreak, employee_id))
+    loads = {employee_id: load for load, _, employee_id in heap}
+    return entries, loads